@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML documentation generator.
+
+Measures, for the real schema corpus and for synthetic corpora scaled up in
+nesting depth, oneOf width and shared $ref count:
+- End-to-end runs: cold (empty output directory), warm (unchanged inputs,
+  served from the build manifest) and forced (full re-render in the same
+  process, with warm enum and fragment caches)
+- Phases of a serial build: loading the schemas, get_underlying_type
+  resolution over every field, table rendering (cold and warm fragment
+  cache) and page writes
+
+Every measurement is repeated and reported as the minimum and median wall
+time in seconds. Results are written as JSON so runs from different commits
+can be compared with --compare.
+
+The generator is imported from --generator-dir, so the same script can time
+another checkout, such as the commit before a change. End-to-end runs only
+use PacketDocGenerator(output_dir, source_dir).generate_documentation, which
+every version has. Each phase is only timed if the generator has the hooks it
+needs. Older generators have no separate load, render or write step, so their
+results only hold the end-to-end runs and the type resolution phase.
+
+Usage:
+    python benchmark_generator.py [input_path] [output_file] [--repeat N]
+                                  [--synthetic SPEC ...] [--compare BASELINE]
+                                  [--generator-dir DIR]
+
+    input_path: Optional path to directory containing JSON files (default: ../json)
+    output_file: Optional path of the JSON results (default: ./benchmark_results.json in script directory)
+    --repeat N: Number of timed repetitions per measurement (default: 3)
+    --synthetic SPEC: Add a synthetic corpus, PACKETS:DEPTH:ONEOF_WIDTH:SHARED_REFS
+                      (default: 50:8:16:32 and 200:16:64:128)
+    --compare BASELINE: Print the change of every timing against an earlier results file
+    --generator-dir DIR: Directory generate_html_table.py is imported from (default: script directory)
+"""
+
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_REPEAT = 3
+
+DEFAULT_SYNTHETIC_SPECS = ['50:8:16:32', '200:16:64:128']
+
+
+def time_call(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Time func over several repetitions, with its output suppressed.
+
+    Args:
+        func: Callable to time
+        repeat: Number of repetitions
+        setup: Optional untimed callable run before each repetition
+
+    Returns:
+        Dict with the 'min' and 'median' wall time in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times)}
+
+
+def iter_fields(schema: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield every field schema nested in a schema, including its definitions."""
+    for definition in schema.get('definitions', {}).values():
+        yield from iter_fields(definition)
+    for field in schema.get('properties', {}).values():
+        yield field
+        yield from iter_fields(field)
+    for variant in schema.get('oneOf', []):
+        yield variant
+        yield from iter_fields(variant)
+    for key in ('items', 'additionalProperties'):
+        if isinstance(schema.get(key), dict):
+            yield schema[key]
+            yield from iter_fields(schema[key])
+
+
+def make_synthetic_corpus(target_dir: Path, packets: int, depth: int,
+                          oneof_width: int, shared_refs: int):
+    """
+    Write a synthetic schema corpus that stresses the generator.
+
+    Every packet has a chain of depth nested definitions, a oneOf field with
+    oneof_width variants and an array of items, all referring to a pool of
+    shared_refs definitions that every packet carries.
+
+    Args:
+        target_dir: Directory the packet schema files are written to
+        packets: Number of packet files
+        depth: Nesting depth of each packet's definition chain
+        oneof_width: Number of variants of each packet's oneOf field
+        shared_refs: Number of definitions shared by all packets
+    """
+    target_dir.mkdir(parents=True, exist_ok=True)
+    shared_refs = max(shared_refs, 1)
+
+    shared = {}
+    for i in range(shared_refs):
+        shared[str(1000000 + i)] = {
+            'title': f'SharedDefinition{i}',
+            'type': 'object',
+            'properties': {
+                'Runtime Id': {'type': 'integer', 'x-underlying-type': 'uint64',
+                               'x-serialization-options': ['Compression'], 'x-ordinal-index': 0},
+                'Name': {'type': 'string', 'x-ordinal-index': 1, 'maxLength': 64},
+                'Mode': {'title': f'SharedMode{i}', 'type': 'string', 'x-underlying-type': 'uint8',
+                         'enum': ['None', 'Some', 'All'], 'x-ordinal-index': 2},
+            },
+            'required': ['Runtime Id', 'Name', 'Mode']
+        }
+
+    def shared_ref(i: int) -> Dict[str, Any]:
+        return {'$ref': f'#/definitions/{1000000 + i % shared_refs}'}
+
+    for packet in range(packets):
+        definitions = dict(shared)
+        first_level = 2000000 + packet * depth
+        for level in range(depth):
+            properties = {
+                'Value': {'type': 'integer', 'x-underlying-type': 'int32', 'x-ordinal-index': 0},
+                'Shared': {**shared_ref(packet + level), 'x-ordinal-index': 1},
+            }
+            if level + 1 < depth:
+                properties['Next'] = {'$ref': f'#/definitions/{first_level + level + 1}', 'x-ordinal-index': 2}
+            definitions[str(first_level + level)] = {
+                'title': f'Packet{packet}Level{level}',
+                'type': 'object',
+                'properties': properties
+            }
+
+        properties = {
+            'Variant': {
+                'oneOf': [
+                    {'title': f'Variant{i}', **shared_ref(i)} if i % 2 else
+                    {'title': f'Variant{i}', 'type': 'integer', 'x-underlying-type': 'uint16'}
+                    for i in range(oneof_width)
+                ],
+                'x-ordinal-index': 1
+            },
+            'Items': {'type': 'array', 'items': shared_ref(packet), 'x-ordinal-index': 2},
+        }
+        if depth:
+            properties['Nested'] = {'$ref': f'#/definitions/{first_level}', 'x-ordinal-index': 0}
+
+        schema = {
+            '$schema': 'http://json-schema.org/draft-07/schema#',
+            'definitions': definitions,
+            'title': f'SyntheticPacket{packet}',
+            'description': 'Synthetic benchmark packet.',
+            'type': 'object',
+            'properties': properties,
+            '$metaProperties': {'[cereal:packet]': packet}
+        }
+        with open(target_dir / f'SyntheticPacket{packet}.json', 'w', encoding='utf-8') as f:
+            json.dump(schema, f)
+
+
+def import_generator(generator_dir: Path) -> ModuleType:
+    """Import generate_html_table (and the modules it imports) from generator_dir."""
+    sys.path.insert(0, str(generator_dir.resolve()))
+    return importlib.import_module('generate_html_table')
+
+
+def schema_files(generator: ModuleType, source_dir: Path) -> List[Path]:
+    """Return the schema files the generator renders, listed as its main() does."""
+    if hasattr(generator, 'find_schema_files'):
+        return generator.find_schema_files(source_dir)
+    return sorted(f for f in source_dir.glob("*.json") if not f.name.startswith("enum_"))
+
+
+def read_packet_file(json_file: Path) -> Optional[Tuple[str, str, int, Dict[str, Any]]]:
+    """Load a schema file for generators without load_packet_file (not timed)."""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or 'properties' not in data:
+        return None
+    packet_id = data.get('$metaProperties', {}).get('[cereal:packet]', -1)
+    return data.get('title', json_file.stem), data.get('description', ''), packet_id, data
+
+
+def benchmark_corpus(generator_module: ModuleType, source_dir: Path, work_dir: Path,
+                     repeat: int) -> Dict[str, Any]:
+    """
+    Run every measurement the generator supports over one corpus.
+
+    Args:
+        generator_module: The imported generate_html_table module
+        source_dir: Directory containing the schema files
+        work_dir: Scratch directory for output pages
+        repeat: Number of timed repetitions per measurement
+
+    Returns:
+        Dict of corpus statistics and timings
+    """
+    PacketDocGenerator = generator_module.PacketDocGenerator
+    json_files = schema_files(generator_module, source_dir)
+    results: Dict[str, Any] = {'files': len(json_files)}
+
+    # End-to-end runs
+    work_dir.mkdir(parents=True, exist_ok=True)
+    run_dir = work_dir / 'run'
+
+    def clean_output():
+        if run_dir.exists():
+            for path in run_dir.iterdir():
+                path.unlink()
+
+    def full_build():
+        PacketDocGenerator(run_dir, source_dir).generate_documentation(json_files)
+
+    results['cold'] = time_call(full_build, repeat, setup=clean_output)
+    results['warm'] = time_call(full_build, repeat)
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = PacketDocGenerator(run_dir, source_dir)
+    if 'force' in inspect.signature(generator.generate_documentation).parameters:
+        results['forced'] = time_call(lambda: generator.generate_documentation(json_files, force=True), repeat)
+    else:
+        # Without a build manifest every run re-renders everything
+        results['forced'] = time_call(lambda: generator.generate_documentation(json_files), repeat)
+    results['output_bytes'] = sum(path.stat().st_size for path in run_dir.iterdir())
+
+    # Phases of a serial build
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = PacketDocGenerator(work_dir / 'phases', source_dir)
+        if hasattr(generator.enum_cache, 'load'):
+            generator.enum_cache.load()
+    packets: List[Tuple[Path, Tuple[str, str, int, Dict[str, Any]]]] = []
+    load_packet_file = getattr(generator, 'load_packet_file', read_packet_file)
+
+    def load():
+        packets.clear()
+        for json_file in json_files:
+            packet = load_packet_file(json_file)
+            if packet is not None:
+                packets.append((json_file, packet))
+
+    results['phases'] = {}
+    if hasattr(generator, 'load_packet_file'):
+        results['phases']['load'] = time_call(load, repeat)
+    else:
+        load()
+    fields = [field for _, (_, _, _, data) in packets for field in iter_fields(data)]
+    results['packets'] = len(packets)
+    results['fields'] = len(fields)
+
+    def resolve():
+        for _, (_, _, _, data) in packets:
+            definitions = data.get('definitions', {})
+            for field in iter_fields(data):
+                generator.get_underlying_type(field, definitions)
+
+    results['phases']['resolve'] = time_call(resolve, repeat)
+    if not (hasattr(generator, 'iter_packet_content') and hasattr(generator, 'write_page')):
+        return results
+
+    pages: List[Tuple[Path, str, str]] = []
+
+    def render():
+        pages.clear()
+        for json_file, (title, description, _, data) in packets:
+            content = ''.join(generator.iter_packet_content(json_file, title, description, data))
+            pages.append((json_file, title, content))
+
+    def reset_fragment_cache():
+        generator.fragment_cache.fragments.clear()
+
+    results['phases']['render_cold'] = time_call(render, repeat, setup=reset_fragment_cache)
+    results['phases']['render_warm'] = time_call(render, repeat)
+
+    def write():
+        for json_file, title, content in pages:
+            generator.write_page(generator.output_dir / f'{json_file.stem}.html', title, (content,))
+
+    results['phases']['write'] = time_call(write, repeat)
+    return results
+
+
+def git_revision(path: Path) -> str:
+    """Return the current git commit of the repository at path, or '' outside of git."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def iter_timings(results: Dict[str, Any], prefix: str = '') -> Iterator[Tuple[str, float]]:
+    """Yield (dotted name, median seconds) for every timing in a results dict."""
+    for key, value in results.items():
+        if isinstance(value, dict) and 'median' in value:
+            yield f'{prefix}{key}', value['median']
+        elif isinstance(value, dict):
+            yield from iter_timings(value, f'{prefix}{key}.')
+
+
+def print_comparison(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print each median timing next to its baseline value."""
+    previous = dict(iter_timings(baseline['corpora']))
+    print(f"\nComparison with {baseline.get('revision') or 'baseline'}:")
+    for name, seconds in iter_timings(results['corpora']):
+        if name not in previous:
+            print(f"  {name}: {seconds:.4f}s (new)")
+            continue
+        before = previous[name]
+        change = (seconds - before) / before * 100 if before else 0.0
+        print(f"  {name}: {before:.4f}s -> {seconds:.4f}s ({change:+.1f}%)")
+
+
+def parse_synthetic_spec(spec: str) -> Tuple[int, int, int, int]:
+    """Parse a PACKETS:DEPTH:ONEOF_WIDTH:SHARED_REFS synthetic corpus spec."""
+    try:
+        packets, depth, oneof_width, shared_refs = (int(part) for part in spec.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid synthetic spec '{spec}', expected PACKETS:DEPTH:ONEOF_WIDTH:SHARED_REFS")
+    return packets, depth, oneof_width, shared_refs
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Benchmark the HTML documentation generator.")
+    parser.add_argument('input_path', nargs='?', type=Path,
+                        help="Directory containing JSON files (default: ../json)")
+    parser.add_argument('output_file', nargs='?', type=Path,
+                        help="JSON results file (default: ./benchmark_results.json in script directory)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, metavar='N',
+                        help=f"Timed repetitions per measurement (default: {DEFAULT_REPEAT})")
+    parser.add_argument('--synthetic', type=parse_synthetic_spec, action='append', metavar='SPEC',
+                        help="Synthetic corpus PACKETS:DEPTH:ONEOF_WIDTH:SHARED_REFS (repeatable)")
+    parser.add_argument('--compare', type=Path, metavar='BASELINE',
+                        help="Earlier results file to compare against")
+    parser.add_argument('--generator-dir', type=Path, metavar='DIR',
+                        help="Directory generate_html_table.py is imported from (default: script directory)")
+    args = parser.parse_args()
+
+    input_path = args.input_path or Path(__file__).parent.parent / "json"
+    output_path = args.output_file or Path(__file__).parent / "benchmark_results.json"
+    synthetic_specs = args.synthetic or [parse_synthetic_spec(spec) for spec in DEFAULT_SYNTHETIC_SPECS]
+
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+    if args.repeat < 1:
+        print("Error: --repeat must be at least 1")
+        sys.exit(1)
+    generator_dir = args.generator_dir or Path(__file__).parent
+    if not (generator_dir / 'generate_html_table.py').is_file():
+        print(f"Error: No generate_html_table.py in '{generator_dir}'")
+        sys.exit(1)
+    generator_module = import_generator(generator_dir)
+
+    results = {
+        'revision': git_revision(generator_dir),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'corpora': {}
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        corpora = [(input_path.name, input_path)]
+        for packets, depth, oneof_width, shared_refs in synthetic_specs:
+            name = f'synthetic-{packets}-{depth}-{oneof_width}-{shared_refs}'
+            make_synthetic_corpus(tmp_path / name / 'schemas', packets, depth, oneof_width, shared_refs)
+            corpora.append((name, tmp_path / name / 'schemas'))
+
+        for name, source_dir in corpora:
+            print(f"Benchmarking {name}...")
+            results['corpora'][name] = corpus = benchmark_corpus(generator_module, source_dir, tmp_path / name, args.repeat)
+            print(f"  cold {corpus['cold']['median']:.3f}s, warm {corpus['warm']['median']:.3f}s, "
+                  f"forced {corpus['forced']['median']:.3f}s")
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(results, json.load(f))
+
+    print(f"\n✓ Output file: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
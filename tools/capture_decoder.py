@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Decode a capture file of game packets into JSONL records.
+
+A capture is a sequence of frames, each a length prefix (varuint32, or a
+little endian uint32 with --uint32-lengths) followed by the packet: a
+varuint32 header holding the [cereal:packet] id in its low 10 bits and the
+sender and target sub-client ids in the next two pairs of bits, then the
+packet body.
+
+The capture is memory-mapped and every body is decoded from a memoryview
+slice of the mapping, so payloads are never copied. Bodies are decoded by the
+compiled codecs of packet_codec.py, which follow the field order and wire
+types of the JSON schemas; a packet's codec is compiled the first time its id
+is seen. Schemas come from the protocol snapshot (see protocol_snapshot.py),
+so startup does not parse the JSON sources.
+
+Filtered out frames are skipped after reading their header, without decoding
+the body. With --jobs N the frame boundaries are found in one pass and ranges
+of frames are decoded in N worker processes; records are written in capture
+order. The ranges are sized from the capture length so that each worker gets
+a few of them, but are never shorter than MIN_CHUNK_SIZE. An empty capture
+decodes to no records.
+
+Each output line is one frame:
+    {"offset": 0, "id": 1, "packet": "LoginPacket", "data": {...}}
+with "sender" and "target" added for non-zero sub-client ids, and "error"
+instead of "data" when the body cannot be decoded. oneOf values and map
+entries are written as [control_value, value] and [key, value] pairs.
+
+Usage:
+    python capture_decoder.py capture_file [output_file] [--input-path DIR] [--id ID ...]
+                              [--exclude-id ID ...] [--uint32-lengths] [--jobs N]
+
+    capture_file: Capture file to decode
+    output_file: Optional JSONL output file (default: print to stdout)
+    --input-path DIR: Directory containing the JSON files (default: script directory)
+    --id ID: Only decode packets with this id (repeatable)
+    --exclude-id ID: Skip packets with this id (repeatable)
+    --uint32-lengths: Frames are prefixed with a little endian uint32 instead of a varuint32
+    --jobs N: Decode in N worker processes (default: 1, serial)
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from packet_codec import CodecError, PacketCodec, compile_schema
+from protocol_snapshot import ProtocolSnapshot, load_snapshot
+
+
+# Packet header: id in bits 0-9, sender sub-client in bits 10-11, target in bits 12-13
+PACKET_ID_MASK = 0x3ff
+SUBCLIENT_MASK = 0x3
+SENDER_SHIFT = 10
+TARGET_SHIFT = 12
+
+UINT32_LENGTH = struct.Struct('<I')
+
+# Ranges of frames per worker process, so that uneven ranges even out (--jobs mode)
+RANGES_PER_JOB = 4
+# Smallest range handed to a worker process, below which the overhead dominates
+MIN_CHUNK_SIZE = 256 * 1024
+
+
+class CaptureError(ValueError):
+    """Raised when a capture file is not a sequence of complete frames."""
+
+
+def read_varuint(buf: memoryview, pos: int) -> Tuple[int, int]:
+    """Read a varuint at pos; returns (value, new_pos)."""
+    value = buf[pos]
+    pos += 1
+    if value > 0x7f:
+        value &= 0x7f
+        shift = 7
+        while True:
+            byte = buf[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+    return value, pos
+
+
+def iter_frames(buf: memoryview, start: int = 0, end: Optional[int] = None,
+                uint32_lengths: bool = False) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield the frames of a capture between start and end.
+
+    Yields:
+        Tuples of (frame offset, packet start, packet end)
+
+    Raises:
+        CaptureError: If a frame runs past end
+    """
+    end = len(buf) if end is None else end
+    pos = start
+    while pos < end:
+        offset = pos
+        try:
+            if uint32_lengths:
+                length, = UINT32_LENGTH.unpack_from(buf, pos)
+                pos += 4
+            else:
+                length, pos = read_varuint(buf, pos)
+        except (IndexError, struct.error):
+            raise CaptureError(f"Truncated length prefix at offset {offset}")
+        if pos + length > end:
+            raise CaptureError(f"Frame at offset {offset} runs past the end of the capture "
+                               f"({length} bytes, {end - pos} left)")
+        yield offset, pos, pos + length
+        pos += length
+
+
+def split_ranges(buf: memoryview, chunk_size: int, uint32_lengths: bool = False) -> List[Tuple[int, int]]:
+    """Return (start, end) byte ranges of whole frames, each about chunk_size long."""
+    ranges = []
+    start = 0
+    for offset, _, end in iter_frames(buf, uint32_lengths=uint32_lengths):
+        if end - start >= chunk_size:
+            ranges.append((start, end))
+            start = end
+    if start < len(buf):
+        ranges.append((start, len(buf)))
+    return ranges
+
+
+def chunk_size_for(length: int, jobs: int) -> int:
+    """Return the range size that gives each of jobs workers RANGES_PER_JOB ranges of a capture."""
+    return max(MIN_CHUNK_SIZE, -(-length // (jobs * RANGES_PER_JOB)))
+
+
+class CaptureDecoder:
+    """Decodes capture frames with the packet codecs of a protocol snapshot."""
+
+    def __init__(self, snapshot: ProtocolSnapshot,
+                 packet_ids: Optional[Set[int]] = None,
+                 exclude_ids: Optional[Set[int]] = None,
+                 uint32_lengths: bool = False):
+        """
+        Args:
+            snapshot: Protocol snapshot the packet schemas are read from
+            packet_ids: Only decode these packet ids (default: all)
+            exclude_ids: Skip these packet ids
+            uint32_lengths: Frames have uint32 instead of varuint32 length prefixes
+        """
+        self.snapshot = snapshot
+        self.packet_ids = packet_ids
+        self.exclude_ids = exclude_ids or set()
+        self.uint32_lengths = uint32_lengths
+        self.codecs: Dict[int, Optional[PacketCodec]] = {}
+        self.encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def codec(self, packet_id: int) -> Optional[PacketCodec]:
+        """Return the codec of a packet id, compiling it on first use; None for unknown ids."""
+        if packet_id not in self.codecs:
+            name = self.snapshot.packet_by_id(packet_id)
+            codec = None
+            if name is not None:
+                try:
+                    codec = compile_schema(self.snapshot.packet(name), name)
+                except CodecError as e:
+                    print(f"Warning: Could not compile {name}: {e}", file=sys.stderr)
+            self.codecs[packet_id] = codec
+        return self.codecs[packet_id]
+
+    def wanted(self, packet_id: int) -> bool:
+        """Whether frames with a packet id pass the filters."""
+        if packet_id in self.exclude_ids:
+            return False
+        return self.packet_ids is None or packet_id in self.packet_ids
+
+    def decode_frame(self, buf: memoryview, offset: int, start: int, end: int) -> Optional[Dict[str, Any]]:
+        """
+        Decode the packet of one frame.
+
+        Returns:
+            The record of the frame, or None if its packet id is filtered out
+        """
+        try:
+            header, body_start = read_varuint(buf, start)
+        except IndexError:
+            return {'offset': offset, 'error': "Truncated packet header"}
+        if body_start > end:
+            return {'offset': offset, 'error': "Truncated packet header"}
+
+        packet_id = header & PACKET_ID_MASK
+        if not self.wanted(packet_id):
+            return None
+
+        record: Dict[str, Any] = {'offset': offset, 'id': packet_id}
+        sender = (header >> SENDER_SHIFT) & SUBCLIENT_MASK
+        target = (header >> TARGET_SHIFT) & SUBCLIENT_MASK
+        if sender:
+            record['sender'] = sender
+        if target:
+            record['target'] = target
+
+        codec = self.codec(packet_id)
+        if codec is None:
+            record['error'] = f"Unknown packet id {packet_id}"
+            return record
+        record['packet'] = codec.name
+        try:
+            record['data'] = codec.decode(buf[body_start:end])
+        except CodecError as e:
+            record['error'] = str(e)
+        return record
+
+    def iter_records(self, buf: memoryview, start: int = 0,
+                     end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the records of the frames between start and end that pass the filters."""
+        for offset, packet_start, packet_end in iter_frames(buf, start, end, self.uint32_lengths):
+            record = self.decode_frame(buf, offset, packet_start, packet_end)
+            if record is not None:
+                yield record
+
+    def iter_lines(self, buf: memoryview, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """Yield the JSONL lines of the frames between start and end."""
+        encode = self.encoder.encode
+        for record in self.iter_records(buf, start, end):
+            yield encode(record) + '\n'
+
+
+def open_capture(capture_path: Path) -> Tuple[Optional[mmap.mmap], memoryview]:
+    """
+    Memory-map a capture file; returns (mapping, memoryview of it).
+
+    An empty capture cannot be mapped; it gives no mapping and an empty view.
+
+    Raises:
+        CaptureError: If the file cannot be opened or mapped
+    """
+    try:
+        with open(capture_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None, memoryview(b'')
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise CaptureError(f"Could not map {capture_path}: {e}")
+    return mapping, memoryview(mapping)
+
+
+# Decoder and capture mapping owned by each worker process in --jobs mode
+_worker_decoder = None
+_worker_buffer = None
+
+
+def _init_worker(capture_path: Path, snapshot_path: Path, options: Dict[str, Any]):
+    """Open the snapshot and the capture used by _decode_range_worker."""
+    global _worker_decoder, _worker_buffer
+    _worker_decoder = CaptureDecoder(ProtocolSnapshot(snapshot_path), **options)
+    _, _worker_buffer = open_capture(capture_path)
+
+
+def _decode_range_worker(byte_range: Tuple[int, int]) -> str:
+    """Decode one range of frames in a worker process; returns its JSONL text."""
+    return ''.join(_worker_decoder.iter_lines(_worker_buffer, *byte_range))
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Decode a capture of game packets into JSONL.")
+    parser.add_argument('capture_file', type=Path,
+                        help="Capture file to decode")
+    parser.add_argument('output_file', nargs='?', type=Path,
+                        help="JSONL output file (default: print to stdout)")
+    parser.add_argument('--input-path', type=Path,
+                        help="Directory containing JSON files (default: script directory)")
+    parser.add_argument('--id', type=int, action='append', dest='ids', metavar='ID',
+                        help="Only decode packets with this id (repeatable)")
+    parser.add_argument('--exclude-id', type=int, action='append', dest='exclude_ids', metavar='ID',
+                        help="Skip packets with this id (repeatable)")
+    parser.add_argument('--uint32-lengths', action='store_true',
+                        help="Frames are prefixed with a little endian uint32 instead of a varuint32")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="Decode in N worker processes (default: 1, serial)")
+    args = parser.parse_args()
+
+    input_path = args.input_path or Path(__file__).parent
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory", file=sys.stderr)
+        sys.exit(1)
+    if not args.capture_file.is_file():
+        print(f"Error: Capture file '{args.capture_file}' does not exist", file=sys.stderr)
+        sys.exit(1)
+
+    snapshot = load_snapshot(input_path)
+    options = {
+        'packet_ids': set(args.ids) if args.ids else None,
+        'exclude_ids': set(args.exclude_ids or ()),
+        'uint32_lengths': args.uint32_lengths
+    }
+    decoder = CaptureDecoder(snapshot, **options)
+    try:
+        _, buf = open_capture(args.capture_file)
+    except CaptureError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    out = open(args.output_file, 'w', encoding='utf-8') if args.output_file else sys.stdout
+    try:
+        if args.jobs > 1:
+            chunk_size = chunk_size_for(len(buf), args.jobs)
+            ranges = split_ranges(buf, chunk_size, args.uint32_lengths)
+            with ProcessPoolExecutor(
+                max_workers=args.jobs,
+                initializer=_init_worker,
+                initargs=(args.capture_file, snapshot.path, options)
+            ) as executor:
+                for text in executor.map(_decode_range_worker, ranges):
+                    out.write(text)
+        else:
+            out.writelines(decoder.iter_lines(buf))
+    except CaptureError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.output_file:
+            out.close()
+
+    if args.output_file:
+        print(f"✓ Output file: {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
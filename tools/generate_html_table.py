@@ -11,34 +11,663 @@ Features:
 - Sorts fields by ordinal index
 - Creates nested tables for complex types
 - Generates separate HTML files per packet
+- Re-renders only packets whose schema changed since the last run
+- Caches rendered definition tables shared across packets
+- Renders named enum references from the enums in __protocoldoc.json
+- Optional compact mode: one shared stylesheet, no inline styles, and each
+  definition rendered once on its own page and linked from every use
+- Links back to recursive definitions instead of re-expanding them, and caps
+  the number of rows expanded per page
+- Optional estimated wire size column (see wire_size.py)
+- Optional per-packet profiling of render time, table sizes and definition
+  expansions
+- Optional search over packet titles, field names, types, definitions and
+  enum values from the index page
+- Watch mode that polls the input directory and re-renders changed packets,
+  keeping schemas and rendered fragments in memory between rebuilds
+- Optional lazy mode: collapsed oneOf variants, array item tables and map
+  entries are written to fragment files loaded when they are expanded
 
 Usage:
-    python generate_html_table.py [input_path] [output_path]
+    python generate_html_table.py [input_path] [output_path] [--jobs N]
     
     input_path: Optional path to directory containing JSON files (default: script directory)
     output_path: Optional path to output directory (default: ./docs in script directory)
+    --jobs N: Render packet pages in N worker processes (default: 1, serial)
+    --force: Ignore the build manifest and regenerate every page
+    --fragment-cache-size N: Maximum number of cached definition tables (default: 2048, 0 disables)
+    --node-budget N: Maximum number of table rows expanded per page (default: 10000)
+    --compact: Link definitions from their own pages instead of inlining them,
+               and share one stylesheet file
+    --wire-sizes: Add a column with the estimated encoded size of each field
+    --profile: Write per-packet render statistics to profile.jsonl in the output
+               directory and print the most expensive packets and definitions
+    --search-index: Write an inverted search index and add a search box to the
+                    index page
+    --lazy: Load oneOf variants, array items and map entries on expand
+    --watch: Keep running and rebuild whenever the input files change
+    --poll-interval SECONDS: How often --watch checks the input files (default: 0.5)
 """
 
+import argparse
+import hashlib
 import json
+import os
+import re
 import sys
+import textwrap
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
-from html import escape
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from html import escape, unescape
+
+from packet_codec import CodecError
+from schema_ir import (
+    PROTOCOL_DOC_FILENAME, SchemaIR, get_ordinal_index, get_underlying_type, has_nested_table
+)
+from wire_size import WireSizeEstimator
+
+
+# Bump when a change to the generator alters its output
+GENERATOR_VERSION = 1
+
+MANIFEST_FILENAME = '.build_manifest.json'
+
+DEFAULT_FRAGMENT_CACHE_SIZE = 2048
+
+DEFAULT_NODE_BUDGET = 10000
+
+ENUM_INDEX_FILENAME = '.enum_index.json'
+
+PAGE_WRITE_BUFFER_SIZE = 1 << 16
+
+STYLESHEET_FILENAME = 'style.css'
+
+PROFILE_FILENAME = 'profile.jsonl'
+
+DEFAULT_POLL_INTERVAL = 0.5
+
+# Lazy mode: per-page fragment directories and the script loading them
+FRAGMENTS_DIRNAME = 'fragments'
+
+LAZY_SCRIPT_FILENAME = 'lazy.js'
+
+# Fragments are scripts (rather than HTML fetched at runtime) so they also load
+# for pages opened from disk
+LAZY_SCRIPT = """(function () {
+    window.loadFragment = function (id, html) {
+        var target = document.getElementById(id);
+        if (target) {
+            target.outerHTML = html;
+        }
+    };
+
+    // toggle does not bubble, so listen in the capture phase
+    document.addEventListener('toggle', function (event) {
+        var details = event.target;
+        if (!details.open) {
+            return;
+        }
+        var placeholder = details.querySelector(':scope > .lazy-fragment[data-src]');
+        if (!placeholder) {
+            return;
+        }
+        var script = document.createElement('script');
+        script.src = placeholder.getAttribute('data-src');
+        placeholder.removeAttribute('data-src');
+        document.head.appendChild(script);
+    }, true);
+})();
+"""
+
+SEARCH_INDEX_FILENAME = 'search_index.js'
+
+SEARCH_SCRIPT_FILENAME = 'search.js'
+
+# Maximum number of matching terms listed by the search box
+SEARCH_MAX_RESULTS = 50
+
+# Client-side search; loads search_index.js on first use. A script (rather than
+# JSON fetched at runtime) so the search also works for pages opened from disk.
+SEARCH_SCRIPT = """(function () {
+    var input = document.getElementById('search');
+    var results = document.getElementById('search-results');
+    var entries = null;
+
+    function load(callback) {
+        if (entries) {
+            callback();
+            return;
+        }
+        var script = document.createElement('script');
+        script.src = '%(index)s';
+        script.onload = function () {
+            var terms = window.SEARCH_INDEX.terms;
+            entries = [];
+            Object.keys(terms).forEach(function (kind) {
+                Object.keys(terms[kind]).forEach(function (term) {
+                    entries.push({term: term, lower: term.toLowerCase(), kind: kind, docs: terms[kind][term]});
+                });
+            });
+            callback();
+        };
+        document.head.appendChild(script);
+    }
+
+    function render() {
+        var query = input.value.trim().toLowerCase();
+        var docs = window.SEARCH_INDEX.docs;
+        results.textContent = '';
+        if (!query) {
+            return;
+        }
+        var matches = entries.filter(function (entry) {
+            return entry.lower.indexOf(query) !== -1;
+        });
+        matches.sort(function (a, b) {
+            return (a.lower.indexOf(query) - b.lower.indexOf(query)) || (a.term.length - b.term.length);
+        });
+        matches.slice(0, %(max_results)d).forEach(function (match) {
+            var item = document.createElement('li');
+            item.appendChild(document.createTextNode(match.term + ' (' + match.kind + '): '));
+            match.docs.forEach(function (doc, i) {
+                if (i) {
+                    item.appendChild(document.createTextNode(', '));
+                }
+                var link = document.createElement('a');
+                link.href = docs[doc][1];
+                link.textContent = docs[doc][0];
+                item.appendChild(link);
+            });
+            results.appendChild(item);
+        });
+    }
+
+    input.addEventListener('input', function () {
+        load(render);
+    });
+})();
+""" % {'index': SEARCH_INDEX_FILENAME, 'max_results': SEARCH_MAX_RESULTS}
+
+# Number of packets and definitions listed in the --profile summary
+PROFILE_SUMMARY_SIZE = 5
+
+# Stylesheet inlined into every page (or written once to style.css in compact mode)
+PAGE_STYLESHEET = """        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            margin: 0;
+            padding: 20px;
+            background-color: #f5f5f5;
+            line-height: 1.6;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background-color: white;
+            padding: 30px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }
+        h1 {
+            color: #2c3e50;
+            border-bottom: 3px solid #3498db;
+            padding-bottom: 10px;
+            margin-top: 0;
+        }
+        h2 {
+            color: #34495e;
+            border-bottom: 2px solid #3498db;
+            padding-bottom: 5px;
+            margin-top: 30px;
+        }
+        h3 {
+            color: #555;
+            margin-top: 20px;
+            margin-bottom: 10px;
+        }
+        h4 {
+            color: #666;
+            margin-top: 15px;
+            margin-bottom: 8px;
+        }
+        table {
+            background-color: white;
+            font-size: 14px;
+            margin-bottom: 10px;
+        }
+        th {
+            font-weight: bold;
+            text-align: left;
+            padding: 8px !important;
+        }
+        td {
+            padding: 8px !important;
+        }
+        tr:nth-child(even) {
+            background-color: #f9f9f9;
+        }
+        tr:hover {
+            background-color: #e8f4f8;
+        }
+        .description {
+            color: #555;
+            font-style: italic;
+            margin: 10px 0 20px 0;
+            padding: 10px;
+            background-color: #f8f9fa;
+            border-left: 4px solid #3498db;
+        }
+        a {
+            color: #3498db;
+            text-decoration: none;
+        }
+        a:hover {
+            text-decoration: underline;
+        }
+        .packet-list {
+            columns: 3;
+            column-gap: 20px;
+        }
+        .packet-list li {
+            margin-bottom: 8px;
+            break-inside: avoid;
+        }
+        details {
+            margin: 10px 0;
+        }
+        summary {
+            cursor: pointer;
+            font-weight: bold;
+            padding: 8px;
+            background-color: #f0f0f0;
+            border: 1px solid #ddd;
+            border-radius: 4px;
+            user-select: none;
+        }
+        summary:hover {
+            background-color: #e8e8e8;
+        }
+        details[open] summary {
+            background-color: #d4edff;
+            border-color: #3498db;
+            border-left: 4px solid #3498db;
+        }
+        @media (max-width: 900px) {
+            .packet-list {
+                columns: 2;
+            }
+        }
+        @media (max-width: 600px) {
+            .packet-list {
+                columns: 1;
+            }
+        }
+"""
+
+# Rules replacing the inline style attributes dropped in compact mode
+COMPACT_STYLESHEET = """        table {
+            border-collapse: collapse;
+            width: 100%;
+            max-width: 800px;
+        }
+        th, td {
+            border: 1px solid #999;
+        }
+        thead tr {
+            background-color: #f0f0f0;
+        }
+        .fields {
+            margin-top: 10px;
+        }
+        td .fields {
+            margin-left: 20px;
+        }
+        .enum {
+            margin: 5px 0 5px 20px;
+        }
+        .enum table {
+            max-width: 760px;
+            font-size: 12px;
+        }
+        .enum td:first-child {
+            width: 40px;
+            text-align: center;
+        }
+        .oneof {
+            margin-left: 20px;
+        }
+        .oneof table {
+            max-width: 760px;
+            margin-top: 5px;
+        }
+        .enum thead tr, .oneof thead tr {
+            background-color: #e8e8e8;
+        }
+        td.flush {
+            padding: 0 !important;
+        }
+        .summary {
+            color: #666;
+            font-size: 0.9em;
+        }
+        .lazy {
+            margin: 10px 0 0 20px;
+        }
+"""
+
+
+class FragmentCache:
+    """Bounded LRU cache of rendered HTML fragments with hit/miss counters."""
+    
+    def __init__(self, maxsize: int = DEFAULT_FRAGMENT_CACHE_SIZE):
+        """Initialize an empty cache holding at most maxsize fragments."""
+        self.maxsize = maxsize
+        self.fragments = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Tuple) -> Optional[str]:
+        """Return the cached fragment for key, or None on a miss."""
+        fragment = self.fragments.get(key)
+        if fragment is None:
+            self.misses += 1
+            return None
+        self.fragments.move_to_end(key)
+        self.hits += 1
+        return fragment
+    
+    def put(self, key: Tuple, fragment: str):
+        """Store a fragment, evicting the least recently used entries when full."""
+        if self.maxsize <= 0:
+            return
+        self.fragments[key] = fragment
+        self.fragments.move_to_end(key)
+        while len(self.fragments) > self.maxsize:
+            self.fragments.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, ref_ids: Iterable[str]):
+        """Drop the cached fragments of the given definition ids."""
+        ref_ids = set(ref_ids)
+        for key in [key for key in self.fragments if key[0] in ref_ids]:
+            del self.fragments[key]
+    
+    def stats(self) -> Dict[str, int]:
+        """Return the cache counters."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.fragments)
+        }
+
+
+class PageProfile:
+    """Counters of the tables rendered into one page (--profile mode)."""
+    
+    def __init__(self):
+        """Initialize empty counters."""
+        self.tables = 0
+        self.rows = 0
+        # Current and deepest generate_nested_table nesting
+        self.depth = 0
+        self.max_depth = 0
+        self.expansions = Counter()
+    
+    def enter_table(self):
+        """Record the start of a nested field table."""
+        self.tables += 1
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+    
+    def exit_table(self):
+        """Record the end of a nested field table."""
+        self.depth -= 1
+    
+    def begin_fragment(self) -> Tuple[int, int, Counter, int]:
+        """Start measuring a cacheable fragment; pass the result to end_fragment."""
+        state = (self.tables, self.rows, self.expansions.copy(), self.max_depth)
+        self.max_depth = self.depth
+        return state
+    
+    def end_fragment(self, state: Tuple[int, int, Counter, int]) -> Tuple[int, int, int, Counter]:
+        """
+        Finish measuring a fragment.
+        
+        Returns:
+            Tuple of (tables, rows, nesting depth below the fragment's start,
+            definition expansions) rendered inside the fragment
+        """
+        tables, rows, expansions, max_depth = state
+        stats = (self.tables - tables, self.rows - rows,
+                 self.max_depth - self.depth, self.expansions - expansions)
+        self.max_depth = max(self.max_depth, max_depth)
+        return stats
+    
+    def add_fragment(self, stats: Tuple[int, int, int, Counter]):
+        """Account for a fragment served from the fragment cache."""
+        tables, rows, depth, expansions = stats
+        self.tables += tables
+        self.rows += rows
+        self.max_depth = max(self.max_depth, self.depth + depth)
+        self.expansions.update(expansions)
+
+
+class EnumIndex:
+    """
+    Enum definitions indexed by name and by id.
+    
+    Enums come from the enum_values entries of __protocoldoc.json (plus any
+    legacy enum_*.json files). The protocol document is only parsed on first
+    lookup, and the extracted enums are cached on disk keyed by the document's
+    hash, so later runs skip parsing the whole file.
+    """
+    
+    def __init__(self, protocol_doc: Path, cache_path: Optional[Path] = None):
+        """Initialize an index over protocol_doc, cached at cache_path (None: not cached)."""
+        self.protocol_doc = protocol_doc
+        self.cache_path = cache_path
+        self.by_name = {}
+        self.by_id = {}
+        self.extra = {}
+        self.loaded = False
+        self._source_hash = None
+    
+    def add(self, name: str, values: List[Tuple[int, str]], enum_id: Optional[int] = None):
+        """Add an enum given as (value, name) pairs."""
+        entry = {'id': enum_id, 'name': name, 'values': values}
+        if self.loaded:
+            self.by_name[name] = entry
+            if enum_id is not None:
+                self.by_id[enum_id] = entry
+        else:
+            self.extra[name] = entry
+    
+    def source_hash(self) -> str:
+        """Return the sha256 of the protocol document ('' if it does not exist)."""
+        if self._source_hash is None:
+            try:
+                self._source_hash = hashlib.sha256(self.protocol_doc.read_bytes()).hexdigest()
+            except OSError:
+                self._source_hash = ''
+        return self._source_hash
+    
+    def load(self):
+        """Build the index from the disk cache, or from the protocol document on a cache miss."""
+        if self.loaded:
+            return
+        self.loaded = True
+        
+        source_hash = self.source_hash()
+        enums = None
+        if self.cache_path is not None:
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get('source_hash') == source_hash:
+                    enums = cached['enums']
+            except (OSError, ValueError, KeyError, AttributeError):
+                pass
+        
+        if enums is None:
+            enums = self._parse_protocol_doc() if source_hash else []
+            if self.cache_path is not None:
+                self._save_cache(source_hash, enums)
+        
+        for entry in enums:
+            entry['values'] = [tuple(value) for value in entry['values']]
+            self.by_name[entry['name']] = entry
+            self.by_id[entry['id']] = entry
+        for entry in self.extra.values():
+            self.by_name[entry['name']] = entry
+            if entry['id'] is not None:
+                self.by_id[entry['id']] = entry
+    
+    def _parse_protocol_doc(self) -> List[Dict[str, Any]]:
+        """Extract all enums from the protocol document."""
+        try:
+            with open(self.protocol_doc, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load enums from {self.protocol_doc}: {e}")
+            return []
+        
+        return [
+            {
+                'id': item['id'],
+                'name': item['name'],
+                'values': [(value['value'], value['name']) for value in item['enum_values']]
+            }
+            for item in data if 'enum_values' in item
+        ]
+    
+    def _save_cache(self, source_hash: str, enums: List[Dict[str, Any]]):
+        """Write the extracted enums to the disk cache."""
+        temp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'source_hash': source_hash, 'enums': enums}, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write enum index cache {self.cache_path}: {e}")
+    
+    def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the enum entry with the given name, or None."""
+        self.load()
+        return self.by_name.get(name)
+    
+    def get_by_id(self, enum_id: int) -> Optional[Dict[str, Any]]:
+        """Return the enum entry with the given id, or None."""
+        self.load()
+        return self.by_id.get(enum_id)
+    
+    def wire_values(self, name: str, value_names: List[str]) -> List[int]:
+        """
+        Return the wire value of each entry of an inline enum.
+        
+        Inline enums list value names only, and may skip values (ActorEvent
+        has no 9) or list a subset of the enum, so the wire values come from
+        the indexed enum of the same name. Entries it does not know, or all
+        entries if there is no such enum, get their position in the list.
+        """
+        entry = self.get_by_name(name)
+        if entry is None:
+            return list(range(len(value_names)))
+        by_value_name = {value_name: value for value, value_name in entry['values']}
+        return [by_value_name.get(value_name, idx) for idx, value_name in enumerate(value_names)]
+    
+    def __contains__(self, name: str) -> bool:
+        self.load()
+        return name in self.by_name
+    
+    def __getitem__(self, name: str) -> List[str]:
+        """Return the value names of an enum."""
+        self.load()
+        return [value_name for _, value_name in self.by_name[name]['values']]
+    
+    def __len__(self) -> int:
+        self.load()
+        return len(self.by_name)
 
 
 class PacketDocGenerator:
     """Generates HTML documentation for game protocol packets."""
     
-    def __init__(self, output_dir: Path, source_dir: Path):
+    def __init__(self, output_dir: Path, source_dir: Path,
+                 fragment_cache_size: int = DEFAULT_FRAGMENT_CACHE_SIZE,
+                 node_budget: int = DEFAULT_NODE_BUDGET,
+                 compact: bool = False,
+                 wire_sizes: bool = False,
+                 profile: bool = False,
+                 search_index: bool = False,
+                 lazy: bool = False):
         """Initialize the generator with an output directory."""
         self.output_dir = output_dir
         self.output_dir.mkdir(exist_ok=True)
         self.source_dir = source_dir
-        self.enum_cache = {}
+        self.enum_cache = EnumIndex(
+            source_dir / PROTOCOL_DOC_FILENAME,
+            output_dir / ENUM_INDEX_FILENAME
+        )
+        self.fragment_cache = FragmentCache(fragment_cache_size)
+        self.node_budget = node_budget
+        self.compact = compact
+        self.wire_sizes = wire_sizes
+        self.profile = profile
+        self.search_index = search_index
+        self.lazy = lazy
+        # Profile record of the last packet rendered (profile mode)
+        self.last_profile = None
+        # Error of the last packet rendered, or None if it succeeded or was skipped
+        self.last_error = None
+        # Files besides its page that the last packet rendered wrote: definition
+        # page ids (compact mode) and fragment paths (lazy mode)
+        self.last_outputs = {'definition_pages': [], 'fragments': []}
+        # Size estimator of the definitions being rendered (wire_sizes mode)
+        self._wire_size_estimator = None
+        # Normalized IR of the schema file being rendered
+        self._schema_ir = None
+        # Definition pages already written by this generator (compact mode)
+        self.rendered_definitions = set()
+        # Parsed schemas kept in memory between rebuilds (watch mode)
+        self.schema_cache: Dict[Path, Dict[str, Any]] = {}
         self._load_enums()
+        self._reset_page_state()
+    
+    def generator_options(self) -> Dict[str, Any]:
+        """Return the constructor options, for recreating this generator in worker processes."""
+        return {
+            'fragment_cache_size': self.fragment_cache.maxsize,
+            'node_budget': self.node_budget,
+            'compact': self.compact,
+            'wire_sizes': self.wire_sizes,
+            'profile': self.profile,
+            'search_index': self.search_index,
+            'lazy': self.lazy
+        }
+    
+    def _reset_page_state(self):
+        """Reset the per-page expansion state before rendering a new packet."""
+        # Definitions currently being expanded, and whether each can be cached
+        self._expansion_stack = []
+        self._expansion_cacheable = []
+        # Definitions expanded inside each open expansion (nested ones included)
+        self._expansion_refs = []
+        # Definitions that a back-reference on this page points at, and those
+        # whose expansion already carries the anchor the back-references link to
+        self._backref_targets = set()
+        self._anchored_refs = set()
+        self._page_nodes = 0
+        self._budget_exceeded = False
+        self._page_profile = PageProfile() if self.profile else None
+        # Name of the page being rendered, and its deferred (id, html) fragments (lazy mode)
+        self._page_name = ''
+        self._lazy_fragments = []
     
     def _load_enums(self):
-        """Load all enum definitions from enum_*.json files."""
+        """Load legacy enum definitions from enum_*.json files."""
         enum_files = self.source_dir.glob("enum_*.json")
         for enum_file in enum_files:
             try:
@@ -46,147 +675,89 @@ class PacketDocGenerator:
                     data = json.load(f)
                     title = data.get('title', '')
                     if title and 'enum' in data:
-                        self.enum_cache[title] = data['enum']
+                        self.enum_cache.add(title, list(enumerate(data['enum'])))
             except Exception as e:
                 print(f"Warning: Could not load enum from {enum_file}: {e}")
     
-    @staticmethod
-    def get_underlying_type(field_data: Dict[str, Any], definitions: Dict[str, Any]) -> str:
+    # Shared schema rules (schema_ir), kept as static methods for existing callers
+    get_underlying_type = staticmethod(get_underlying_type)
+    get_ordinal_index = staticmethod(get_ordinal_index)
+    has_nested_table = staticmethod(has_nested_table)
+    
+    def generate_enum_table(self, enum_values: List[str], indent_level: int,
+                            enum_indices: Optional[List[int]] = None) -> str:
         """
-        Extract the underlying type from field data.
+        Generate a table displaying enum values.
         
-        Prioritizes x-underlying-type over standard type field.
-        Handles arrays, references, enums, and oneOf unions.
-        For enums: uses x-underlying-type only if "Enum-as-Value" is in serialization options,
-        otherwise falls back to the regular type.
+        enum_indices gives the wire value of each entry; defaults to its position.
         """
-
-        serialization_options = None
-        if 'x-serialization-options' in field_data:
-            serialization_options = field_data['x-serialization-options']
-
-        # Check for x-underlying-type first (preferred)
-        if 'x-underlying-type' in field_data:
-            # For enums, only use x-underlying-type if "Enum-as-Value" is present
-            if 'enum' in field_data:
-                if serialization_options and 'Enum-as-Value' in serialization_options:
-                    if 'Compression' in serialization_options:
-                        return 'var'+ field_data['x-underlying-type']
-                    
-                    return field_data['x-underlying-type']
-                # Fall back to regular type for enums without Enum-as-Value
-                return field_data.get('type', 'unknown')
-            
-            # For non-enums, handle compression
-            if serialization_options:
-                if 'Compression' in serialization_options:
-                    return 'var'+ field_data['x-underlying-type']
-
-            return field_data['x-underlying-type']
-        
-        # Check if it's an array
-        if field_data.get('type') == 'array':
-            items = field_data.get('items', {})
-            if '$ref' in items:
-                ref_id = items['$ref'].split('/')[-1]
-                if (definitions and ref_id in definitions):
-                    ref_schema = definitions[ref_id]
-                    ref_title = ref_schema.get('title', ref_id)
-                    return  f"array&lt;{ref_title}&gt;"
-
-                return f"array&lt;{ref_id}&gt;"
-            elif 'x-underlying-type' in items:
-                return f"array&lt;{items['x-underlying-type']}&gt;"
-            else:
-                item_type = items.get('type', 'unknown')
-                return f"array&lt;{item_type}&gt;"
-        
-        # Check for oneOf (union types)
-        if 'oneOf' in field_data:
-            return 'oneOf'
-        
-        # Check for $ref
-        if '$ref' in field_data:
-            ref_id = field_data['$ref'].split('/')[-1]
-            # Try to resolve the ref to get the title
-            if definitions and ref_id in definitions:
-                ref_schema = definitions[ref_id]
-                return ref_schema.get('title', ref_id)
-            return ref_id
-        
-        # Check for enum
-        if 'enum' in field_data:
-            return field_data.get('title', 'enum')
-        
-        # Check for additionalProperties
-        if field_data.get('type') == 'object' and 'additionalProperties' in field_data:
-            additional_props = field_data['additionalProperties']
-            if additional_props.get('type') == 'object' and 'properties' in additional_props:
-                props = additional_props['properties']
-                key_type = 'string'
-                value_type = 'object'
-                if 'key' in props:
-                    key_type = PacketDocGenerator.get_underlying_type(props['key'], definitions)
-                if 'value' in props:
-                    value_type = PacketDocGenerator.get_underlying_type(props['value'], definitions)
-                return f"object&lt;{key_type}, {value_type}&gt;"
-            else:
-                value_type = PacketDocGenerator.get_underlying_type(additional_props, definitions)
-                return f"object&lt;string, {value_type}&gt;"
-        
-        # Fallback to basic type
-        return field_data.get('type', 'unknown')
+        return ''.join(self.iter_enum_table(enum_values, indent_level, enum_indices))
     
-    @staticmethod
-    def get_ordinal_index(field_data: Dict[str, Any]) -> int:
-        """Get the ordinal index, defaulting to high value if not present."""
-        return field_data.get('x-ordinal-index', 9999)
-    
-    def generate_enum_table(self, enum_values: List[str], indent_level: int) -> str:
-        """Generate a table displaying enum values."""
+    def iter_enum_table(self, enum_values: List[str], indent_level: int,
+                        enum_indices: Optional[List[int]] = None) -> Iterator[str]:
+        """Yield the HTML of an enum values table in chunks."""
         if not enum_values:
-            return ""
+            return
         
         margin_left = (indent_level + 1) * 20
-        html = []
-        
-        html.append(f'<div style="margin-left: {margin_left}px; margin-top: 5px; margin-bottom: 5px;">')
-        html.append('<strong>Enum Values:</strong>')
-        html.append('<table border="1" cellpadding="3" cellspacing="0" style="border-collapse: collapse; width: 100%; max-width: 760px; font-size: 12px;">')
-        html.append('<thead>')
-        html.append('<tr style="background-color: #e8e8e8;">')
-        html.append('<th style="width: 40px;">Index</th>')
-        html.append('<th>Value</th>')
-        html.append('</tr>')
-        html.append('</thead>')
-        html.append('<tbody>')
-        
-        for idx, value in enumerate(enum_values):
-            html.append('<tr>')
-            html.append(f'<td style="text-align: center;">{idx}</td>')
-            html.append(f'<td><code>{escape(value)}</code></td>')
-            html.append('</tr>')
-        
-        html.append('</tbody>')
-        html.append('</table>')
-        html.append('</div>')
-        
-        return '\n'.join(html)
+        
+        if self.compact:
+            yield ('<div class="enum">\n'
+                   '<strong>Enum Values:</strong>\n'
+                   '<table>\n'
+                   '<thead>\n'
+                   '<tr>\n'
+                   '<th>Index</th>\n')
+        else:
+            yield (f'<div style="margin-left: {margin_left}px; margin-top: 5px; margin-bottom: 5px;">\n'
+                   '<strong>Enum Values:</strong>\n'
+                   '<table border="1" cellpadding="3" cellspacing="0" style="border-collapse: collapse; width: 100%; max-width: 760px; font-size: 12px;">\n'
+                   '<thead>\n'
+                   '<tr style="background-color: #e8e8e8;">\n'
+                   '<th style="width: 40px;">Index</th>\n')
+        yield ('<th>Value</th>\n'
+               '</tr>\n'
+               '</thead>\n'
+               '<tbody>')
+        
+        if enum_indices is None:
+            enum_indices = range(len(enum_values))
+        
+        if self._page_profile is not None:
+            self._page_profile.tables += 1
+            self._page_profile.rows += len(enum_values)
+        
+        index_cell = '<td>' if self.compact else '<td style="text-align: center;">'
+        for idx, value in zip(enum_indices, enum_values):
+            yield (f'\n<tr>'
+                   f'\n{index_cell}{idx}</td>'
+                   f'\n<td><code>{escape(value)}</code></td>'
+                   f'\n</tr>')
+        
+        yield '\n</tbody>\n</table>\n</div>'
     
     def generate_oneof_table(self, field_data: Dict[str, Any], indent_level: int, definitions: Dict[str, Any]) -> str:
         """Generate a table displaying oneOf union types with expanded definitions."""
-        if 'oneOf' not in field_data:
-            return ""
+        return ''.join(self.iter_oneof_table(field_data, indent_level, definitions))
+    
+    def iter_oneof_table(self, field_data: Dict[str, Any], indent_level: int,
+                         definitions: Dict[str, Any]) -> Iterator[str]:
+        """Yield the HTML of a oneOf union table in chunks."""
+        oneof = self.schema_ir(definitions).node(field_data)
+        if oneof.variants is None:
+            return
         
-        # Get control value type from field data, default to varuint32
-        control_value_type = field_data.get('x-control-value-type', 'varuint32')
+        # Control value type of the union, default varuint32
+        control_value_type = oneof.control_value_type
         
         oneof_type = 'oneOf<'
         one_of_members_html = []
-        expanded_definitions_html = []
+        # (title, variant index, rendered definition) of each expanded variant
+        expanded_definitions = []
         
-        for idx, one_of_item in enumerate(field_data['oneOf'], 0):
-            underlying_type = self.get_underlying_type(one_of_item, definitions)
+        for idx, variant in enumerate(oneof.variants, 0):
+            one_of_item = variant.schema
+            underlying_type = variant.type_name
             oneof_type += underlying_type + ', '
             
             # Get any additional details
@@ -200,63 +771,180 @@ class PacketDocGenerator:
             
             details_str = ', '.join(details) if details else '-'
             
-            one_of_members_html.append('<tr>')
-            one_of_members_html.append(f'<td>{idx}</td>')
-            one_of_members_html.append(f'<td><strong>{underlying_type}</strong></td>')
-            one_of_members_html.append(f'<td>{details_str}</td>')
-            one_of_members_html.append('</tr>')
+            if self.compact and variant.ref is not None:
+                underlying_type = self.definition_link(variant.ref.ref_id, definitions)
+            
+            self._page_nodes += 1
+            if self._page_profile is not None:
+                self._page_profile.rows += 1
+            one_of_members_html.append(f'\n<tr>'
+                                       f'\n<td>{idx}</td>'
+                                       f'\n<td><strong>{underlying_type}</strong></td>'
+                                       f'\n<td>{details_str}</td>'
+                                       f'\n</tr>')
             
             # Try to expand the definition if it's a $ref
-            if '$ref' in one_of_item:
-                ref_id = one_of_item['$ref'].split('/')[-1]
-                if ref_id in definitions:
-                    ref_schema = definitions[ref_id]
-                    ref_title = ref_schema.get('title', ref_id)
+            if variant.ref is not None and not self.compact:
+                ref_id = variant.ref.ref_id
+                if variant.ref.resolved:
+                    ref_title = variant.ref.title
                     
                     # Skip if title ends with "Payload"
                     if not ref_title.endswith('Payload'):
-                        nested_html = self.generate_nested_table(
-                            ref_schema, 
+                        nested_html = self.generate_definition_table(
+                            ref_id, 
                             definitions, 
                             "", 
                             indent_level + 2  # Extra indent for oneOf variants
                         )
                         if nested_html:
-                            # Wrap in details element for collapsible display
-                            detail_html = []
-                            detail_html.append(f'<details style="margin-left: {(indent_level + 1) * 20}px; margin-top: 10px;">')
-                            detail_html.append(f'<summary style="cursor: pointer; font-weight: bold; padding: 5px; background-color: #f0f0f0; border: 1px solid #ddd;"><strong>{ref_title} (Variant {idx})</strong></summary>')
-                            detail_html.append(nested_html)
-                            detail_html.append('</details>')
-                            expanded_definitions_html.append('\n'.join(detail_html))
+                            expanded_definitions.append((ref_title, idx, nested_html))
         
+        if self._page_profile is not None:
+            self._page_profile.tables += 1
         oneof_type = oneof_type.rstrip(', ') + '>'
         oneof_type = escape(oneof_type)
         margin_left = (indent_level + 1) * 20
-        html = []
-        
-        html.append(f'<div style="margin-left: {margin_left}px; margin-top: 0px; margin-bottom: 0px;">')
-        html.append(f'<strong>{oneof_type}:</strong>')
-        html.append('<table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse; width: 100%; max-width: 760px; margin-top: 5px;">')
-        html.append('<thead>')
-        html.append('<tr style="background-color: #e8e8e8;">')
-        html.append(f'<th>Control Value [{control_value_type}]</th>')
-        html.append('<th>Type</th>')
-        html.append('<th>Details</th>')
-        html.append('</tr>')
-        html.append('</thead>')
-        html.append('<tbody>')
-        html.extend(one_of_members_html)
-        html.append('</tbody>')
-        html.append('</table>')
-        
-        # Add expanded definitions after the summary table
-        if expanded_definitions_html:
-            html.extend(expanded_definitions_html)
-        
-        html.append('</div>')
-        
-        return '\n'.join(html)
+        
+        if self.compact:
+            yield (f'<div class="oneof">\n'
+                   f'<strong>{oneof_type}:</strong>\n'
+                   '<table>\n'
+                   '<thead>\n'
+                   '<tr>\n')
+        else:
+            yield (f'<div style="margin-left: {margin_left}px; margin-top: 0px; margin-bottom: 0px;">\n'
+                   f'<strong>{oneof_type}:</strong>\n'
+                   '<table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse; width: 100%; max-width: 760px; margin-top: 5px;">\n'
+                   '<thead>\n'
+                   '<tr style="background-color: #e8e8e8;">\n')
+        yield (f'<th>Control Value [{control_value_type}]</th>\n'
+               '<th>Type</th>\n'
+               '<th>Details</th>\n'
+               '</tr>\n'
+               '</thead>\n'
+               '<tbody>')
+        yield from one_of_members_html
+        yield '\n</tbody>\n</table>'
+        
+        # Add expanded definitions after the summary table, wrapped in details
+        # elements for collapsible display
+        lazy = self.is_lazy()
+        for ref_title, idx, nested_html in expanded_definitions:
+            yield (f'\n<details style="margin-left: {(indent_level + 1) * 20}px; margin-top: 10px;">'
+                   f'\n<summary style="cursor: pointer; font-weight: bold; padding: 5px; background-color: #f0f0f0; border: 1px solid #ddd;"><strong>{ref_title} (Variant {idx})</strong></summary>\n')
+            yield self.lazy_placeholder(nested_html) if lazy and self.is_deferrable(nested_html) else nested_html
+            yield '\n</details>'
+        
+        yield '\n</div>'
+    
+    def has_definition_page(self, ref_id: str, definitions: Dict[str, Any]) -> bool:
+        """Whether a definition gets its own page in compact mode."""
+        ref_schema = definitions[ref_id]
+        return (self.has_nested_table(ref_schema)
+                and not ref_schema.get('title', ref_id).endswith('Payload'))
+    
+    def definition_link(self, ref_id: str, definitions: Dict[str, Any]) -> str:
+        """Return the type cell HTML linking a $ref to its definition page (compact mode)."""
+        if ref_id not in definitions:
+            return ref_id
+        ref_title = definitions[ref_id].get('title', ref_id)
+        if not self.has_definition_page(ref_id, definitions):
+            return ref_title
+        return f'<a href="{self.definition_filename(ref_id)}">{escape(ref_title)}</a>'
+    
+    @staticmethod
+    def definition_filename(ref_id: str) -> str:
+        """Return the page filename of a definition in compact mode."""
+        return f"def-{ref_id}.html"
+    
+    def generate_definition_table(self, ref_id: str, definitions: Dict[str, Any],
+                                  title: str, indent_level: int) -> str:
+        """
+        Generate the nested table for a $ref definition, reusing cached renders.
+        
+        Definition ids are derived from the type, so the same id renders the same
+        table in every packet file and the cache is shared across the whole run.
+        
+        A definition that is already being expanded further up the page is not
+        inlined again; a link back to that expansion is emitted instead. Once the
+        page has used up its node budget, definitions are no longer expanded.
+        """
+        ref_title = definitions[ref_id].get('title', ref_id)
+        margin_left = indent_level * 20
+        
+        if ref_id in self._expansion_stack:
+            # Everything expanded inside the cycle depends on its ancestors
+            depth = self._expansion_stack.index(ref_id)
+            for i in range(depth + 1, len(self._expansion_cacheable)):
+                self._expansion_cacheable[i] = False
+            self._backref_targets.add(ref_id)
+            return (f'<div style="margin-left: {margin_left}px; margin-top: 10px;">'
+                    f'<em>Recursive reference to <a href="#def-{ref_id}">{escape(ref_title)}</a></em></div>')
+        
+        key = (ref_id, indent_level, title)
+        profile = self._page_profile
+        cached = self.fragment_cache.get(key)
+        if cached is not None and not cached[3].isdisjoint(self._expansion_stack):
+            # Rendered outside a definition now being expanded, which the
+            # fragment would inline inside itself
+            cached = None
+        if cached is not None:
+            nested_html, nodes, stats, expanded, self_linked = cached
+            if self._page_nodes + nodes <= self.node_budget:
+                self._page_nodes += nodes
+                if profile is not None:
+                    profile.expansions[ref_id] += 1
+                    profile.add_fragment(stats)
+                self._record_expansion(ref_id, expanded, self_linked)
+                return self._anchor_fragment(ref_id, nested_html, self_linked)
+        elif self._page_nodes < self.node_budget:
+            nodes_before = self._page_nodes
+            if profile is not None:
+                profile.expansions[ref_id] += 1
+                profile_state = profile.begin_fragment()
+            self._backref_targets.discard(ref_id)
+            self._expansion_stack.append(ref_id)
+            self._expansion_cacheable.append(True)
+            self._expansion_refs.append(set())
+            nested_html = self.generate_nested_table(definitions[ref_id], definitions, title, indent_level)
+            self._expansion_stack.pop()
+            cacheable = self._expansion_cacheable.pop()
+            expanded = frozenset(self._expansion_refs.pop())
+            stats = profile.end_fragment(profile_state) if profile is not None else None
+            
+            # Whether recursive references inside link back to this expansion
+            self_linked = ref_id in self._backref_targets
+            if cacheable:
+                # Cached without the anchor, which only the first expansion on a page gets
+                self.fragment_cache.put(key, (nested_html, self._page_nodes - nodes_before, stats,
+                                              expanded, self_linked))
+            self._record_expansion(ref_id, expanded, self_linked)
+            return self._anchor_fragment(ref_id, nested_html, self_linked)
+        
+        # Out of budget: the truncated page must not seed the cache
+        for i in range(len(self._expansion_cacheable)):
+            self._expansion_cacheable[i] = False
+        self._budget_exceeded = True
+        return (f'<div style="margin-left: {margin_left}px; margin-top: 10px;">'
+                f'<em>{escape(ref_title)} not expanded (page node budget of {self.node_budget} exceeded)</em></div>')
+    
+    def _record_expansion(self, ref_id: str, expanded: frozenset, self_linked: bool):
+        """Note an expanded definition in the expansions that enclose it."""
+        if self._expansion_refs:
+            self._expansion_refs[-1].update(expanded)
+            self._expansion_refs[-1].add(ref_id)
+        if self_linked:
+            # Its back-references resolve to an anchor of this page only
+            for i in range(len(self._expansion_cacheable)):
+                self._expansion_cacheable[i] = False
+    
+    def _anchor_fragment(self, ref_id: str, nested_html: str, self_linked: bool) -> str:
+        """Add the anchor of recursive references to the first expansion of a definition on the page."""
+        if self_linked and nested_html and ref_id not in self._anchored_refs:
+            self._anchored_refs.add(ref_id)
+            nested_html = nested_html.replace('<div ', f'<div id="def-{ref_id}" ', 1)
+        return nested_html
     
     def generate_nested_table(self, schema: Dict[str, Any], definitions: Dict[str, Any], 
                              title: str, indent_level: int = 0) -> str:
@@ -265,149 +953,294 @@ class PacketDocGenerator:
         
         Recursively handles nested objects and creates visual hierarchy.
         """
-        if schema.get('type') != 'object':
-            return ""
+        return ''.join(self.iter_nested_table(schema, definitions, title, indent_level))
+    
+    def is_lazy(self) -> bool:
+        """
+        Whether a collapsible table rendered now goes to a fragment file.
         
-        properties = schema.get('properties', {})
-        required = schema.get('required', [])
-        if not properties:
-            return ""
+        Only tables of the page itself are deferred; expansions of definitions
+        are shared through the fragment cache and stay whole.
+        """
+        return self.lazy and not self._expansion_stack
+    
+    @staticmethod
+    def is_deferrable(html: str) -> bool:
+        """
+        Whether a table can go to a fragment file.
         
-        # Sort properties by ordinal index
-        sorted_properties = sorted(
-            properties.items(),
-            key=lambda x: self.get_ordinal_index(x[1])
-        )
+        A table holding the anchor of a recursive definition stays on the page:
+        back-references elsewhere on the page link to that anchor, and a
+        fragment is only part of the document once it has been loaded.
+        """
+        return '<div id="def-' not in html
+    
+    def lazy_placeholder(self, html: str) -> str:
+        """Defer html to a fragment file and return the placeholder loading it."""
+        fragment_id = f'fragment-{len(self._lazy_fragments)}'
+        self._lazy_fragments.append((fragment_id, html))
+        src = f'{FRAGMENTS_DIRNAME}/{self._page_name}/{fragment_id}.js'
+        return f'<div class="lazy-fragment" id="{fragment_id}" data-src="{escape(src)}"><em>Loading...</em></div>'
+    
+    def lazy_section(self, summary: str, html: str, indent_level: int) -> str:
+        """
+        Wrap a deferred table in a collapsed details element.
+        
+        In compact mode the element gets the lazy class instead of inline
+        styles; its rule indents it one level, which is where sections are used.
+        """
+        if self.compact:
+            opening = '<details class="lazy">'
+        else:
+            opening = f'<details style="margin-left: {indent_level * 20}px; margin-top: 10px;">'
+        return (f'{opening}'
+                f'\n<summary><strong>{escape(summary)}</strong></summary>\n'
+                f'{self.lazy_placeholder(html)}\n</details>')
+    
+    def write_lazy_fragments(self) -> List[str]:
+        """
+        Write the fragment files of the page just rendered, replacing its old ones.
+        
+        Returns:
+            Paths of the fragment files, relative to the output directory
+        """
+        fragment_dir = self.output_dir / FRAGMENTS_DIRNAME / self._page_name
+        self.remove_lazy_fragments(self._page_name)
+        if not self._lazy_fragments:
+            return []
+        fragment_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for fragment_id, html in self._lazy_fragments:
+            with open(fragment_dir / f'{fragment_id}.js', 'w', encoding='utf-8') as f:
+                f.write(f'loadFragment({json.dumps(fragment_id)}, {json.dumps(html)});\n')
+            paths.append(f'{FRAGMENTS_DIRNAME}/{self._page_name}/{fragment_id}.js')
+        return paths
+    
+    def remove_lazy_fragments(self, page_name: str):
+        """Delete the fragment files of a page."""
+        fragment_dir = self.output_dir / FRAGMENTS_DIRNAME / page_name
+        if fragment_dir.is_dir():
+            for fragment_file in fragment_dir.glob('*.js'):
+                fragment_file.unlink()
+            fragment_dir.rmdir()
+    
+    def format_wire_size(self, field_data: Dict[str, Any], definitions: Dict[str, Any]) -> str:
+        """
+        Return the estimated encoded size of a field for the Wire Size column.
+        
+        Arrays also show the size of a single item.
+        """
+        estimator = self._wire_size_estimator
+        if estimator is None or estimator.definitions is not definitions:
+            estimator = self._wire_size_estimator = WireSizeEstimator(definitions, self.schema_ir(definitions))
+        try:
+            wire_size = estimator.field_size(field_data).format()
+            if field_data.get('type') == 'array':
+                wire_size += f"; {estimator.field_size(field_data.get('items', {})).format()} per item"
+        except CodecError:
+            return ''
+        return escape(wire_size)
+    
+    def schema_ir(self, definitions: Dict[str, Any]):
+        """
+        Return the IR of the schema file being rendered.
+        
+        Field types are resolved once per schema node of the file, however often
+        a definition is rendered.
+        """
+        if self._schema_ir is None or self._schema_ir.definitions is not definitions:
+            self._schema_ir = SchemaIR(definitions)
+        return self._schema_ir
+    
+    def warm_up(self) -> float:
+        """
+        Load the state that rendering otherwise builds on first use.
+        
+        The enum index is read on its first lookup, so without this the first
+        packet rendered pays for it. Profile mode calls it before any packet is
+        timed.
+        
+        Returns:
+            Seconds spent
+        """
+        start_time = time.perf_counter()
+        self.enum_cache.load()
+        return time.perf_counter() - start_time
+    
+    def iter_nested_table(self, schema: Dict[str, Any], definitions: Dict[str, Any],
+                          title: str, indent_level: int = 0) -> Iterator[str]:
+        """
+        Yield the HTML of a schema object table in chunks.
+        
+        Nested oneOf, enum and map tables are streamed in place; referenced
+        definitions are yielded as whole (cached) fragments.
+        """
+        # Properties in ordinal index order, with their types resolved
+        fields = self.schema_ir(definitions).node(schema).fields
+        if fields is None:
+            return
         
-        # Build table HTML
-        html = []
         margin_left = indent_level * 20
+        profile = self._page_profile
+        if profile is not None:
+            profile.enter_table()
         
-        html.append(f'<div style="margin-left: {margin_left}px; margin-top: 10px;">')
+        if self.compact:
+            yield '<div class="fields">'
+        else:
+            yield f'<div style="margin-left: {margin_left}px; margin-top: 10px;">'
         if title:
-            html.append(f'<h3>{escape(title)}</h3>')
-        
-        html.append('<table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse; width: 100%; max-width: 800px;">')
-        html.append('<thead>')
-        html.append('<tr style="background-color: #f0f0f0;">')
-        html.append('<th>Field Name</th>')
-        html.append('<th>Type</th>')
-        html.append('<th>Field Index</th>')
-        html.append('<th>Description</th>')
-        html.append('</tr>')
-        html.append('</thead>')
-        html.append('<tbody>')
-        
-        for field_name, field_data in sorted_properties:
-            underlying_type = self.get_underlying_type(field_data, definitions)
-            ordinal = self.get_ordinal_index(field_data)
-            description = escape(field_data.get('description', ''))
-            is_required = field_name in required
+            yield f'\n<h3>{escape(title)}</h3>'
+        
+        if self.compact:
+            yield '\n<table>\n<thead>\n<tr>'
+        else:
+            yield ('\n<table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse; width: 100%; max-width: 800px;">'
+                   '\n<thead>'
+                   '\n<tr style="background-color: #f0f0f0;">')
+        yield ('\n<th>Field Name</th>'
+               '\n<th>Type</th>')
+        if self.wire_sizes:
+            yield '\n<th>Wire Size</th>'
+        yield ('\n<th>Field Index</th>'
+               '\n<th>Description</th>'
+               '\n</tr>'
+               '\n</thead>'
+               '\n<tbody>')
+        
+        for field in fields:
+            self._page_nodes += 1
+            if profile is not None:
+                profile.rows += 1
+            field_type = field.field_type
+            field_data = field_type.schema
+            underlying_type = field_type.type_name
+            ordinal = field.ordinal
+            description = escape(field.description)
             
             # Add (Required) suffix to field name if it's a required field
-            display_field_name = field_name
-            if is_required:
+            display_field_name = field_name = field.name
+            if field.required:
                 display_field_name = f"{field_name} (Required)"
             
             # Display ordinal index (or empty if not present)
             ordinal_display = str(ordinal) if ordinal != 9999 else ''
             
-            enum_html = ""
-            nested_html = ""
-            oneof_html = ""
+            # Chunks of the second row's cell content, and the cell's opening tag
+            second_row = None
+            colspan = 4 if self.wire_sizes else 3
+            second_row_cell = f'<td colspan="{colspan}">'
             
             # Check for oneOf first
-            if 'oneOf' in field_data:
-                oneof_html = self.generate_oneof_table(field_data, 0, definitions)
-            # Check for inline enum (defined in the field itself)
-            elif 'enum' in field_data:
-                enum_values = field_data['enum']
-                enum_html = self.generate_enum_table(enum_values, 0)
+            if field_type.variants is not None:
+                second_row = self.iter_oneof_table(field_data, 0, definitions)
+                if self.compact:
+                    second_row_cell = f'<td colspan="{colspan}" class="flush">'
+                else:
+                    second_row_cell = f'<td colspan="{colspan}" style="padding: 0;">'
+            # Check for inline enum (defined in the field itself), with the
+            # wire values of the indexed enum of its title where there is one
+            elif field_type.enum_values is not None:
+                if field_type.enum_values:
+                    second_row = self.iter_enum_table(
+                        field_type.enum_values,
+                        0,
+                        self.enum_cache.wire_values(field_type.title, field_type.enum_values)
+                    )
             # Check for enum reference in title (external enum file)
-            elif field_data.get('title', '') in self.enum_cache:
-                enum_title = field_data['title']
-                enum_values = self.enum_cache[enum_title]
-                enum_html = self.generate_enum_table(enum_values, 0)
+            elif field_type.title in self.enum_cache:
+                enum_title = field_type.title
+                enum_entry = self.enum_cache.get_by_name(enum_title)
+                if enum_entry['values']:
+                    second_row = self.iter_enum_table(
+                        [value_name for _, value_name in enum_entry['values']],
+                        0,
+                        [value for value, _ in enum_entry['values']]
+                    )
             # Check if this field references another definition (nested table)
-            elif '$ref' in field_data:
-                ref_id = field_data['$ref'].split('/')[-1]
-                if ref_id in definitions:
-                    ref_schema = definitions[ref_id]
-                    underlying_type = ref_title = ref_schema.get('title', ref_id)
+            elif field_type.ref is not None:
+                if field_type.ref.resolved:
+                    ref_id = field_type.ref.ref_id
+                    underlying_type = ref_title = field_type.ref.title
                     
+                    if self.compact:
+                        underlying_type = self.definition_link(ref_id, definitions)
                     # Skip if title ends with "Payload"
-                    if not ref_title.endswith('Payload'):
-                        nested_html = self.generate_nested_table(
-                            ref_schema, 
+                    elif not ref_title.endswith('Payload'):
+                        nested_html = self.generate_definition_table(
+                            ref_id, 
                             definitions, 
                             ref_title, 
                             1  # Nested indent
                         )
+                        if nested_html:
+                            second_row = (nested_html,)
             # Check if this is an array with object items
-            elif field_data.get('type') == 'array':
-                items = field_data.get('items', {})
-                if '$ref' in items:
-                    ref_id = items['$ref'].split('/')[-1]
-                    if ref_id in definitions:
-                        ref_schema = definitions[ref_id]
-                        ref_title = ref_schema.get('title', ref_id)
+            elif field_type.items is not None:
+                item_ref = field_type.items.ref
+                if item_ref is not None:
+                    ref_id = item_ref.ref_id
+                    if item_ref.resolved:
+                        ref_title = item_ref.title
 
                         if 'x-serialization-options' in field_data:
                             ref_title += f" ({field_data['x-serialization-options']})"
                                         
+                        if self.compact:
+                            underlying_type = f"array&lt;{self.definition_link(ref_id, definitions)}&gt;"
                         # Skip if title ends with "Payload"
-                        if not ref_title.endswith('Payload'):
-                            nested_html = self.generate_nested_table(
-                                ref_schema, 
+                        elif not ref_title.endswith('Payload'):
+                            nested_html = self.generate_definition_table(
+                                ref_id, 
                                 definitions, 
                                 f"{ref_title} (Array Item)", 
                                 1  # Nested indent
                             )
+                            if nested_html and self.is_lazy() and self.is_deferrable(nested_html):
+                                second_row = (self.lazy_section(f"{ref_title} (Array Item)", nested_html, 1),)
+                            elif nested_html:
+                                second_row = (nested_html,)
             # Check if this is an object with additionalProperties (map type)
-            elif field_data.get('type') == 'object' and 'additionalProperties' in field_data:
-                additional_props = field_data['additionalProperties']
-                if additional_props.get('type') == 'object' and 'properties' in additional_props:
+            elif field_type.map_entry is not None:
+                if field_type.map_entry.fields is not None:
                     # Build a nested table showing key and value structure
-                    nested_html = self.generate_nested_table(
-                        additional_props,
+                    second_row = self.iter_nested_table(
+                        field_type.map_entry.schema,
                         definitions,
                         "Map Entry",
                         1  # Nested indent
                     )
+                    if self.is_lazy():
+                        map_html = ''.join(second_row)
+                        if self.is_deferrable(map_html):
+                            map_html = self.lazy_section("Map Entry", map_html, 1)
+                        second_row = (map_html,)
             
             # Build the main row
-            html.append('<tr>')
+            yield '\n<tr>'
             
             # Field name - spans 2 rows if there's a nested table, enum, or oneOf
-            if enum_html or nested_html or oneof_html:
-                html.append(f'<td rowspan="2"><strong>{escape(display_field_name)}</strong></td>')
+            if second_row is not None:
+                yield f'\n<td rowspan="2"><strong>{escape(display_field_name)}</strong></td>'
             else:
-                html.append(f'<td><strong>{escape(display_field_name)}</strong></td>')
+                yield f'\n<td><strong>{escape(display_field_name)}</strong></td>'
             
-            html.append(f'<td>{underlying_type}</td>')
-            html.append(f'<td>{ordinal_display}</td>')
-            html.append(f'<td>{description}</td>')
-            html.append('</tr>')
+            yield f'\n<td>{underlying_type}</td>'
+            if self.wire_sizes:
+                yield f'\n<td>{self.format_wire_size(field_data, definitions)}</td>'
+            yield (f'\n<td>{ordinal_display}</td>'
+                   f'\n<td>{description}</td>'
+                   '\n</tr>')
             
             # If there's a nested table, enum, or oneOf, add a second row for it
-            if oneof_html:
-                html.append('<tr>')
-                html.append(f'<td colspan="3" style="padding: 0;">{oneof_html}</td>')
-                html.append('</tr>')
-            elif enum_html:
-                html.append('<tr>')
-                html.append(f'<td colspan="3">{enum_html}</td>')
-                html.append('</tr>')
-            elif nested_html:
-                html.append('<tr>')
-                html.append(f'<td colspan="3">{nested_html}</td>')
-                html.append('</tr>')
-        
-        html.append('</tbody>')
-        html.append('</table>')
-        html.append('</div>')
-        
-        return '\n'.join(html)
+            if second_row is not None:
+                yield f'\n<tr>\n{second_row_cell}'
+                yield from second_row
+                yield '</td>\n</tr>'
+        
+        yield '\n</tbody>\n</table>\n</div>'
+        if profile is not None:
+            profile.exit_table()
     
     def get_page_html(self, title: str, content: str, back_link: bool = True) -> str:
         """
@@ -418,131 +1251,45 @@ class PacketDocGenerator:
             content: HTML content to include in body
             back_link: Whether to include a back to index link
         """
+        page_head, page_tail = self.get_page_shell(title, back_link)
+        return page_head + content + page_tail
+    
+    def iter_page_html(self, title: str, content: Iterable[str], back_link: bool = True) -> Iterator[str]:
+        """Yield a complete HTML page around streamed content chunks."""
+        page_head, page_tail = self.get_page_shell(title, back_link)
+        yield page_head
+        yield from content
+        yield page_tail
+    
+    def get_page_shell(self, title: str, back_link: bool = True) -> Tuple[str, str]:
+        """
+        Return the HTML that goes before and after a page's content.
+        
+        Args:
+            title: Page title
+            back_link: Whether to include a back to index link
+        """
         back_html = ''
         if back_link:
             back_html = '<p><a href="index.html">← Back to Index</a></p>'
         
+        if self.compact:
+            style_html = f'<link rel="stylesheet" href="{STYLESHEET_FILENAME}">'
+        else:
+            style_html = f'<style>\n{PAGE_STYLESHEET}    </style>'
+        
         return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{escape(title)}</title>
-    <style>
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            margin: 0;
-            padding: 20px;
-            background-color: #f5f5f5;
-            line-height: 1.6;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background-color: white;
-            padding: 30px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        h1 {{
-            color: #2c3e50;
-            border-bottom: 3px solid #3498db;
-            padding-bottom: 10px;
-            margin-top: 0;
-        }}
-        h2 {{
-            color: #34495e;
-            border-bottom: 2px solid #3498db;
-            padding-bottom: 5px;
-            margin-top: 30px;
-        }}
-        h3 {{
-            color: #555;
-            margin-top: 20px;
-            margin-bottom: 10px;
-        }}
-        h4 {{
-            color: #666;
-            margin-top: 15px;
-            margin-bottom: 8px;
-        }}
-        table {{
-            background-color: white;
-            font-size: 14px;
-            margin-bottom: 10px;
-        }}
-        th {{
-            font-weight: bold;
-            text-align: left;
-            padding: 8px !important;
-        }}
-        td {{
-            padding: 8px !important;
-        }}
-        tr:nth-child(even) {{
-            background-color: #f9f9f9;
-        }}
-        tr:hover {{
-            background-color: #e8f4f8;
-        }}
-        .description {{
-            color: #555;
-            font-style: italic;
-            margin: 10px 0 20px 0;
-            padding: 10px;
-            background-color: #f8f9fa;
-            border-left: 4px solid #3498db;
-        }}
-        a {{
-            color: #3498db;
-            text-decoration: none;
-        }}
-        a:hover {{
-            text-decoration: underline;
-        }}
-        .packet-list {{
-            columns: 3;
-            column-gap: 20px;
-        }}
-        .packet-list li {{
-            margin-bottom: 8px;
-            break-inside: avoid;
-        }}
-        details {{
-            margin: 10px 0;
-        }}
-        summary {{
-            cursor: pointer;
-            font-weight: bold;
-            padding: 8px;
-            background-color: #f0f0f0;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            user-select: none;
-        }}
-        summary:hover {{
-            background-color: #e8e8e8;
-        }}
-        details[open] summary {{
-            background-color: #d4edff;
-            border-color: #3498db;
-            border-left: 4px solid #3498db;
-        }}
-        @media (max-width: 900px) {{
-            .packet-list {{
-                columns: 2;
-            }}
-        }}
-        @media (max-width: 600px) {{
-            .packet-list {{
-                columns: 1;
-            }}
-        }}
-    </style>
+    {style_html}
 </head>
 <body>
     <div class="container">
         {back_html}
-        {content}
+        """, """
     </div>
 </body>
 </html>"""
@@ -552,121 +1299,531 @@ class PacketDocGenerator:
         Process a single JSON schema file.
         
         Returns:
-            Tuple of (packet_name, description, html_content)
+            Tuple of (packet_name, description, html_content, packet_id)
             Returns empty strings if file should be skipped
         """
         try:
+            packet = self.load_packet_file(filepath)
+            if packet is None:
+                return "", "", "", -1
+            
+            title, description, packet_id, data = packet
+            content = ''.join(self.iter_packet_content(filepath, title, description, data))
+            return title, description, content, packet_id
+        
+        except Exception as e:
+            print(f"Error processing {filepath}: {e}")
+            return "", "", "", -1
+    
+    def load_packet_file(self, filepath: Path) -> Optional[Tuple[str, str, int, Dict[str, Any]]]:
+        """
+        Load a single JSON schema file.
+        
+        Returns:
+            Tuple of (packet_name, description, packet_id, schema data),
+            or None if the file should be skipped
+        """
+        data = self.schema_cache.get(filepath)
+        if data is None:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            
-            title = data.get('title', filepath.stem)
-            description = data.get('description', '')
-            extra_details = ''
-            definitions = data.get('definitions', {})
-            meta_properties = data.get('$metaProperties', {})
-            
-            # Skip files ending with Payload
-            if title.endswith('Payload'):
-                return "", "", ""
-            
-            packet_id = -1
-            if meta_properties:
-                packet_id = meta_properties.get('[cereal:packet]', None)
-                title += f" ({packet_id})"
-                
-                packet_details = meta_properties.get('[cereal:packet_details]', None)
-                if packet_details:
-                    extra_details = str(packet_details)
-
+        
+        title = data.get('title', filepath.stem)
+        description = data.get('description', '')
+        meta_properties = data.get('$metaProperties', {})
+        
+        # Skip files ending with Payload
+        if title.endswith('Payload'):
+            return None
+        
+        packet_id = -1
+        if meta_properties:
+            packet_id = meta_properties.get('[cereal:packet]', None)
+            title += f" ({packet_id})"
+        
+        return title, description, packet_id, data
+    
+    def iter_packet_content(self, filepath: Path, title: str, description: str,
+                            data: Dict[str, Any]) -> Iterator[str]:
+        """Yield the body HTML of a packet page in chunks."""
+        self._reset_page_state()
+        self._page_name = filepath.stem
+        
+        extra_details = ''
+        definitions = data.get('definitions', {})
+        meta_properties = data.get('$metaProperties', {})
+        
+        if meta_properties:
+            packet_details = meta_properties.get('[cereal:packet_details]', None)
+            if packet_details:
+                extra_details = str(packet_details)
+        
+        yield f'<h1>{escape(title)}</h1>'
+        
+        if description:
+            yield f'\n<div class="description">{escape(description)}</div>'
 
-            html_parts = []
-            html_parts.append(f'<h1>{escape(title)}</h1>')
-            
-            if description:
-                html_parts.append(f'<div class="description">{escape(description)}</div>')
+        if (extra_details):
+            yield f'\n<div class="description">{escape(extra_details)}</div>'
 
-            if (extra_details):
-                html_parts.append(f'<div class="description">{escape(extra_details)}</div>')
+        if self.wire_sizes:
+            packet_schema = {k: v for k, v in data.items() if k != 'definitions'}
+            wire_size = self.format_wire_size(packet_schema, definitions)
+            if wire_size:
+                yield f'\n<div class="description">Wire size: {wire_size}</div>'
 
+        
+        # Check if main object has a single mPayload property that references a Payload definition
+        table_schema = None
+        properties = data.get('properties', {})
+        if (data.get('type') == 'object' and 
+            len(properties) == 1 and 
+            'mPayload' in properties and 
+            '$ref' in properties['mPayload']):
             
-            # Check if main object has a single mPayload property that references a Payload definition
-            properties = data.get('properties', {})
-            if (data.get('type') == 'object' and 
-                len(properties) == 1 and 
-                'mPayload' in properties and 
-                '$ref' in properties['mPayload']):
+            # Get the payload definition
+            ref_id = properties['mPayload']['$ref'].split('/')[-1]
+            if ref_id in definitions:
+                payload_schema = definitions[ref_id]
+                payload_title = payload_schema.get('title', '')
                 
-                # Get the payload definition
-                ref_id = properties['mPayload']['$ref'].split('/')[-1]
-                if ref_id in definitions:
-                    payload_schema = definitions[ref_id]
-                    payload_title = payload_schema.get('title', '')
-                    
-                    # If the payload ends with "Payload", expand it directly
-                    if payload_title.endswith('Payload'):
-                        table_html = self.generate_nested_table(payload_schema, definitions, "", 0)
-                        html_parts.append(table_html)
-                    else:
-                        # Process normally
-                        table_html = self.generate_nested_table(data, definitions, "", 0)
-                        html_parts.append(table_html)
+                # If the payload ends with "Payload", expand it directly
+                if payload_title.endswith('Payload'):
+                    table_schema = payload_schema
                 else:
-                    # Process normally if ref not found
-                    table_html = self.generate_nested_table(data, definitions, "", 0)
-                    html_parts.append(table_html)
-            elif data.get('type') == 'object' and 'properties' in data:
-                # Process main properties normally
-                table_html = self.generate_nested_table(data, definitions, "", 0)
-                html_parts.append(table_html)
+                    # Process normally
+                    table_schema = data
+            else:
+                # Process normally if ref not found
+                table_schema = data
+        elif data.get('type') == 'object' and 'properties' in data:
+            # Process main properties normally
+            table_schema = data
+        
+        if table_schema is not None:
+            yield '\n'
+            yield from self.iter_nested_table(table_schema, definitions, "", 0)
+        
+        if self._lazy_fragments:
+            yield f'\n<script src="{LAZY_SCRIPT_FILENAME}" defer></script>'
+        
+        if self._budget_exceeded:
+            print(f"Warning: {filepath.name} exceeded the node budget of {self.node_budget}, output truncated")
+    
+    def collect_search_terms(self, data: Dict[str, Any]) -> Dict[str, List[str]]:
+        """
+        Collect the searchable terms of a packet schema.
+        
+        Returns:
+            Dict mapping each term kind (packet, field, type, definition, enum)
+            to the sorted terms of that kind found in the packet
+        """
+        definitions = data.get('definitions', {})
+        terms = {kind: set() for kind in ('packet', 'field', 'type', 'definition', 'enum')}
+        terms['packet'].add(data.get('title', ''))
+        
+        stack = [data] + list(definitions.values())
+        while stack:
+            schema = stack.pop()
+            if not isinstance(schema, dict):
+                continue
+            for field_name, field_data in schema.get('properties', {}).items():
+                terms['field'].add(field_name)
+                # get_underlying_type escapes for the page (vector&lt;int32&gt;)
+                terms['type'].add(unescape(self.get_underlying_type(field_data, definitions)))
+                stack.append(field_data)
+            for key in ('items', 'additionalProperties'):
+                stack.append(schema.get(key))
+            stack.extend(schema.get('oneOf', []))
             
-            return title, description, '\n'.join(html_parts), packet_id
+            if 'enum' in schema:
+                terms['enum'].update(str(value) for value in schema['enum'])
+            elif schema.get('title', '') in self.enum_cache:
+                terms['enum'].update(name for _, name in self.enum_cache.get_by_name(schema['title'])['values'])
+        
+        for ref_id, definition in definitions.items():
+            terms['definition'].add(definition.get('title', ref_id))
+        
+        return {kind: sorted(values - {''}) for kind, values in terms.items()}
+    
+    def render_packet(self, json_file: Path) -> Optional[Dict[str, Any]]:
+        """
+        Process a single JSON file and stream its packet HTML page to disk.
+        
+        In compact mode the pages of the packet's definitions are written too.
+        
+        Sets last_error if rendering failed, and last_outputs to the other
+        files the page needs.
+        
+        Returns:
+            Index entry for the packet, or None if the file was skipped or failed
+        """
+        # Generate individual packet HTML file
+        output_filename = f"{json_file.stem}.html"
+        self.last_profile = None
+        self.last_error = None
+        self.last_outputs = {'definition_pages': [], 'fragments': []}
+        start_time = time.perf_counter()
+        
+        try:
+            packet = self.load_packet_file(json_file)
+            if packet is None:  # Skip if the file is not a packet page
+                return None
+            
+            title, description, packet_id, data = packet
+            content = self.iter_packet_content(json_file, title, description, data)
+            self.write_page(self.output_dir / output_filename, title, content)
+            outputs = {'definition_pages': [], 'fragments': []}
+            if self.lazy:
+                outputs['fragments'] += self.write_lazy_fragments()
+            page_profile = self._page_profile
+            definition_pages = []
+            
+            if self.compact:
+                definitions = data.get('definitions', {})
+                for ref_id in definitions:
+                    if ref_id not in self.rendered_definitions and self.has_definition_page(ref_id, definitions):
+                        outputs['fragments'] += self.render_definition_page(ref_id, definitions)
+                        outputs['definition_pages'].append(ref_id)
+                        definition_pages.append(self.definition_filename(ref_id))
+            
+            if page_profile is not None:
+                self.last_profile = {
+                    'file': json_file.name,
+                    'packet': title,
+                    'wall_time': time.perf_counter() - start_time,
+                    'tables': page_profile.tables,
+                    'rows': page_profile.rows,
+                    'max_depth': page_profile.max_depth,
+                    'expansions': {
+                        f"{data['definitions'][ref_id].get('title', ref_id)} ({ref_id})": count
+                        for ref_id, count in page_profile.expansions.most_common()
+                    },
+                    'output_bytes': sum(
+                        (self.output_dir / filename).stat().st_size
+                        for filename in [output_filename] + definition_pages
+                    )
+                }
         
         except Exception as e:
-            print(f"Error processing {filepath}: {e}")
-            return "", "", "", -1
+            print(f"Error processing {json_file}: {e}")
+            self.last_error = str(e)
+            return None
+        
+        self.last_outputs = outputs
+        return {
+            'title': title,
+            'description': description,
+            'filename': output_filename,
+            'id': packet_id
+        }
+    
+    def render_definition_page(self, ref_id: str, definitions: Dict[str, Any]) -> List[str]:
+        """
+        Write the page of a single definition (compact mode).
+        
+        Returns:
+            Paths of the page's fragment files (lazy mode), relative to the output directory
+        """
+        self.rendered_definitions.add(ref_id)
+        title = definitions[ref_id].get('title', ref_id)
+        
+        page_name = Path(self.definition_filename(ref_id)).stem
+        
+        def iter_content():
+            self._reset_page_state()
+            self._page_name = page_name
+            yield f'<h1>{escape(title)}</h1>\n'
+            yield from self.iter_nested_table(definitions[ref_id], definitions, "", 0)
+            if self._lazy_fragments:
+                yield f'\n<script src="{LAZY_SCRIPT_FILENAME}" defer></script>'
+        
+        self.write_page(self.output_dir / self.definition_filename(ref_id), title, iter_content())
+        return self.write_lazy_fragments() if self.lazy else []
     
-    def generate_documentation(self, json_files: List[Path]):
+    def write_page(self, output_path: Path, title: str, content: Iterable[str]):
+        """
+        Stream a page to disk.
+        
+        The page is written through a buffered temporary file that replaces the
+        output only once rendering succeeded.
+        """
+        temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8', buffering=PAGE_WRITE_BUFFER_SIZE) as f:
+                f.writelines(self.iter_page_html(title, content, back_link=True))
+            os.replace(temp_path, output_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+    
+    def generator_fingerprint(self) -> str:
+        """
+        Fingerprint of everything besides a packet's own schema that affects its page.
+        
+        Covers the generator version, source and options plus the enum definitions,
+        so any change to them invalidates every page in the manifest. The sources
+        of the modules that render part of the page are included too.
+        """
+        digest = hashlib.sha256(str(GENERATOR_VERSION).encode())
+        digest.update(Path(__file__).read_bytes())
+        # Field tables are rendered from the schema IR, wire sizes by the estimator
+        modules = ['schema_ir.py']
+        if self.wire_sizes:
+            modules += ['wire_size.py', 'packet_codec.py']
+        for module in modules:
+            digest.update((Path(__file__).parent / module).read_bytes())
+        options = self.generator_options()
+        # Profiling does not change the output
+        del options['profile']
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        digest.update(self.enum_cache.source_hash().encode())
+        for enum_file in sorted(self.source_dir.glob("enum_*.json")):
+            digest.update(enum_file.name.encode())
+            digest.update(enum_file.read_bytes())
+        return digest.hexdigest()
+    
+    def load_manifest(self) -> Dict[str, Any]:
+        """Load the build manifest from the output directory, if present and valid."""
+        manifest_path = self.output_dir / MANIFEST_FILENAME
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+    
+    def save_manifest(self, manifest: Dict[str, Any]):
+        """Write the build manifest to the output directory."""
+        manifest_path = self.output_dir / MANIFEST_FILENAME
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+    
+    def is_up_to_date(self, json_file: Path, entry: Optional[Dict[str, Any]]) -> bool:
+        """
+        Check a manifest entry against the current input and output files.
+        
+        Matching size and mtime are trusted without hashing; otherwise the file
+        content hash decides. The page, the definition pages and the fragment
+        files written with it must all still exist. Updates the entry's stat
+        fields in place.
+        """
+        if not entry:
+            return False
+        packet = entry.get('packet')
+        if packet and not (self.output_dir / packet['filename']).exists():
+            return False
+        outputs = [self.definition_filename(ref_id) for ref_id in entry.get('definition_pages', [])]
+        outputs += entry.get('fragments', [])
+        if not all((self.output_dir / output).exists() for output in outputs):
+            return False
+        stat = json_file.stat()
+        if entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            return True
+        if entry.get('hash') != hashlib.sha256(json_file.read_bytes()).hexdigest():
+            return False
+        entry['size'] = stat.st_size
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+    
+    def generate_documentation(self, json_files: List[Path], jobs: int = 1, force: bool = False):
         """
         Generate complete documentation from all JSON files in source directory.
         
         Creates individual HTML files for each packet and an index page.
+        With jobs > 1 the packet pages are rendered in a process pool; results
+        are merged in input order so the output matches the serial path.
+        
+        Unless force is set, a manifest of input hashes in the output directory
+        is used to skip packets whose schema is unchanged since the last run, and
+        the index is only rewritten when packet titles, ids or descriptions change.
+        
+        In profile mode the statistics of every rendered packet are written to
+        profile.jsonl and the most expensive packets and definitions are printed.
         """
 
-        packets = []
+        fingerprint = self.generator_fingerprint()
+        manifest = {} if force else self.load_manifest()
+        reuse_manifest = manifest.get('generator') == fingerprint
+        previous = manifest.get('packets', {}) if reuse_manifest else {}
         
-        # Process each JSON file
-        print("Processing packets...")
+        entries = {}
+        profiles = []
+        changed_files = []
         for json_file in json_files:
+            entry = previous.get(json_file.name)
+            if self.is_up_to_date(json_file, entry):
+                entries[json_file.name] = entry
+            else:
+                changed_files.append(json_file)
+                if entry:
+                    # Rewrite its definition pages even if this generator wrote them before
+                    self.rendered_definitions.difference_update(entry.get('definition_pages', []))
+        
+        # Keep the one-off setup out of the first profiled packet
+        setup_time = self.warm_up() if self.profile else 0.0
+        
+        # Process each changed JSON file
+        print("Processing packets...")
+        if jobs > 1 and len(changed_files) > 1:
+            # Build the enum index cache once, before the workers read it
+            self.enum_cache.load()
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_worker,
+                initargs=(self.output_dir, self.source_dir, self.generator_options())
+            ) as executor:
+                results = []
+                for packet, hits, misses, profile, error, outputs in executor.map(
+                        _render_packet_worker, changed_files, chunksize=4):
+                    # Fold the workers' cache counters into this generator's
+                    self.fragment_cache.hits += hits
+                    self.fragment_cache.misses += misses
+                    results.append((packet, error, outputs))
+                    if profile:
+                        profiles.append(profile)
+        else:
+            results = []
+            for json_file in changed_files:
+                packet = self.render_packet(json_file)
+                results.append((packet, self.last_error, self.last_outputs))
+                if self.last_profile:
+                    profiles.append(self.last_profile)
+        
+        failed = 0
+        for json_file, (packet, error, outputs) in zip(changed_files, results):
             print(f"  - {json_file.name}")
-            title, description, content, packet_id = self.process_packet_file(json_file)
-            
-            if not title:  # Skip if processing returned empty
+            if error is not None:
+                # No manifest entry, so the next run renders it again
+                failed += 1
                 continue
-            
-            # Generate individual packet HTML file
-            output_filename = f"{json_file.stem}.html"
-            output_path = self.output_dir / output_filename
-            
-            page_html = self.get_page_html(title, content, back_link=True)
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(page_html)
-            
-            packets.append({
-                'title': title,
-                'description': description,
-                'filename': output_filename,
-                'id': packet_id
-            })
+            stat = json_file.stat()
+            source = json_file.read_bytes()
+            entries[json_file.name] = {
+                'hash': hashlib.sha256(source).hexdigest(),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'packet': packet,
+                'definition_pages': outputs['definition_pages'],
+                'fragments': outputs['fragments']
+            }
+            if self.search_index and packet:
+                entries[json_file.name]['search'] = self.collect_search_terms(json.loads(source))
+        
+        unchanged = len(json_files) - len(changed_files)
+        if unchanged:
+            print(f"  ({unchanged} unchanged packets skipped)")
+        
+        # Remove pages whose schema file no longer exists
+        source_names = {json_file.name for json_file in json_files}
+        for name, entry in previous.items():
+            packet = entry.get('packet')
+            if name not in source_names and packet:
+                (self.output_dir / packet['filename']).unlink(missing_ok=True)
+                self.remove_lazy_fragments(Path(packet['filename']).stem)
+        
+        packets = [
+            entries[json_file.name]['packet'] for json_file in json_files
+            if json_file.name in entries and entries[json_file.name]['packet']
+        ]
+        
+        if self.compact:
+            with open(self.output_dir / STYLESHEET_FILENAME, 'w', encoding='utf-8') as f:
+                f.write(textwrap.dedent(PAGE_STYLESHEET + COMPACT_STYLESHEET))
+        if self.lazy:
+            with open(self.output_dir / LAZY_SCRIPT_FILENAME, 'w', encoding='utf-8') as f:
+                f.write(LAZY_SCRIPT)
         
         # Generate index page
-        print("\nGenerating index page...")
-        self.generate_index_page(packets)
+        index_key = hashlib.sha256(json.dumps(packets, sort_keys=True).encode()).hexdigest()
+        if (not reuse_manifest or index_key != manifest.get('index')
+                or not (self.output_dir / 'index.html').exists()):
+            print("\nGenerating index page...")
+            self.generate_index_page(list(packets))
+        
+        search_key = None
+        if self.search_index:
+            searchable = [
+                (entries[json_file.name]['packet'], entries[json_file.name].get('search', {}))
+                for json_file in json_files
+                if json_file.name in entries and entries[json_file.name]['packet']
+            ]
+            search_key = hashlib.sha256(json.dumps(searchable, sort_keys=True).encode()).hexdigest()
+            if (not reuse_manifest or search_key != manifest.get('search')
+                    or not (self.output_dir / SEARCH_INDEX_FILENAME).exists()):
+                print("Generating search index...")
+                self.generate_search_index(searchable)
+        
+        self.save_manifest({
+            'generator': fingerprint,
+            'index': index_key,
+            'search': search_key,
+            'packets': entries
+        })
+        
+        if self.profile:
+            self.save_profile(profiles, setup_time)
         
         print(f"\n✓ Generated {len(packets)} packet documentation files")
+        if failed:
+            print(f"Warning: {failed} packets failed to render and will be retried on the next run")
+        print(f"✓ Fragment cache: {self.fragment_cache.hits} hits, {self.fragment_cache.misses} misses")
         print(f"✓ Output directory: {self.output_dir}")
         print(f"✓ Open {self.output_dir / 'index.html'} in your browser")
     
+    def save_profile(self, profiles: List[Dict[str, Any]], setup_time: float = 0.0):
+        """
+        Write the profile records as JSONL and print the top offenders.
+        
+        setup_time is the time warm_up took before the packets were rendered.
+        """
+        profile_path = self.output_dir / PROFILE_FILENAME
+        with open(profile_path, 'w', encoding='utf-8') as f:
+            for profile in profiles:
+                f.write(json.dumps(profile) + '\n')
+        
+        print(f"\nProfile of {len(profiles)} rendered packets ({profile_path}):")
+        print(f"  Setup (enum index): {round(setup_time, 3)}s")
+        for label, key, unit in (('Slowest', 'wall_time', 's'), ('Largest', 'output_bytes', ' bytes'),
+                                 ('Most rows', 'rows', ' rows'), ('Deepest', 'max_depth', ' levels')):
+            top = sorted(profiles, key=lambda x: x[key], reverse=True)[:PROFILE_SUMMARY_SIZE]
+            print(f"  {label}: " + ', '.join(
+                f"{profile['file']} ({round(profile[key], 3)}{unit})" for profile in top
+            ))
+        
+        expansions = Counter()
+        for profile in profiles:
+            expansions.update(profile['expansions'])
+        if expansions:
+            print("  Most expanded definitions: " + ', '.join(
+                f"{ref_id} ({count}x)" for ref_id, count in expansions.most_common(PROFILE_SUMMARY_SIZE)
+            ))
+    
+    def generate_search_index(self, searchable: List[Tuple[Dict[str, Any], Dict[str, List[str]]]]):
+        """
+        Write the inverted search index and the client-side search script.
+        
+        The index maps every term, per kind, to the positions of the packets
+        containing it in a shared list of (title, filename) documents.
+        
+        Args:
+            searchable: (index entry, search terms) of every packet
+        """
+        searchable = sorted(searchable, key=lambda x: x[0]['id'])
+        docs = [[packet['title'], packet['filename']] for packet, _ in searchable]
+        terms = {}
+        for doc, (_, packet_terms) in enumerate(searchable):
+            for kind, values in packet_terms.items():
+                kind_terms = terms.setdefault(kind, {})
+                for value in values:
+                    kind_terms.setdefault(value, []).append(doc)
+        
+        index = json.dumps({'docs': docs, 'terms': terms}, separators=(',', ':'), sort_keys=True)
+        with open(self.output_dir / SEARCH_INDEX_FILENAME, 'w', encoding='utf-8') as f:
+            f.write(f'window.SEARCH_INDEX = {index};\n')
+        with open(self.output_dir / SEARCH_SCRIPT_FILENAME, 'w', encoding='utf-8') as f:
+            f.write(SEARCH_SCRIPT)
+    
     def generate_index_page(self, packets: List[Dict[str, str]]):
         """Generate an index page with links to all packet documentation."""
         html_parts = []
@@ -674,6 +1831,12 @@ class PacketDocGenerator:
         html_parts.append('<h1>Game Protocol Documentation</h1>')
         html_parts.append(f'<p>Documentation for {len(packets)} protocol packets.</p>')
         
+        if self.search_index:
+            html_parts.append('<input type="search" id="search" placeholder="Search packets, fields, types, enum values..." '
+                              'autocomplete="off" style="width: 100%; max-width: 600px; padding: 8px; font-size: 1em;">')
+            html_parts.append('<ul id="search-results"></ul>')
+            html_parts.append(f'<script src="{SEARCH_SCRIPT_FILENAME}" defer></script>')
+        
         html_parts.append('<h2>Packet List</h2>')
         html_parts.append('<ul class="packet-list">')
 
@@ -686,7 +1849,10 @@ class PacketDocGenerator:
             html_parts.append(f'<li>')
             html_parts.append(f'<a href="{filename}"><strong>{title}</strong></a>')
             if packet['description']:
-                html_parts.append(f'<br><span style="color: #666; font-size: 0.9em;">{desc}</span>')
+                if self.compact:
+                    html_parts.append(f'<br><span class="summary">{desc}</span>')
+                else:
+                    html_parts.append(f'<br><span style="color: #666; font-size: 0.9em;">{desc}</span>')
             html_parts.append(f'</li>')
         
         html_parts.append('</ul>')
@@ -699,14 +1865,208 @@ class PacketDocGenerator:
             f.write(page_html)
 
 
+class DocWatcher:
+    """
+    Rebuilds the documentation whenever the input files change (--watch mode).
+    
+    The input directory is polled with os.stat only, so it works on any
+    filesystem, including bind mounts in containers. Changed schemas are parsed
+    once into the generator's schema cache, and only the cached fragments of
+    definitions that changed (and of the definitions containing them) are
+    dropped, so a rebuild re-renders just the affected pages.
+    """
+    
+    def __init__(self, generator: PacketDocGenerator, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        """Initialize the watcher for a generator's input directory."""
+        self.generator = generator
+        self.poll_interval = poll_interval
+        # Canonical JSON of every definition, and the $refs each one contains
+        self.definitions: Dict[str, str] = {}
+        self.references: Dict[str, set] = {}
+    
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """Return the (mtime_ns, size) of every JSON file in the input directory."""
+        snapshot = {}
+        with os.scandir(self.generator.source_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    @staticmethod
+    def is_enum_source(name: str) -> bool:
+        """Whether a file feeds the enum index rather than a packet page."""
+        return name.startswith("enum_") or name == PROTOCOL_DOC_FILENAME
+    
+    def load_schemas(self, names: Iterable[str]) -> set:
+        """
+        Parse schema files into the generator's schema cache.
+        
+        Returns:
+            Ids of the definitions whose content changed
+        """
+        changed = set()
+        for name in names:
+            path = self.generator.source_dir / name
+            self.generator.schema_cache.pop(path, None)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not load {name}: {e}")
+                continue
+            self.generator.schema_cache[path] = data
+            if not isinstance(data, dict):
+                continue
+            for ref_id, definition in data.get('definitions', {}).items():
+                canonical = json.dumps(definition, sort_keys=True)
+                if self.definitions.get(ref_id) != canonical:
+                    self.definitions[ref_id] = canonical
+                    self.references[ref_id] = set(re.findall(r'"#/definitions/([^"]+)"', canonical))
+                    changed.add(ref_id)
+        return changed
+    
+    def dependents(self, ref_ids: set) -> set:
+        """Return ref_ids plus every definition that contains one of them, transitively."""
+        affected = set(ref_ids)
+        grew = True
+        while grew:
+            grew = False
+            for ref_id, refs in self.references.items():
+                if ref_id not in affected and refs & affected:
+                    affected.add(ref_id)
+                    grew = True
+        return affected
+    
+    def rebuild(self, jobs: int = 1, force: bool = False):
+        """Regenerate the documentation from the current input files."""
+        json_files = find_schema_files(self.generator.source_dir)
+        if not json_files:
+            print(f"Warning: No JSON files found in {self.generator.source_dir}")
+            return
+        self.generator.generate_documentation(json_files, jobs=jobs, force=force)
+    
+    def run(self, jobs: int = 1, force: bool = False):
+        """
+        Build once, then poll and rebuild on every change until interrupted.
+        
+        Every build uses jobs worker processes; force only applies to the first.
+        Worker processes start with empty caches, so rebuilds of a few packets
+        are usually faster with jobs=1.
+        """
+        previous = self.snapshot()
+        self.load_schemas(name for name in previous if not self.is_enum_source(name))
+        self.rebuild(jobs, force)
+        print(f"\nWatching {self.generator.source_dir} for changes (Ctrl+C to stop)...")
+        
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                current = self.snapshot()
+                if current == previous:
+                    continue
+                changed = {name for name in current.keys() | previous.keys()
+                           if current.get(name) != previous.get(name)}
+                previous = current
+                
+                start_time = time.perf_counter()
+                if any(self.is_enum_source(name) for name in changed):
+                    # Enums feed every page: start over with a fresh generator
+                    self.generator = PacketDocGenerator(
+                        self.generator.output_dir, self.generator.source_dir,
+                        **self.generator.generator_options()
+                    )
+                    self.definitions.clear()
+                    self.references.clear()
+                    self.load_schemas(name for name in current if not self.is_enum_source(name))
+                else:
+                    for name in changed - current.keys():
+                        self.generator.schema_cache.pop(self.generator.source_dir / name, None)
+                    stale = self.dependents(self.load_schemas(changed & current.keys()))
+                    self.generator.fragment_cache.invalidate(stale)
+                    self.generator.rendered_definitions -= stale
+                
+                print(f"\nDetected changes in {', '.join(sorted(changed))}")
+                self.rebuild(jobs)
+                print(f"✓ Rebuilt in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+
+
+def find_schema_files(input_path: Path) -> List[Path]:
+    """Return the packet schema files of an input directory, excluding enums and the protocol document."""
+    return sorted([
+        f for f in input_path.glob("*.json") 
+        if not f.name.startswith("enum_") and f.name != PROTOCOL_DOC_FILENAME
+    ])
+
+
+# Generator instance owned by each worker process in --jobs mode
+_worker_generator = None
+
+
+def _init_worker(output_dir: Path, source_dir: Path, options: Dict[str, Any]):
+    """Create the per-process generator used by _render_packet_worker."""
+    global _worker_generator
+    _worker_generator = PacketDocGenerator(output_dir, source_dir, **options)
+    if _worker_generator.profile:
+        _worker_generator.warm_up()
+
+
+def _render_packet_worker(json_file: Path) -> Tuple[Optional[Dict[str, Any]], int, int, Optional[Dict[str, Any]],
+                                                   Optional[str], Dict[str, List[str]]]:
+    """
+    Render one packet page inside a worker process.
+    
+    Returns:
+        Tuple of (index entry, fragment cache hits, fragment cache misses,
+        profile record or None, error or None, other output files) for this file
+    """
+    generator = _worker_generator
+    cache = generator.fragment_cache
+    hits, misses = cache.hits, cache.misses
+    packet = generator.render_packet(json_file)
+    return (packet, cache.hits - hits, cache.misses - misses, generator.last_profile,
+            generator.last_error, generator.last_outputs)
+
+
 def main():
     """Main entry point for the script."""
     # Parse command line arguments
-    input_path = None
-    output_path = None
+    parser = argparse.ArgumentParser(description="Generate HTML documentation from JSON schema files.")
+    parser.add_argument('input_path', nargs='?', type=Path,
+                        help="Directory containing JSON files (default: script directory)")
+    parser.add_argument('output_path', nargs='?', type=Path,
+                        help="Output directory (default: ./docs in script directory)")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="Render packet pages in N worker processes (default: 1)")
+    parser.add_argument('--force', action='store_true',
+                        help="Ignore the build manifest and regenerate every page")
+    parser.add_argument('--fragment-cache-size', type=int, default=DEFAULT_FRAGMENT_CACHE_SIZE, metavar='N',
+                        help=f"Maximum number of cached definition tables (default: {DEFAULT_FRAGMENT_CACHE_SIZE}, 0 disables)")
+    parser.add_argument('--compact', action='store_true',
+                        help="Link definitions from their own pages and share one stylesheet file")
+    parser.add_argument('--wire-sizes', action='store_true',
+                        help="Add a column with the estimated encoded size of each field")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"Write per-packet render statistics to {PROFILE_FILENAME} in the output directory")
+    parser.add_argument('--search-index', action='store_true',
+                        help="Write a search index and add a search box to the index page")
+    parser.add_argument('--lazy', action='store_true',
+                        help="Load oneOf variants, array items and map entries only when expanded")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and rebuild whenever the input files change (using --jobs workers)")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL, metavar='SECONDS',
+                        help=f"How often --watch checks the input files (default: {DEFAULT_POLL_INTERVAL})")
+    parser.add_argument('--node-budget', type=int, default=DEFAULT_NODE_BUDGET, metavar='N',
+                        help=f"Maximum number of table rows expanded per page (default: {DEFAULT_NODE_BUDGET})")
+    args = parser.parse_args()
+    
+    input_path = args.input_path
+    output_path = args.output_path
     
-    if len(sys.argv) > 1:
-        input_path = Path(sys.argv[1])
+    if input_path is not None:
         if not input_path.exists():
             print(f"Error: Input path '{input_path}' does not exist")
             sys.exit(1)
@@ -717,33 +2077,50 @@ def main():
         # Default to script directory
         input_path = Path(__file__).parent
     
-    if len(sys.argv) > 2:
-        output_path = Path(sys.argv[2])
-    else:
+    if output_path is None:
         # Default to docs subdirectory in script location
         output_path = Path(__file__).parent / "docs"
     
+    if args.jobs < 1:
+        print("Error: --jobs must be at least 1")
+        sys.exit(1)
+    
+    if args.poll_interval <= 0:
+        print("Error: --poll-interval must be positive")
+        sys.exit(1)
+    
     print(f"Input directory: {input_path.absolute()}")
     print(f"Output directory: {output_path.absolute()}")
     print()
     
     # Generate documentation
-    generator = PacketDocGenerator(output_path, input_path)
+    generator = PacketDocGenerator(
+        output_path,
+        input_path,
+        fragment_cache_size=args.fragment_cache_size,
+        node_budget=args.node_budget,
+        compact=args.compact,
+        wire_sizes=args.wire_sizes,
+        profile=args.profile,
+        search_index=args.search_index,
+        lazy=args.lazy
+    )
 
-    # Get all JSON files except those starting with "enum_"
-    json_files = sorted([
-        f for f in input_path.glob("*.json") 
-        if not f.name.startswith("enum_")
-    ])
+    if args.watch:
+        DocWatcher(generator, args.poll_interval).run(jobs=args.jobs, force=args.force)
+        return
+
+    # Get all JSON files except enums and the protocol document
+    json_files = find_schema_files(input_path)
 
     if not json_files:
         print(f"Warning: No JSON files found in {input_path}")
         sys.exit(1)
 
-    generator.generate_documentation(json_files)
+    generator.generate_documentation(json_files, jobs=args.jobs, force=args.force)
 
     print("\nDone! 🎉")
 
 
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file
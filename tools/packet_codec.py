@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Compile JSON packet schemas into specialized binary encoders and decoders.
+
+Each packet schema is turned into straight-line Python source (one function per
+definition) which is then compiled once, so decoding a packet never walks the
+schema dictionaries at runtime.
+
+Wire rules (shared with schema_ir.get_underlying_type and classify_field):
+- Fields are serialized in x-ordinal-index order
+- x-underlying-type gives the width of scalars, little endian unless "Big Endian"
+- "Compression" turns integers into var-ints (zig-zag encoded for signed types)
+- Enums are written as their underlying value only with "Enum-as-Value",
+  otherwise as strings
+- Strings, arrays and maps are prefixed with a varuint32 length
+  ("No size compression" arrays use a fixed uint32 count)
+- oneOf unions are prefixed with their x-control-value-type (default varuint32)
+
+Consecutive fixed-width fields are merged into one precompiled struct.Struct and
+var-ints are decoded inline over a memoryview. With batch_arrays=True, arrays of
+records made only of var-ints are decoded into NumPy arrays instead, in bulk
+unless they are shorter than varint_batch.BATCH_MIN_COUNT (see varint_batch.py).
+
+Decoded values:
+- objects are dicts keyed by field name
+- arrays are lists
+- oneOf unions are (control_value, value) tuples
+- maps are lists of (key, value) tuples
+- empty/null schemas decode to None
+
+Usage:
+    python packet_codec.py [input_path] [output_file]
+
+    input_path: Optional path to directory containing JSON files (default: script directory)
+    output_file: Optional path of the generated Python module (default: ./packet_codecs.py in script directory)
+"""
+
+import json
+import re
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from schema_ir import (
+    CodecError, DEFAULT_CONTROL_VALUE_TYPE, FIXED_FORMATS, SchemaIR, map_schemas, sorted_properties
+)
+
+
+SIGNED_TYPES = {'int8', 'int16', 'int32', 'int64'}
+
+GENERATED_PRELUDE = "from struct import Struct, pack as _pack, unpack_from as _unpack_from\n"
+
+
+def is_uncompressed_count(field: Dict[str, Any]) -> bool:
+    """Whether an array is prefixed with a fixed uint32 count instead of a varuint32."""
+    return 'No size compression' in field.get('x-serialization-options', [])
+
+
+class CodecCompiler:
+    """Compiles one packet schema into Python source for its encoder and decoder."""
+
+    def __init__(self, schema: Dict[str, Any], name: str, batch_arrays: bool = False):
+        """Initialize the compiler for a single packet schema."""
+        self.schema = schema
+        self.batch_arrays = batch_arrays
+        # Bulk array codecs used by the generated source, by module-level name
+        self.batch_codecs: Dict[str, Any] = {}
+        self._batch_names: Dict[int, Optional[str]] = {}
+        self.definitions = schema.get('definitions', {})
+        self.ir = SchemaIR(self.definitions)
+        self.prefix = re.sub(r'\W', '_', name)
+        self.structs: Dict[str, str] = {}
+        self.functions: List[str] = []
+        self.compiled_refs: Dict[str, str] = {}
+        self.pending: List[Tuple[str, Dict[str, Any]]] = []
+        self.counter = 0
+
+    def temp(self, prefix: str = 'v') -> str:
+        """Return a fresh local variable name."""
+        self.counter += 1
+        return f'_{prefix}{self.counter}'
+
+    def struct_name(self, fmt: str) -> str:
+        """Return the module-level name of a precompiled Struct for a format."""
+        if fmt not in self.structs:
+            self.structs[fmt] = f'_S_{self.prefix}_{len(self.structs)}'
+        return self.structs[fmt]
+
+    def ref_function(self, ref: str) -> str:
+        """Return the function suffix for a $ref, queueing its compilation."""
+        ref_id = ref.split('/')[-1]
+        if ref_id not in self.definitions:
+            raise CodecError(f"Unresolved reference {ref}")
+        if ref_id not in self.compiled_refs:
+            suffix = f'{self.prefix}_{ref_id}'
+            self.compiled_refs[ref_id] = suffix
+            self.pending.append((suffix, self.definitions[ref_id]))
+        return self.compiled_refs[ref_id]
+
+    def inline_function(self, schema: Dict[str, Any]) -> str:
+        """Queue an anonymous (inline) object schema for compilation."""
+        suffix = f'{self.prefix}_anon{self.temp("")}'
+        self.pending.append((suffix, schema))
+        return suffix
+
+    def batch_codec(self, field: Dict[str, Any]) -> Optional[str]:
+        """Return the module-level name of the bulk codec of an array, or None if it has none."""
+        if not self.batch_arrays:
+            return None
+        if id(field) not in self._batch_names:
+            # Imported here since varint_batch builds on this module
+            from varint_batch import BatchArrayCodec
+            codec = BatchArrayCodec.for_field(field, self.definitions)
+            name = None
+            if codec is not None:
+                name = f'_B_{self.prefix}_{len(self.batch_codecs)}'
+                self.batch_codecs[name] = codec
+            self._batch_names[id(field)] = name
+        return self._batch_names[id(field)]
+
+    def classify(self, field: Dict[str, Any]) -> Tuple[str, Any]:
+        """Work out the wire kind of a field schema (memoized in the schema's IR)."""
+        return self.ir.classify(field)
+
+    @staticmethod
+    def sorted_properties(schema: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return properties in serialization order."""
+        return sorted_properties(schema)
+
+    # -- decoding ---------------------------------------------------------
+
+    def decode_varint(self, target: str, base_type: str, ind: str) -> List[str]:
+        """Emit inline var-int decoding into target."""
+        shift = self.temp('s')
+        byte = self.temp('b')
+        lines = [
+            f'{ind}{target} = buf[pos]; pos += 1',
+            f'{ind}if {target} > 0x7f:',
+            f'{ind}    {target} &= 0x7f; {shift} = 7',
+            f'{ind}    while True:',
+            f'{ind}        {byte} = buf[pos]; pos += 1',
+            f'{ind}        {target} |= ({byte} & 0x7f) << {shift}',
+            f'{ind}        if {byte} < 0x80:',
+            f'{ind}            break',
+            f'{ind}        {shift} += 7',
+        ]
+        if base_type in SIGNED_TYPES:
+            lines.append(f'{ind}{target} = ({target} >> 1) ^ -({target} & 1)')
+        elif base_type == 'boolean':
+            lines.append(f'{ind}{target} = {target} != 0')
+        return lines
+
+    def decode_fixed(self, target: str, byte_order: str, fmt: str, ind: str) -> List[str]:
+        """Emit decoding of a single fixed-width scalar into target."""
+        name = self.struct_name(byte_order + fmt)
+        size = struct.calcsize(byte_order + fmt)
+        return [f'{ind}{target}, = {name}.unpack_from(buf, pos); pos += {size}']
+
+    def decode_control_value(self, target: str, field: Dict[str, Any], ind: str) -> List[str]:
+        """Emit decoding of a oneOf control value."""
+        control_type = field.get('x-control-value-type', DEFAULT_CONTROL_VALUE_TYPE)
+        if control_type.startswith('var'):
+            return self.decode_varint(target, control_type[3:], ind)
+        return self.decode_fixed(target, '<', FIXED_FORMATS[control_type], ind)
+
+    def decode_field(self, field: Dict[str, Any], target: str, ind: str) -> List[str]:
+        """Emit code that decodes one field schema into target."""
+        kind, info = self.classify(field)
+        if kind == 'fixed':
+            return self.decode_fixed(target, info[0], info[1], ind)
+        if kind == 'varint':
+            return self.decode_varint(target, info, ind)
+        if kind == 'string':
+            end = self.temp('e')
+            lines = self.decode_varint(end, 'uint32', ind)
+            lines.append(f'{ind}{end} += pos')
+            lines.append(f'{ind}if {end} > len(buf):')
+            lines.append(f'{ind}    raise CodecError("string runs past end of buffer")')
+            lines.append(f"{ind}{target} = str(buf[pos:{end}], 'utf-8', 'surrogateescape'); pos = {end}")
+            return lines
+        if kind == 'empty':
+            return [f'{ind}{target} = None']
+        if kind == 'ref':
+            return [f'{ind}{target}, pos = _decode_{self.ref_function(info)}(buf, pos)']
+        if kind == 'object':
+            return [f'{ind}{target}, pos = _decode_{self.inline_function(info)}(buf, pos)']
+        if kind == 'array':
+            return self.decode_array(info, target, ind)
+        if kind == 'map':
+            return self.decode_map(info, target, ind)
+        return self.decode_oneof(info, target, ind)
+
+    def decode_count(self, field: Dict[str, Any], target: str, ind: str) -> List[str]:
+        """Emit decoding of an array/map element count."""
+        if is_uncompressed_count(field):
+            return self.decode_fixed(target, '<', 'I', ind)
+        return self.decode_varint(target, 'uint32', ind)
+
+    def decode_array(self, field: Dict[str, Any], target: str, ind: str) -> List[str]:
+        """Emit decoding of an array."""
+        batch = self.batch_codec(field)
+        if batch:
+            return [f'{ind}{target}, pos = {batch}.decode_from(buf, pos)']
+        count = self.temp('n')
+        lines = self.decode_count(field, count, ind)
+        items = field.get('items', {})
+        kind, info = self.classify(items)
+        if kind == 'fixed':
+            # Homogeneous fixed-width items decode with one unpack call
+            byte_order, fmt = info
+            size = struct.calcsize(byte_order + fmt)
+            lines.append(f"{ind}{target} = list(_unpack_from('{byte_order}%d{fmt}' % {count}, buf, pos)); pos += {size} * {count}")
+            return lines
+        item = self.temp()
+        lines.append(f'{ind}{target} = []')
+        lines.append(f'{ind}for _ in range({count}):')
+        lines.extend(self.decode_field(items, item, ind + '    '))
+        lines.append(f'{ind}    {target}.append({item})')
+        return lines
+
+    def decode_map(self, field: Dict[str, Any], target: str, ind: str) -> List[str]:
+        """Emit decoding of an additionalProperties map as a list of (key, value) pairs."""
+        count = self.temp('n')
+        key = self.temp('k')
+        value = self.temp()
+        key_schema, value_schema = self.map_schemas(field)
+        lines = self.decode_varint(count, 'uint32', ind)
+        lines.append(f'{ind}{target} = []')
+        lines.append(f'{ind}for _ in range({count}):')
+        lines.extend(self.decode_field(key_schema, key, ind + '    '))
+        lines.extend(self.decode_field(value_schema, value, ind + '    '))
+        lines.append(f'{ind}    {target}.append(({key}, {value}))')
+        return lines
+
+    def decode_oneof(self, field: Dict[str, Any], target: str, ind: str) -> List[str]:
+        """Emit decoding of a oneOf union as a (control_value, value) tuple."""
+        control = self.temp('c')
+        value = self.temp()
+        lines = self.decode_control_value(control, field, ind)
+        keyword = 'if'
+        for idx, variant in enumerate(field['oneOf']):
+            lines.append(f"{ind}{keyword} {control} == {variant.get('x-ordinal-index', idx)}:")
+            lines.extend(self.decode_field(variant, value, ind + '    '))
+            keyword = 'elif'
+        lines.append(f'{ind}else:')
+        lines.append(f'{ind}    raise CodecError("unknown oneOf control value %d" % {control})')
+        lines.append(f'{ind}{target} = ({control}, {value})')
+        return lines
+
+    @staticmethod
+    def map_schemas(field: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return the (key, value) schemas of an additionalProperties map."""
+        return map_schemas(field)
+
+    def fixed_runs(self, properties: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, List[Tuple[str, Dict[str, Any]]]]]:
+        """Group properties into runs of same-byte-order fixed-width fields and single fields."""
+        runs = []
+        for field_name, field_data in properties:
+            kind, info = self.classify(field_data)
+            if kind == 'fixed':
+                if runs and runs[-1][0] == info[0]:
+                    runs[-1][1].append((field_name, field_data))
+                else:
+                    runs.append((info[0], [(field_name, field_data)]))
+            else:
+                runs.append(('', [(field_name, field_data)]))
+        return runs
+
+    def decode_function(self, suffix: str, schema: Dict[str, Any], as_object: bool = False) -> str:
+        """Generate the decode function for one definition."""
+        lines = [f'def _decode_{suffix}(buf, pos):']
+        if not as_object and self.classify(schema)[0] != 'object':
+            value = self.temp()
+            lines.extend(self.decode_field(schema, value, '    '))
+            lines.append(f'    return {value}, pos')
+            return '\n'.join(lines)
+
+        entries = []
+        for byte_order, fields in self.fixed_runs(self.sorted_properties(schema)):
+            if byte_order:
+                names = [self.temp() for _ in fields]
+                fmt = byte_order + ''.join(self.classify(f)[1][1] for _, f in fields)
+                lines.append(f"    {', '.join(names)}, = {self.struct_name(fmt)}.unpack_from(buf, pos); pos += {struct.calcsize(fmt)}")
+                entries.extend((field_name, name) for (field_name, _), name in zip(fields, names))
+            else:
+                field_name, field_data = fields[0]
+                name = self.temp()
+                lines.extend(self.decode_field(field_data, name, '    '))
+                entries.append((field_name, name))
+        items = ', '.join(f'{field_name!r}: {name}' for field_name, name in entries)
+        lines.append(f'    return {{{items}}}, pos')
+        return '\n'.join(lines)
+
+    # -- encoding ---------------------------------------------------------
+
+    def encode_varint(self, source: str, base_type: str, ind: str) -> List[str]:
+        """Emit inline var-int encoding of source."""
+        value = self.temp('u')
+        if base_type in SIGNED_TYPES:
+            lines = [f'{ind}{value} = ({source} << 1) ^ ({source} >> 63)']
+        else:
+            lines = [f'{ind}{value} = int({source})']
+        lines.extend([
+            f'{ind}while {value} > 0x7f:',
+            f'{ind}    out.append(({value} & 0x7f) | 0x80); {value} >>= 7',
+            f'{ind}out.append({value})',
+        ])
+        return lines
+
+    def encode_control_value(self, source: str, field: Dict[str, Any], ind: str) -> List[str]:
+        """Emit encoding of a oneOf control value."""
+        control_type = field.get('x-control-value-type', DEFAULT_CONTROL_VALUE_TYPE)
+        if control_type.startswith('var'):
+            return self.encode_varint(source, control_type[3:], ind)
+        return [f'{ind}out += {self.struct_name("<" + FIXED_FORMATS[control_type])}.pack({source})']
+
+    def encode_field(self, field: Dict[str, Any], source: str, ind: str) -> List[str]:
+        """Emit code that encodes source according to one field schema."""
+        kind, info = self.classify(field)
+        if kind == 'fixed':
+            return [f'{ind}out += {self.struct_name(info[0] + info[1])}.pack({source})']
+        if kind == 'varint':
+            return self.encode_varint(source, info, ind)
+        if kind == 'string':
+            data = self.temp('d')
+            lines = [f"{ind}{data} = {source}.encode('utf-8', 'surrogateescape')"]
+            lines.extend(self.encode_varint(f'len({data})', 'uint32', ind))
+            lines.append(f'{ind}out += {data}')
+            return lines
+        if kind == 'empty':
+            return []
+        if kind == 'ref':
+            return [f'{ind}_encode_{self.ref_function(info)}({source}, out)']
+        if kind == 'object':
+            return [f'{ind}_encode_{self.inline_function(info)}({source}, out)']
+        if kind == 'array':
+            return self.encode_array(info, source, ind)
+        if kind == 'map':
+            return self.encode_map(info, source, ind)
+        return self.encode_oneof(info, source, ind)
+
+    def encode_array(self, field: Dict[str, Any], source: str, ind: str) -> List[str]:
+        """Emit encoding of an array."""
+        batch = self.batch_codec(field)
+        if batch:
+            return [f'{ind}{batch}.encode_into({source}, out)']
+        if is_uncompressed_count(field):
+            lines = [f'{ind}out += {self.struct_name("<I")}.pack(len({source}))']
+        else:
+            lines = self.encode_varint(f'len({source})', 'uint32', ind)
+        items = field.get('items', {})
+        kind, info = self.classify(items)
+        if kind == 'fixed':
+            byte_order, fmt = info
+            lines.append(f"{ind}out += _pack('{byte_order}%d{fmt}' % len({source}), *{source})")
+            return lines
+        item = self.temp()
+        lines.append(f'{ind}for {item} in {source}:')
+        lines.extend(self.encode_field(items, item, ind + '    ') or [f'{ind}    pass'])
+        return lines
+
+    def encode_map(self, field: Dict[str, Any], source: str, ind: str) -> List[str]:
+        """Emit encoding of a map given as (key, value) pairs."""
+        key = self.temp('k')
+        value = self.temp()
+        key_schema, value_schema = self.map_schemas(field)
+        lines = self.encode_varint(f'len({source})', 'uint32', ind)
+        lines.append(f'{ind}for {key}, {value} in {source}:')
+        body = self.encode_field(key_schema, key, ind + '    ') + self.encode_field(value_schema, value, ind + '    ')
+        lines.extend(body or [f'{ind}    pass'])
+        return lines
+
+    def encode_oneof(self, field: Dict[str, Any], source: str, ind: str) -> List[str]:
+        """Emit encoding of a (control_value, value) oneOf tuple."""
+        control = self.temp('c')
+        value = self.temp()
+        lines = [f'{ind}{control}, {value} = {source}']
+        lines.extend(self.encode_control_value(control, field, ind))
+        keyword = 'if'
+        for idx, variant in enumerate(field['oneOf']):
+            lines.append(f"{ind}{keyword} {control} == {variant.get('x-ordinal-index', idx)}:")
+            lines.extend(self.encode_field(variant, value, ind + '    ') or [f'{ind}    pass'])
+            keyword = 'elif'
+        lines.append(f'{ind}else:')
+        lines.append(f'{ind}    raise CodecError("unknown oneOf control value %d" % {control})')
+        return lines
+
+    def encode_function(self, suffix: str, schema: Dict[str, Any], as_object: bool = False) -> str:
+        """Generate the encode function for one definition."""
+        lines = [f'def _encode_{suffix}(value, out):']
+        if not as_object and self.classify(schema)[0] != 'object':
+            lines.extend(self.encode_field(schema, 'value', '    ') or ['    pass'])
+            return '\n'.join(lines)
+
+        for byte_order, fields in self.fixed_runs(self.sorted_properties(schema)):
+            if byte_order:
+                fmt = byte_order + ''.join(self.classify(f)[1][1] for _, f in fields)
+                args = ', '.join(f'value[{field_name!r}]' for field_name, _ in fields)
+                lines.append(f'    out += {self.struct_name(fmt)}.pack({args})')
+            else:
+                field_name, field_data = fields[0]
+                name = self.temp()
+                lines.append(f'    {name} = value[{field_name!r}]')
+                lines.extend(self.encode_field(field_data, name, '    '))
+        if len(lines) == 1:
+            lines.append('    pass')
+        return '\n'.join(lines)
+
+    # -- module -----------------------------------------------------------
+
+    def compile(self) -> str:
+        """Generate the source for the packet's decode/encode functions."""
+        root = f'{self.prefix}_root'
+        self.functions.append(self.decode_function(root, self.schema, as_object=True))
+        self.functions.append(self.encode_function(root, self.schema, as_object=True))
+        while self.pending:
+            suffix, schema = self.pending.pop(0)
+            self.functions.append(self.decode_function(suffix, schema))
+            self.functions.append(self.encode_function(suffix, schema))
+
+        structs = [f'{name} = Struct({fmt!r})' for fmt, name in self.structs.items()]
+        return '\n'.join(structs) + '\n\n\n' + '\n\n\n'.join(self.functions) + '\n'
+
+
+class PacketCodec:
+    """Compiled encoder/decoder pair for a single packet schema."""
+
+    def __init__(self, name: str, packet_id: Optional[int], source: str,
+                 batch_codecs: Optional[Dict[str, Any]] = None):
+        """Compile the generated source and bind its entry points."""
+        self.name = name
+        self.packet_id = packet_id
+        self.source = source
+        prefix = re.sub(r'\W', '_', name)
+        namespace: Dict[str, Any] = {'CodecError': CodecError}
+        namespace.update(batch_codecs or {})
+        exec(compile(GENERATED_PRELUDE + source, f'<codec {name}>', 'exec'), namespace)
+        self._decode = namespace[f'_decode_{prefix}_root']
+        self._encode = namespace[f'_encode_{prefix}_root']
+
+    def decode_from(self, buf: memoryview, pos: int = 0) -> Tuple[Dict[str, Any], int]:
+        """Decode one packet body starting at pos; returns (value, new_pos)."""
+        try:
+            return self._decode(buf, pos)
+        except (IndexError, struct.error) as e:
+            raise CodecError(f"Truncated {self.name} payload at offset {pos}") from e
+
+    def decode(self, data) -> Dict[str, Any]:
+        """Decode a complete packet body, rejecting trailing bytes."""
+        buf = data if isinstance(data, memoryview) else memoryview(data)
+        value, pos = self.decode_from(buf, 0)
+        if pos != len(buf):
+            raise CodecError(f"{len(buf) - pos} trailing bytes after {self.name} payload")
+        return value
+
+    def encode_into(self, value: Dict[str, Any], out: bytearray):
+        """Append the encoded packet body to out."""
+        try:
+            self._encode(value, out)
+        except (KeyError, TypeError, struct.error) as e:
+            raise CodecError(f"Cannot encode {self.name}: {e!r}") from e
+
+    def encode(self, value: Dict[str, Any]) -> bytes:
+        """Encode a packet body to bytes."""
+        out = bytearray()
+        self.encode_into(value, out)
+        return bytes(out)
+
+
+def compile_schema(schema: Dict[str, Any], name: Optional[str] = None,
+                   batch_arrays: bool = False) -> PacketCodec:
+    """
+    Compile a loaded packet schema into a PacketCodec.
+    
+    With batch_arrays, homogeneous var-int arrays decode to NumPy arrays
+    (requires NumPy; ignored without it).
+    """
+    name = name or schema.get('title', 'Packet')
+    packet_id = schema.get('$metaProperties', {}).get('[cereal:packet]')
+    compiler = CodecCompiler(schema, name, batch_arrays)
+    source = compiler.compile()
+    return PacketCodec(name, packet_id, source, compiler.batch_codecs)
+
+
+def compile_packet_file(filepath: Path) -> Optional[PacketCodec]:
+    """Compile a single JSON schema file; returns None for non-packet files."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or '$metaProperties' not in data:
+        return None
+    return compile_schema(data, data.get('title', filepath.stem))
+
+
+def load_codecs(source_dir: Path) -> Dict[str, PacketCodec]:
+    """Compile every packet schema in source_dir, keyed by packet name."""
+    codecs = {}
+    for json_file in sorted(source_dir.glob("*.json")):
+        if json_file.name.startswith("enum_"):
+            continue
+        try:
+            codec = compile_packet_file(json_file)
+        except CodecError as e:
+            print(f"Warning: Could not compile {json_file}: {e}")
+            continue
+        if codec:
+            codecs[codec.name] = codec
+    return codecs
+
+
+def main():
+    """Main entry point for the script."""
+    input_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent
+    output_path = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(__file__).parent / "packet_codecs.py"
+
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    codecs = load_codecs(input_path)
+    if not codecs:
+        print(f"Warning: No packet schemas found in {input_path}")
+        sys.exit(1)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('"""Packet codecs generated by packet_codec.py. Do not edit."""\n\n')
+        f.write(GENERATED_PRELUDE)
+        f.write('from packet_codec import CodecError\n\n\n')
+        for codec in codecs.values():
+            f.write(f'# {codec.name} ({codec.packet_id})\n')
+            f.write(codec.source)
+            f.write('\n\n')
+
+    print(f"✓ Compiled {len(codecs)} packet codecs")
+    print(f"✓ Output file: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
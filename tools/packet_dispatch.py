@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Build a dense packet-id dispatch table from the [cereal:packet] ids.
+
+Every packet schema carries its id in $metaProperties["[cereal:packet]"]. This
+script collects them into a table indexed directly by packet id, so a network
+layer can dispatch a frame with one list lookup. Each slot holds the packet
+name, its direction and its schema file; ids no packet uses are None.
+
+The table is validated before anything is written:
+- Two packets sharing an id, or two schemas sharing a packet name, are errors
+- Missing, non-integer or negative ids are errors
+- Schemas of different x-protocol-version are errors
+- Unused ids (gaps) are reported, and are errors with --strict
+
+Directions are taken from the packet name (Clientbound*, Serverbound*,
+ServerToClient*, ClientToServer*) and can be set for any other packet with a
+JSON file mapping packet names to "clientbound", "serverbound" or "both";
+all remaining packets are left unspecified (None).
+
+Three forms of the table are written next to each other:
+- <output>.py: Python module with the PACKETS tuple and a dispatch() helper
+- <output>.json: the same table as compact JSON
+- <output>.bin: binary form, all integers little endian:
+      header  '<4sHIHI'  magic b'PKDT', format version, protocol version,
+                         table size (highest id + 1), name table size
+      entries '<IHB'     name offset, name length (0 for unused ids) and
+                         direction code (see DIRECTION_CODES), one per id
+      names              utf-8 packet names; the schema file is '<name>.json'
+
+Usage:
+    python packet_dispatch.py [input_path] [output_path] [--directions FILE] [--strict]
+
+    input_path: Optional path to directory containing JSON files (default: script directory)
+    output_path: Optional output path without extension (default: ./packet_dispatch_table in script directory)
+    --directions FILE: JSON object mapping packet names to their direction
+    --strict: Treat unused ids as errors
+"""
+
+import argparse
+import json
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+BINARY_MAGIC = b'PKDT'
+BINARY_FORMAT_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sHIHI')
+BINARY_ENTRY = struct.Struct('<IHB')
+
+# Direction codes of the binary form; 0 marks an unused id
+DIRECTION_CODES = {
+    None: 1,
+    'clientbound': 2,
+    'serverbound': 3,
+    'both': 4,
+}
+
+# Packet name prefixes that state the direction
+DIRECTION_PREFIXES = (
+    ('Clientbound', 'clientbound'),
+    ('ServerToClient', 'clientbound'),
+    ('Serverbound', 'serverbound'),
+    ('ClientToServer', 'serverbound'),
+)
+
+
+class DispatchTableError(ValueError):
+    """Raised when the packet ids cannot form a valid dispatch table."""
+
+
+class PacketEntry(NamedTuple):
+    """One slot of the dispatch table."""
+    packet_id: int
+    name: str
+    direction: Optional[str]
+    schema: str
+
+
+def packet_direction(name: str, overrides: Dict[str, str]) -> Optional[str]:
+    """Return the direction of a packet from the overrides or its name, or None."""
+    if name in overrides:
+        return overrides[name]
+    for prefix, direction in DIRECTION_PREFIXES:
+        if name.startswith(prefix):
+            return direction
+    return None
+
+
+def load_packet_entries(source_dir: Path, overrides: Optional[Dict[str, str]] = None
+                        ) -> Tuple[List[PacketEntry], Optional[int]]:
+    """
+    Read the packet id of every packet schema in source_dir.
+
+    Args:
+        source_dir: Directory containing the schema files
+        overrides: Optional mapping of packet names to directions
+
+    Returns:
+        Tuple of (entries sorted by packet id, protocol version or None)
+
+    Raises:
+        DispatchTableError: On invalid or colliding ids, duplicate names or
+            mixed protocol versions
+    """
+    overrides = overrides or {}
+    for name, direction in overrides.items():
+        if direction not in DIRECTION_CODES or direction is None:
+            raise DispatchTableError(f"Invalid direction '{direction}' for {name}")
+
+    errors = []
+    entries: Dict[int, PacketEntry] = {}
+    names: Dict[str, str] = {}
+    protocol_versions = set()
+    for json_file in sorted(source_dir.glob("*.json")):
+        if json_file.name.startswith("enum_"):
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or '$metaProperties' not in data:
+            continue
+
+        name = data.get('title', json_file.stem)
+        packet_id = data['$metaProperties'].get('[cereal:packet]')
+        if 'x-protocol-version' in data:
+            protocol_versions.add(data['x-protocol-version'])
+
+        if not isinstance(packet_id, int) or isinstance(packet_id, bool) or packet_id < 0:
+            errors.append(f"{json_file.name}: invalid packet id {packet_id!r}")
+            continue
+        if name in names:
+            errors.append(f"{json_file.name}: packet name {name} is also used by {names[name]}")
+            continue
+        if packet_id in entries:
+            errors.append(f"{json_file.name}: packet id {packet_id} collides with {entries[packet_id].name}")
+            continue
+
+        names[name] = json_file.name
+        entries[packet_id] = PacketEntry(packet_id, name, packet_direction(name, overrides), json_file.name)
+
+    unknown = sorted(set(overrides) - set(names))
+    if unknown:
+        errors.append(f"Directions given for unknown packets: {', '.join(unknown)}")
+    if len(protocol_versions) > 1:
+        errors.append(f"Mixed protocol versions: {sorted(protocol_versions)}")
+    if errors:
+        raise DispatchTableError('\n'.join(errors))
+
+    protocol_version = protocol_versions.pop() if protocol_versions else None
+    return sorted(entries.values()), protocol_version
+
+
+def build_table(entries: List[PacketEntry]) -> List[Optional[PacketEntry]]:
+    """Return the dense table: slot i holds the entry of packet id i, or None."""
+    if not entries:
+        return []
+    table: List[Optional[PacketEntry]] = [None] * (entries[-1].packet_id + 1)
+    for entry in entries:
+        table[entry.packet_id] = entry
+    return table
+
+
+def find_gaps(table: List[Optional[PacketEntry]]) -> List[Tuple[int, int]]:
+    """Return the (first, last) id of every run of unused ids."""
+    gaps = []
+    start = None
+    for packet_id, entry in enumerate(table):
+        if entry is None and start is None:
+            start = packet_id
+        elif entry is not None and start is not None:
+            gaps.append((start, packet_id - 1))
+            start = None
+    if start is not None:
+        gaps.append((start, len(table) - 1))
+    return gaps
+
+
+def format_gaps(gaps: List[Tuple[int, int]]) -> str:
+    """Return gaps as a compact list of ids and id ranges."""
+    return ', '.join(str(first) if first == last else f'{first}-{last}' for first, last in gaps)
+
+
+def render_module(table: List[Optional[PacketEntry]], protocol_version: Optional[int]) -> str:
+    """Return the source of the Python dispatch module."""
+    lines = [
+        '"""Packet dispatch table generated by packet_dispatch.py. Do not edit."""',
+        '',
+        f'PROTOCOL_VERSION = {protocol_version!r}',
+        '',
+        '# (packet name, direction, schema file) indexed by packet id; None marks unused ids',
+        'PACKETS = (',
+    ]
+    for packet_id, entry in enumerate(table):
+        if entry is None:
+            lines.append(f'    None,  # {packet_id}')
+        else:
+            lines.append(f'    ({entry.name!r}, {entry.direction!r}, {entry.schema!r}),  # {packet_id}')
+    lines += [
+        ')',
+        '',
+        'PACKET_IDS = {entry[0]: packet_id for packet_id, entry in enumerate(PACKETS) if entry is not None}',
+        '',
+        '',
+        'def dispatch(packet_id):',
+        '    """Return the (packet name, direction, schema file) of a packet id, or None."""',
+        '    if 0 <= packet_id < len(PACKETS):',
+        '        return PACKETS[packet_id]',
+        '    return None',
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+def render_json(table: List[Optional[PacketEntry]], protocol_version: Optional[int]) -> str:
+    """Return the compact JSON form of the table."""
+    packets = [
+        None if entry is None else {'name': entry.name, 'direction': entry.direction, 'schema': entry.schema}
+        for entry in table
+    ]
+    return json.dumps({'protocol_version': protocol_version, 'packets': packets}, separators=(',', ':'))
+
+
+def render_binary(table: List[Optional[PacketEntry]], protocol_version: Optional[int]) -> bytes:
+    """Return the binary form of the table (see the module docstring for the layout)."""
+    names = bytearray()
+    body = bytearray()
+    for entry in table:
+        if entry is None:
+            body += BINARY_ENTRY.pack(0, 0, 0)
+            continue
+        name = entry.name.encode('utf-8')
+        body += BINARY_ENTRY.pack(len(names), len(name), DIRECTION_CODES[entry.direction])
+        names += name
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_FORMAT_VERSION, protocol_version or 0,
+                                len(table), len(names))
+    return header + bytes(body) + bytes(names)
+
+
+def read_binary(blob: bytes) -> Tuple[List[Optional[Tuple[str, Optional[str]]]], int]:
+    """
+    Parse the binary form of a table.
+
+    Returns:
+        Tuple of ([(packet name, direction) or None per id], protocol version)
+    """
+    magic, version, protocol_version, size, names_size = BINARY_HEADER.unpack_from(blob)
+    if magic != BINARY_MAGIC or version != BINARY_FORMAT_VERSION:
+        raise DispatchTableError("Not a version 1 packet dispatch table")
+    directions = {code: direction for direction, code in DIRECTION_CODES.items()}
+    names_start = BINARY_HEADER.size + size * BINARY_ENTRY.size
+    names = blob[names_start:names_start + names_size]
+
+    table = []
+    for offset, length, code in BINARY_ENTRY.iter_unpack(blob[BINARY_HEADER.size:names_start]):
+        if code == 0:
+            table.append(None)
+        else:
+            table.append((names[offset:offset + length].decode('utf-8'), directions[code]))
+    return table, protocol_version
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Build a dense packet-id dispatch table from JSON schema files.")
+    parser.add_argument('input_path', nargs='?', type=Path,
+                        help="Directory containing JSON files (default: script directory)")
+    parser.add_argument('output_path', nargs='?', type=Path,
+                        help="Output path without extension (default: ./packet_dispatch_table in script directory)")
+    parser.add_argument('--directions', type=Path, metavar='FILE',
+                        help="JSON object mapping packet names to clientbound, serverbound or both")
+    parser.add_argument('--strict', action='store_true',
+                        help="Treat unused packet ids as errors")
+    args = parser.parse_args()
+
+    input_path = args.input_path or Path(__file__).parent
+    output_path = args.output_path or Path(__file__).parent / "packet_dispatch_table"
+
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    overrides = {}
+    if args.directions:
+        with open(args.directions, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+
+    try:
+        entries, protocol_version = load_packet_entries(input_path, overrides)
+    except DispatchTableError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if not entries:
+        print(f"Warning: No packet schemas found in {input_path}")
+        sys.exit(1)
+
+    table = build_table(entries)
+    gaps = find_gaps(table)
+    if gaps:
+        unused = sum(last - first + 1 for first, last in gaps)
+        message = f"{unused} unused packet ids: {format_gaps(gaps)}"
+        if args.strict:
+            print(f"Error: {message}")
+            sys.exit(1)
+        print(f"Warning: {message}")
+
+    output_path.with_suffix('.py').write_text(render_module(table, protocol_version), encoding='utf-8')
+    output_path.with_suffix('.json').write_text(render_json(table, protocol_version), encoding='utf-8')
+    output_path.with_suffix('.bin').write_bytes(render_binary(table, protocol_version))
+
+    print(f"✓ Dispatch table of {len(entries)} packets over ids 0-{len(table) - 1}")
+    print(f"✓ Output files: {output_path}.py, .json, .bin")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Generate __slots__ record classes for packets and definitions.
+
+Every packet schema and every object definition (BlockPos,
+UpdateSubChunkNetworkBlockInfo, ActorRuntimeID, ...) becomes a plain class
+with one slot per field, in x-ordinal-index order. A record holds its values
+in fixed slots instead of a per-instance dict, which takes a fraction of the
+memory of the dicts PacketCodec.decode returns when millions of records are
+kept alive.
+
+Each class has:
+- a typed constructor taking the fields in wire order
+- to_tuple() and from_tuple(values): the field values as a flat tuple, and
+  the record back from one without going through keyword arguments or a dict
+- from_dict(value) and to_dict(): conversion from and to the decoded values of
+  packet_codec.py, nested records included
+- __eq__ and __repr__
+
+Attribute names are the schema field names in snake_case ("Runtime Id" becomes
+runtime_id); _field_names holds the original names. Definitions are shared by
+id across packets, so each gets one class. Definitions that are not objects
+(strings, enums, aliases of arrays) get no class; fields of those types hold
+the same values as in decoded packets. Inline object schemas get a class named
+after their owner and field.
+
+Usage:
+    python packet_records.py [input_path] [output_file]
+
+    input_path: Optional path to directory containing JSON files (default: script directory)
+    output_file: Optional path of the generated Python module (default: ./packet_record_classes.py in script directory)
+"""
+
+import json
+import keyword
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from schema_ir import CodecError, SchemaIR, map_schemas, sorted_properties
+
+
+GENERATED_PRELUDE = (
+    "from __future__ import annotations\n"
+    "\n"
+    "from typing import Any, Dict, List, Tuple\n"
+    "\n"
+    "_new = object.__new__\n"
+)
+
+# Attribute names taken by the generated methods
+RESERVED_NAMES = {'to_tuple', 'from_tuple', 'to_dict', 'from_dict', 'packet_id'}
+
+PYTHON_TYPES = {'boolean': 'bool', 'float': 'float', 'double': 'float'}
+
+
+def class_name(title: str) -> str:
+    """Turn a schema title into a class name ("mce::UUID" -> "Mce_UUID")."""
+    scopes = []
+    for scope in title.split('::'):
+        words = [word for word in re.split(r'\W+', scope) if word]
+        scopes.append(''.join(word[0].upper() + word[1:] for word in words))
+    name = '_'.join(scope for scope in scopes if scope) or 'Record'
+    return name if name[0].isalpha() else f'R{name}'
+
+
+def attribute_name(field_name: str) -> str:
+    """Turn a schema field name into a snake_case attribute name."""
+    name = re.sub(r'(?<=[a-z0-9])(?=[A-Z])', '_', field_name)
+    name = re.sub(r'\W+', '_', name).strip('_').lower() or 'value'
+    if name[0].isdigit():
+        name = f'f_{name}'
+    if keyword.iskeyword(name) or name in RESERVED_NAMES:
+        name += '_'
+    return name
+
+
+class RecordGenerator:
+    """Generates the record classes of a set of packet schemas."""
+
+    def __init__(self):
+        """Initialize an empty generator."""
+        # Generated class sources, in generation order
+        self.classes: List[str] = []
+        # Module-level helper functions (oneOf conversions)
+        self.helpers: List[str] = []
+        self.class_names: set = set()
+        # Class name of each object definition id
+        self.definition_classes: Dict[str, str] = {}
+        # Class name of each inline object schema, by id() of the schema
+        self.inline_classes: Dict[int, str] = {}
+        # Conversion functions of each oneOf union, by id() of the schema
+        self.oneof_functions: Dict[int, Optional[Tuple[str, str]]] = {}
+        self.pending: List[Tuple[str, Dict[str, Any], Dict[str, Any], str]] = []
+        # Schemas generated from, kept alive since the caches above are keyed by id()
+        self.schemas: List[Dict[str, Any]] = []
+        # IR of each schema file, by id() of its definitions
+        self.irs: Dict[int, SchemaIR] = {}
+        self.packet_count = 0
+        self.counter = 0
+
+    def temp(self, prefix: str = 'x') -> str:
+        """Return a fresh local variable name."""
+        self.counter += 1
+        return f'_{prefix}{self.counter}'
+
+    def classify(self, field: Dict[str, Any], definitions: Dict[str, Any]) -> Tuple[str, Any]:
+        """Classify a field through the IR of its schema file."""
+        ir = self.irs.get(id(definitions))
+        if ir is None:
+            ir = self.irs[id(definitions)] = SchemaIR(definitions)
+        return ir.classify(field)
+
+    def unique_class_name(self, title: str, suffix: str = '') -> str:
+        """Return an unused class name for a title."""
+        name = class_name(title)
+        if name in self.class_names:
+            name = f'{name}_{suffix}' if suffix else name
+            while name in self.class_names:
+                name += '_'
+        self.class_names.add(name)
+        return name
+
+    def definition_class(self, ref_id: str, definitions: Dict[str, Any]) -> Optional[str]:
+        """Return the class of an object definition, queueing it; None for other definitions."""
+        if ref_id not in definitions:
+            raise CodecError(f"Unresolved reference #/definitions/{ref_id}")
+        if ref_id not in self.definition_classes:
+            definition = definitions[ref_id]
+            if self.classify(definition, definitions)[0] != 'object':
+                return None
+            title = definition.get('title', ref_id)
+            name = self.unique_class_name(title, ref_id)
+            self.definition_classes[ref_id] = name
+            self.pending.append((name, definition, definitions, f'{title} (definition {ref_id}).'))
+        return self.definition_classes[ref_id]
+
+    def inline_class(self, owner: str, field_name: str, schema: Dict[str, Any],
+                     definitions: Dict[str, Any]) -> str:
+        """Return the class of an inline object schema, queueing it."""
+        if id(schema) not in self.inline_classes:
+            name = self.unique_class_name(f'{owner} {field_name}')
+            self.inline_classes[id(schema)] = name
+            self.pending.append((name, schema, definitions, f'{field_name} of {owner}.'))
+        return self.inline_classes[id(schema)]
+
+    def resolve(self, field: Dict[str, Any], definitions: Dict[str, Any], owner: str,
+                field_name: str) -> Tuple[str, Any]:
+        """Classify a field, following $refs to definitions that get no class."""
+        for _ in range(len(definitions) + 1):
+            kind, info = self.classify(field, definitions)
+            if kind == 'ref':
+                ref_id = info.split('/')[-1]
+                record = self.definition_class(ref_id, definitions)
+                if record is not None:
+                    return 'record', record
+                field = definitions[ref_id]
+                continue
+            if kind == 'object':
+                return 'record', self.inline_class(owner, field_name, info, definitions)
+            return kind, info
+        raise CodecError(f"Reference cycle at {owner}.{field_name}")
+
+    def annotation(self, field: Dict[str, Any], definitions: Dict[str, Any], owner: str,
+                   field_name: str) -> str:
+        """Return the type annotation of a field."""
+        kind, info = self.resolve(field, definitions, owner, field_name)
+        if kind == 'record':
+            return info
+        if kind == 'varint':
+            return PYTHON_TYPES.get(info, 'int')
+        if kind == 'fixed':
+            return {'?': 'bool', 'f': 'float', 'd': 'float'}.get(info[1], 'int')
+        if kind == 'string':
+            return 'str'
+        if kind == 'empty':
+            return 'None'
+        if kind == 'array':
+            return f"List[{self.annotation(info.get('items', {}), definitions, owner, field_name)}]"
+        if kind == 'map':
+            key_schema, value_schema = map_schemas(info)
+            key = self.annotation(key_schema, definitions, owner, field_name)
+            value = self.annotation(value_schema, definitions, owner, field_name)
+            return f'List[Tuple[{key}, {value}]]'
+        return 'Tuple[int, Any]'
+
+    def converters(self, field: Dict[str, Any], definitions: Dict[str, Any], owner: str,
+                   field_name: str, source: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return the expressions converting a field value between its decoded and record form.
+
+        Returns:
+            Tuple of (decoded -> record, record -> decoded) expressions over source,
+            or (None, None) when the value is the same in both forms
+        """
+        kind, info = self.resolve(field, definitions, owner, field_name)
+        if kind == 'record':
+            return f'{info}.from_dict({source})', f'{source}.to_dict()'
+        if kind == 'array':
+            item = self.temp()
+            from_item, to_item = self.converters(info.get('items', {}), definitions, owner, field_name, item)
+            if from_item is None:
+                return None, None
+            return (f'[{from_item} for {item} in {source}]',
+                    f'[{to_item} for {item} in {source}]')
+        if kind == 'map':
+            key, value = self.temp('k'), self.temp()
+            key_schema, value_schema = map_schemas(info)
+            from_key, to_key = self.converters(key_schema, definitions, owner, field_name, key)
+            from_value, to_value = self.converters(value_schema, definitions, owner, field_name, value)
+            if from_key is None and from_value is None:
+                return None, None
+            return (f'[({from_key or key}, {from_value or value}) for {key}, {value} in {source}]',
+                    f'[({to_key or key}, {to_value or value}) for {key}, {value} in {source}]')
+        if kind == 'oneof':
+            helpers = self.oneof_helpers(info, definitions, owner, field_name)
+            if helpers is None:
+                return None, None
+            return f'{helpers[0]}({source})', f'{helpers[1]}({source})'
+        return None, None
+
+    def oneof_helpers(self, field: Dict[str, Any], definitions: Dict[str, Any], owner: str,
+                      field_name: str) -> Optional[Tuple[str, str]]:
+        """Generate the conversion functions of a oneOf union; None if no variant needs one."""
+        if id(field) in self.oneof_functions:
+            return self.oneof_functions[id(field)]
+        cases = []
+        for idx, variant in enumerate(field['oneOf']):
+            converters = self.converters(variant, definitions, owner, field_name, 'value')
+            if converters[0] is not None:
+                cases.append((variant.get('x-ordinal-index', idx), converters))
+        if not cases:
+            self.oneof_functions[id(field)] = None
+            return None
+
+        suffix = f'_oneof{len(self.oneof_functions)}'
+        functions = []
+        for direction, name in enumerate((f'_from{suffix}', f'_to{suffix}')):
+            lines = [f'def {name}(pair):', '    control, value = pair']
+            for control_value, converters in cases:
+                lines.append(f'    if control == {control_value!r}:')
+                lines.append(f'        return control, {converters[direction]}')
+            lines.append('    return pair')
+            functions.append(name)
+            self.helpers.append('\n'.join(lines))
+        self.oneof_functions[id(field)] = functions[0], functions[1]
+        return self.oneof_functions[id(field)]
+
+    def record_class(self, name: str, schema: Dict[str, Any], definitions: Dict[str, Any],
+                     doc: str, packet_id: Optional[int] = None) -> str:
+        """Generate the source of one record class."""
+        fields = []
+        attributes = set()
+        for field_name, field_data in sorted_properties(schema):
+            attribute = attribute_name(field_name)
+            while attribute in attributes:
+                attribute += '_'
+            attributes.add(attribute)
+            annotation = self.annotation(field_data, definitions, name, field_name)
+            value = f'value[{field_name!r}]'
+            from_dict, _ = self.converters(field_data, definitions, name, field_name, value)
+            _, to_dict = self.converters(field_data, definitions, name, field_name, f'self.{attribute}')
+            fields.append((field_name, attribute, annotation,
+                           from_dict or value, to_dict or f'self.{attribute}'))
+
+        slots = ''.join(f'{attribute!r}, ' for _, attribute, _, _, _ in fields)
+        names = ''.join(f'{field_name!r}, ' for field_name, _, _, _, _ in fields)
+        targets = ', '.join(f'self.{attribute}' for _, attribute, _, _, _ in fields)
+        if len(fields) == 1:
+            targets += ','
+        lines = [
+            f'class {name}:',
+            f'    """{doc}"""',
+            '',
+            f'    __slots__ = ({slots.rstrip(", ") + ("," if len(fields) == 1 else "")})',
+            f'    _field_names = ({names.rstrip(", ") + ("," if len(fields) == 1 else "")})',
+        ]
+        if packet_id is not None:
+            lines.append(f'    packet_id = {packet_id}')
+
+        params = ''.join(f', {attribute}: {annotation}' for _, attribute, annotation, _, _ in fields)
+        lines += ['', f'    def __init__(self{params}):']
+        lines += [f'        self.{attribute} = {attribute}' for _, attribute, _, _, _ in fields] or ['        pass']
+
+        lines += ['', '    def to_tuple(self) -> tuple:', f'        return ({targets})']
+        lines += ['', '    @classmethod', f'    def from_tuple(cls, values: tuple) -> {name}:',
+                  '        self = _new(cls)']
+        if fields:
+            lines.append(f'        {targets} = values')
+        lines.append('        return self')
+
+        lines += ['', '    @classmethod', f'    def from_dict(cls, value: Dict[str, Any]) -> {name}:',
+                  '        self = _new(cls)']
+        lines += [f'        self.{attribute} = {from_dict}' for _, attribute, _, from_dict, _ in fields]
+        lines.append('        return self')
+
+        entries = ', '.join(f'{field_name!r}: {to_dict}' for field_name, _, _, _, to_dict in fields)
+        lines += ['', '    def to_dict(self) -> Dict[str, Any]:', f'        return {{{entries}}}']
+
+        values = ', '.join(f'{attribute}={{self.{attribute}!r}}' for _, attribute, _, _, _ in fields)
+        lines += [
+            '',
+            '    def __eq__(self, other):',
+            '        return type(other) is type(self) and self.to_tuple() == other.to_tuple()',
+            '',
+            '    def __repr__(self):',
+            f"        return f'{name}({values})'",
+        ]
+        return '\n'.join(lines)
+
+    def add_packet(self, schema: Dict[str, Any], name: Optional[str] = None) -> str:
+        """Generate the class of a packet schema and of the definitions it uses; returns its name."""
+        title = name or schema.get('title', 'Packet')
+        definitions = schema.get('definitions', {})
+        packet_id = schema.get('$metaProperties', {}).get('[cereal:packet]')
+        self.schemas.append(schema)
+        # Snapshot of the state, so a schema that fails leaves no partial output
+        class_names, known = set(self.class_names), dict(self.definition_classes)
+        inline_classes, oneof_functions = dict(self.inline_classes), dict(self.oneof_functions)
+        class_count, helper_count = len(self.classes), len(self.helpers)
+        try:
+            record = self.unique_class_name(title, str(packet_id))
+            doc = f'{title} (packet {packet_id}).' if packet_id is not None else f'{title}.'
+            self.classes.append(self.record_class(record, schema, definitions, doc, packet_id))
+            while self.pending:
+                self.classes.append(self.record_class(*self.pending.pop(0)))
+        except CodecError:
+            self.class_names, self.definition_classes = class_names, known
+            self.inline_classes, self.oneof_functions = inline_classes, oneof_functions
+            del self.classes[class_count:], self.helpers[helper_count:]
+            self.pending = []
+            raise
+        self.packet_count += 1
+        return record
+
+    def generate(self) -> str:
+        """Return the source of the generated module."""
+        return '\n\n\n'.join([GENERATED_PRELUDE.rstrip('\n')] + self.helpers + self.classes) + '\n'
+
+
+def generate_records(source_dir: Path) -> RecordGenerator:
+    """Generate the record classes of every packet schema in source_dir."""
+    generator = RecordGenerator()
+    for json_file in sorted(source_dir.glob("*.json")):
+        if json_file.name.startswith("enum_"):
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or '$metaProperties' not in data:
+            continue
+        try:
+            generator.add_packet(data, data.get('title', json_file.stem))
+        except CodecError as e:
+            print(f"Warning: Could not generate {json_file}: {e}")
+    return generator
+
+
+def load_records(source_dir: Path) -> Dict[str, type]:
+    """Generate and execute the record classes of source_dir; returns them by class name."""
+    source = generate_records(source_dir).generate()
+    namespace: Dict[str, Any] = {'__name__': 'packet_record_classes'}
+    exec(compile(source, '<packet records>', 'exec'), namespace)
+    return {name: value for name, value in namespace.items()
+            if isinstance(value, type) and hasattr(value, 'from_tuple')}
+
+
+def main():
+    """Main entry point for the script."""
+    input_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent
+    output_path = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(__file__).parent / "packet_record_classes.py"
+
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    generator = generate_records(input_path)
+    if not generator.packet_count:
+        print(f"Warning: No packet schemas found in {input_path}")
+        sys.exit(1)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('"""Packet record classes generated by packet_records.py. Do not edit."""\n\n')
+        f.write(generator.generate())
+
+    print(f"✓ Generated {generator.packet_count} packet and "
+          f"{len(generator.definition_classes)} definition record classes")
+    print(f"✓ Output file: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
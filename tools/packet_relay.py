@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+TCP relay that decodes the game packets passing through it.
+
+The relay accepts client connections, opens a connection to the upstream
+server for each, and forwards both directions byte for byte as soon as they
+arrive; decoding never sits between a read and the matching write. A copy of
+every chunk is split into frames (same framing as capture_decoder.py: a
+varuint32 length, or a uint32 with --uint32-lengths, then the packet header
+and body) and the frames go through a bounded queue to decoder tasks. Those
+hand batches of frames to a thread pool, or a process pool with --processes,
+so the event loop only moves bytes. The pool also encodes the JSONL lines of
+--output, which the event loop only writes.
+
+A direction whose bytes cannot be split into frames (a length prefix above
+MAX_FRAME_SIZE) is still forwarded; only its decoding stops, with a warning,
+and it is counted as an unframed stream.
+
+Backpressure: when the decode queue is full the relay stops reading from
+that connection until there is room, which slows the sender down like a slow
+peer would. With --drop-when-full frames are dropped and counted instead, so
+the traffic is never delayed.
+
+Per packet type the relay counts frames, bytes, decode errors and dropped
+frames, plus the unframed streams, and prints the counters with their rates every --stats-interval
+seconds and on exit. Decoded records can be written as JSONL with --output.
+
+For tests on loopback, --stand-in starts a local echo server as upstream.
+
+Usage:
+    python packet_relay.py listen_port [upstream] [--input-path DIR] [--workers N] [--processes]
+                           [--queue-size N] [--drop-when-full] [--uint32-lengths]
+                           [--output FILE] [--stats-interval SECONDS] [--stand-in]
+
+    listen_port: Port to accept client connections on (127.0.0.1 unless --host is given)
+    upstream: Server address as host:port (not needed with --stand-in)
+    --input-path DIR: Directory containing the JSON files (default: script directory)
+    --workers N: Decoder threads or processes (default: 2)
+    --processes: Decode in a process pool instead of a thread pool
+    --queue-size N: Frames the decode queue holds before backpressure (default: 10000)
+    --drop-when-full: Drop frames instead of pausing reads when the queue is full
+    --uint32-lengths: Frames are prefixed with a little endian uint32 instead of a varuint32
+    --output FILE: Write decoded records to FILE as JSONL
+    --stats-interval SECONDS: Print the counters every SECONDS (default: 10, 0 disables)
+    --stand-in: Relay to a local echo server started on an ephemeral port
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import struct
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from capture_decoder import CaptureDecoder, read_varuint, UINT32_LENGTH
+from protocol_snapshot import ProtocolSnapshot, load_snapshot
+
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_STATS_INTERVAL = 10.0
+
+# Bytes read from a socket at a time
+READ_SIZE = 64 * 1024
+
+# Frames handed to the pool in one job
+DECODE_BATCH_SIZE = 256
+
+# Largest frame accepted; anything larger means the stream is not framed as expected
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+CLIENT_TO_SERVER = 'client'
+SERVER_TO_CLIENT = 'server'
+
+
+class FrameSplitter:
+    """Incrementally splits a byte stream into length-prefixed frames."""
+
+    def __init__(self, uint32_lengths: bool = False):
+        self.uint32_lengths = uint32_lengths
+        self.buffer = bytearray()
+        # Why the stream is not framed, once a length prefix exceeded MAX_FRAME_SIZE
+        self.error: Optional[str] = None
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Add received bytes and return the frames completed by them.
+
+        Once a length prefix exceeds MAX_FRAME_SIZE, error is set and the
+        frames before it are the last ones returned.
+        """
+        if self.error:
+            return []
+        self.buffer += data
+        frames = []
+        buf = self.buffer
+        pos = 0
+        while pos < len(buf):
+            try:
+                if self.uint32_lengths:
+                    length, = UINT32_LENGTH.unpack_from(buf, pos)
+                    start = pos + 4
+                else:
+                    length, start = read_varuint(buf, pos)
+            except (IndexError, struct.error):
+                break
+            if length > MAX_FRAME_SIZE:
+                self.error = f"Frame length {length} exceeds {MAX_FRAME_SIZE} bytes"
+                buf.clear()
+                return frames
+            if start + length > len(buf):
+                break
+            frames.append(bytes(buf[start:start + length]))
+            pos = start + length
+        if pos:
+            del buf[:pos]
+        return frames
+
+
+class PacketStats:
+    """Per packet type frame, byte, error and drop counters."""
+
+    def __init__(self):
+        self.frames: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.dropped = 0
+        self.unframed_streams = 0
+        self.started = time.perf_counter()
+        self._last_report = (self.started, {})
+
+    def add(self, name: str, size: int, error: bool):
+        """Count one decoded frame of the packet type name (see stats_name)."""
+        self.frames[name] += 1
+        self.bytes[name] += size
+        if error:
+            self.errors[name] += 1
+
+    def report(self) -> str:
+        """Return the counters, with frame rates since the previous report."""
+        now = time.perf_counter()
+        last_time, last_frames = self._last_report
+        elapsed = max(now - last_time, 1e-9)
+        lines = [f"{'Packet':<44} {'Frames':>10} {'Bytes':>12} {'Errors':>7} {'Frames/s':>10}"]
+        for name in sorted(self.frames, key=self.frames.get, reverse=True):
+            rate = (self.frames[name] - last_frames.get(name, 0)) / elapsed
+            lines.append(f"{name:<44} {self.frames[name]:>10} {self.bytes[name]:>12} "
+                         f"{self.errors[name]:>7} {rate:>10.1f}")
+        total = sum(self.frames.values())
+        lines.append(f"Total: {total} frames in {now - self.started:.1f} s, {self.dropped} dropped, "
+                     f"{self.unframed_streams} unframed streams")
+        self._last_report = (now, dict(self.frames))
+        return '\n'.join(lines)
+
+
+# Decoder owned by each worker process (--processes mode)
+_worker_decoder = None
+
+
+def _init_worker(snapshot_path: Path, uint32_lengths: bool):
+    """Open the snapshot used by _decode_batch in a worker process."""
+    global _worker_decoder
+    _worker_decoder = CaptureDecoder(ProtocolSnapshot(snapshot_path), uint32_lengths=uint32_lengths)
+
+
+def stats_name(record: Dict[str, Any]) -> str:
+    """Return the name a decoded record is counted under: its packet, or its id if unknown."""
+    return record.get('packet', f"id {record.get('id', '?')}")
+
+
+def _decode_batch(frames: List[Tuple[str, bytes]], encode: bool, decoder: Optional[CaptureDecoder] = None
+                  ) -> Tuple[List[Tuple[str, int, bool]], str]:
+    """
+    Decode a batch of (direction, frame) pairs.
+
+    Only what the event loop needs leaves the pool, not the decoded records.
+
+    Args:
+        frames: (direction, frame) pairs
+        encode: Whether to return the records as JSONL (--output)
+        decoder: Decoder to use (thread pool); worker processes use their own
+
+    Returns:
+        Tuple of ((stats name, frame size, decode error) of every frame,
+        JSONL text of the records, '' unless encode is set)
+    """
+    decoder = decoder or _worker_decoder
+    counts = []
+    lines = []
+    for direction, frame in frames:
+        record = decoder.decode_frame(memoryview(frame), 0, 0, len(frame))
+        record['direction'] = direction
+        counts.append((stats_name(record), len(frame), 'error' in record))
+        if encode:
+            lines.append(json.dumps(record, separators=(',', ':')) + '\n')
+    return counts, ''.join(lines)
+
+
+class PacketRelay:
+    """Relays client connections to an upstream server and decodes the frames."""
+
+    def __init__(self, snapshot: ProtocolSnapshot, upstream: Tuple[str, int],
+                 workers: int = DEFAULT_WORKERS,
+                 processes: bool = False,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 drop_when_full: bool = False,
+                 uint32_lengths: bool = False,
+                 output: Optional[TextIO] = None):
+        """
+        Args:
+            snapshot: Protocol snapshot the packet schemas are read from
+            upstream: (host, port) of the server
+            workers: Number of decoder threads or processes
+            processes: Use a process pool instead of a thread pool
+            queue_size: Capacity of the decode queue, in frames
+            drop_when_full: Drop frames instead of pausing reads when the queue is full
+            uint32_lengths: Frames have uint32 instead of varuint32 length prefixes
+            output: Optional text stream for the decoded records (JSONL)
+        """
+        self.snapshot = snapshot
+        self.upstream = upstream
+        self.workers = workers
+        self.processes = processes
+        self.drop_when_full = drop_when_full
+        self.uint32_lengths = uint32_lengths
+        self.output = output
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.stats = PacketStats()
+        self.executor: Optional[Executor] = None
+        self._decoder = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start_workers(self):
+        """Create the pool and the tasks feeding it from the queue."""
+        if self.processes:
+            # Forking a process that already runs threads (the loop resolves names in one) can deadlock
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.snapshot.path, self.uint32_lengths)
+            )
+        else:
+            # Threads share one decoder; its codec cache only ever gains entries
+            self._decoder = CaptureDecoder(self.snapshot, uint32_lengths=self.uint32_lengths)
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._tasks = [asyncio.create_task(self._decode_loop()) for _ in range(self.workers)]
+
+    async def stop_workers(self):
+        """Decode the frames still queued, then stop the tasks and the pool."""
+        await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.executor.shutdown()
+
+    async def _decode_loop(self):
+        """Move batches of queued frames to the pool and count the results."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < DECODE_BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                encode = self.output is not None
+                if self.processes:
+                    counts, text = await loop.run_in_executor(self.executor, _decode_batch, batch, encode)
+                else:
+                    counts, text = await loop.run_in_executor(self.executor, _decode_batch, batch, encode,
+                                                              self._decoder)
+                for name, size, error in counts:
+                    self.stats.add(name, size, error)
+                if text:
+                    self.output.write(text)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _pump(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, direction: str):
+        """
+        Forward one direction of a connection and queue its frames.
+
+        If the stream turns out not to be framed, its bytes are still forwarded
+        but no longer split or decoded.
+        """
+        splitter = FrameSplitter(self.uint32_lengths)
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    # Pass the half-close on; the other direction keeps flowing
+                    if writer.can_write_eof():
+                        writer.write_eof()
+                    return
+                writer.write(data)
+                framed = not splitter.error
+                frames = splitter.feed(data)
+                if framed and splitter.error:
+                    print(f"Warning: {direction} stream is not framed, forwarding it without decoding: "
+                          f"{splitter.error}", file=sys.stderr)
+                    self.stats.unframed_streams += 1
+                for frame in frames:
+                    if not self.drop_when_full:
+                        await self.queue.put((direction, frame))
+                    elif self.queue.full():
+                        self.stats.dropped += 1
+                    else:
+                        self.queue.put_nowait((direction, frame))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def handle_client(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        """Connect a client to the upstream server and relay both directions."""
+        try:
+            server_reader, server_writer = await asyncio.open_connection(*self.upstream)
+        except OSError as e:
+            print(f"Warning: Could not connect to {self.upstream[0]}:{self.upstream[1]}: {e}", file=sys.stderr)
+            client_writer.close()
+            return
+        await asyncio.gather(
+            self._pump(client_reader, server_writer, CLIENT_TO_SERVER),
+            self._pump(server_reader, client_writer, SERVER_TO_CLIENT)
+        )
+        server_writer.close()
+        client_writer.close()
+
+
+async def _echo(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Echo everything back; the stand-in upstream server."""
+    try:
+        while True:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+async def start_stand_in_server(host: str = '127.0.0.1') -> Tuple[asyncio.AbstractServer, Tuple[str, int]]:
+    """Start a local echo server on an ephemeral port; returns (server, (host, port))."""
+    server = await asyncio.start_server(_echo, host, 0)
+    return server, server.sockets[0].getsockname()[:2]
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Parse a host:port address."""
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address '{address}', expected host:port")
+    return host, int(port)
+
+
+async def run(args: argparse.Namespace, snapshot: ProtocolSnapshot, output: Optional[TextIO]):
+    """Run the relay until interrupted."""
+    stand_in = None
+    if args.stand_in:
+        stand_in, upstream = await start_stand_in_server(args.host)
+        print(f"✓ Stand-in echo server on {upstream[0]}:{upstream[1]}")
+    else:
+        upstream = parse_address(args.upstream)
+
+    relay = PacketRelay(
+        snapshot, upstream,
+        workers=args.workers,
+        processes=args.processes,
+        queue_size=args.queue_size,
+        drop_when_full=args.drop_when_full,
+        uint32_lengths=args.uint32_lengths,
+        output=output
+    )
+    relay.start_workers()
+    server = await asyncio.start_server(relay.handle_client, args.host, args.listen_port)
+    print(f"✓ Relaying {args.host}:{args.listen_port} to {upstream[0]}:{upstream[1]}")
+
+    try:
+        while True:
+            if args.stats_interval > 0:
+                await asyncio.sleep(args.stats_interval)
+                print(relay.stats.report())
+            else:
+                await asyncio.sleep(3600)
+    finally:
+        server.close()
+        if stand_in:
+            stand_in.close()
+        await relay.stop_workers()
+        print(relay.stats.report())
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Relay a TCP game packet stream and decode its frames.")
+    parser.add_argument('listen_port', type=int,
+                        help="Port to accept client connections on")
+    parser.add_argument('upstream', nargs='?',
+                        help="Server address as host:port (not needed with --stand-in)")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--input-path', type=Path,
+                        help="Directory containing JSON files (default: script directory)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, metavar='N',
+                        help=f"Decoder threads or processes (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--processes', action='store_true',
+                        help="Decode in a process pool instead of a thread pool")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, metavar='N',
+                        help=f"Frames the decode queue holds (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument('--drop-when-full', action='store_true',
+                        help="Drop frames instead of pausing reads when the queue is full")
+    parser.add_argument('--uint32-lengths', action='store_true',
+                        help="Frames are prefixed with a little endian uint32 instead of a varuint32")
+    parser.add_argument('--output', type=Path, metavar='FILE',
+                        help="Write decoded records to FILE as JSONL")
+    parser.add_argument('--stats-interval', type=float, default=DEFAULT_STATS_INTERVAL, metavar='SECONDS',
+                        help=f"Print the counters every SECONDS, 0 disables (default: {DEFAULT_STATS_INTERVAL:g})")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="Relay to a local echo server started on an ephemeral port")
+    args = parser.parse_args()
+
+    if not args.upstream and not args.stand_in:
+        print("Error: An upstream host:port or --stand-in is required")
+        sys.exit(1)
+    if args.upstream and not args.stand_in:
+        try:
+            parse_address(args.upstream)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    input_path = args.input_path or Path(__file__).parent
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    snapshot = load_snapshot(input_path)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        asyncio.run(run(args, snapshot, output))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,825 @@
+#!/usr/bin/env python3
+"""
+Compile JSON packet schemas into flat validators for decoded packets.
+
+Each packet schema is turned into straight-line Python source, one function per
+definition as in packet_codec.py, that checks a decoded packet (the values
+PacketCodec.decode returns) against the schema constraints:
+- required fields are present
+- values have the Python type of their wire type, and integers fit it
+- minimum and maximum
+- enum value sets of string enums, and the wire values of enums serialized
+  as integers (Enum-as-Value): their positions, or the values of the enum of
+  the same title in __protocoldoc.json where it is indexed
+- minLength, maxLength and pattern of strings
+- minItems and maxItems of arrays, minProperties and maxProperties of maps
+- oneOf control values name one of the variants
+
+Arrays that compile_schema(..., batch_arrays=True) decodes to NumPy arrays
+(see varint_batch.py) are accepted in that form too, when their dtype is the
+one the batch codec produces. The dtype already enforces the type and integer
+range of every item, so only the length and the minimum, maximum and enum
+constraints narrower than the dtype are checked, one column at a time.
+
+All constraint values are folded into the source as constants (enum sets and
+patterns are prebuilt), so validating never looks at the schema dictionaries.
+Failures raise ValidationError with the path of the offending value, for
+example "Blocks Changed.Blocks Changed - Standards[3].Pos.X".
+
+x-runtime-constraint-description is free text ("Ensure it is a valid
+MinEngineVersion") and cannot be compiled; those constraints are listed in
+PacketValidator.runtime_constraints so callers can check them by hand.
+
+GenericValidator interprets the same rules by walking the schema for every
+value. It is the reference the compiled validators are checked and timed
+against: running this script validates an example packet of every schema with
+both, in batch mode, and reports the packets per second of each. It classifies
+fields with classify_field on the raw schema rather than through the SchemaIR
+the compiler uses, so that it stays independent of the code it checks.
+
+Usage:
+    python packet_validator.py [input_path] [--batch-size N] [--repeat N]
+
+    input_path: Optional path to directory containing JSON files (default: script directory)
+    --batch-size N: Packets per validated batch (default: 1000)
+    --repeat N: Timed runs per validator, the best is reported (default: 3)
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from generate_html_table import EnumIndex
+from packet_codec import compile_schema
+from schema_ir import (
+    CodecError, FIXED_FORMATS, PROTOCOL_DOC_FILENAME, SchemaIR, classify_field, map_schemas, sorted_properties
+)
+from varint_batch import find_batch_arrays, record_layout
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+INTEGER_RANGES = {
+    'int8': (-2 ** 7, 2 ** 7 - 1),
+    'uint8': (0, 2 ** 8 - 1),
+    'int16': (-2 ** 15, 2 ** 15 - 1),
+    'uint16': (0, 2 ** 16 - 1),
+    'int32': (-2 ** 31, 2 ** 31 - 1),
+    'uint32': (0, 2 ** 32 - 1),
+    'int64': (-2 ** 63, 2 ** 63 - 1),
+    'uint64': (0, 2 ** 64 - 1),
+}
+
+# Base type of each struct format character
+FORMAT_TYPES = {fmt: base_type for base_type, fmt in FIXED_FORMATS.items()}
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_REPEAT = 3
+
+
+class ValidationError(ValueError):
+    """Raised when a decoded packet does not satisfy its schema."""
+
+    def __init__(self, path: str, message: str):
+        self.path = path
+        self.message = message
+        super().__init__(f"{path}: {message}" if path else message)
+
+    def prefixed(self, prefix: str) -> 'ValidationError':
+        """Return the error with its path moved under prefix."""
+        if not self.path:
+            return ValidationError(prefix, self.message)
+        if self.path.startswith(('[', '<')):
+            return ValidationError(prefix + self.path, self.message)
+        return ValidationError(f"{prefix}.{self.path}" if prefix else self.path, self.message)
+
+
+def base_type(kind: str, info: Any) -> Optional[str]:
+    """Return the underlying type of a 'fixed' or 'varint' field, or None for other kinds."""
+    if kind == 'varint':
+        return info
+    if kind == 'fixed':
+        return FORMAT_TYPES[info[1]]
+    return None
+
+
+def scalar_bounds(field: Dict[str, Any], scalar_type: str) -> Tuple[Optional[float], Optional[float]]:
+    """Return the (low, high) bounds of a number: its type range narrowed by minimum/maximum."""
+    low, high = INTEGER_RANGES.get(scalar_type, (None, None))
+    if 'minimum' in field:
+        low = field['minimum'] if low is None else max(low, field['minimum'])
+    if 'maximum' in field:
+        high = field['maximum'] if high is None else min(high, field['maximum'])
+    if scalar_type in INTEGER_RANGES:
+        # Integer fields carry float bounds (0.0); keep the constants integral
+        low, high = int(low), int(high)
+    return low, high
+
+
+def enum_wire_values(field: Dict[str, Any], enums: Optional[EnumIndex]) -> FrozenSet[int]:
+    """Return the wire values of an enum serialized as an integer (see EnumIndex.wire_values)."""
+    if enums is None:
+        return frozenset(range(len(field['enum'])))
+    return frozenset(enums.wire_values(field.get('title', ''), field['enum']))
+
+
+def batch_columns(items: Dict[str, Any], definitions: Dict[str, Any]
+                  ) -> Optional[Tuple[Any, List[Tuple[Tuple[str, ...], str, Dict[str, Any]]]]]:
+    """
+    Describe the NumPy form of an array that batch decoding applies to.
+
+    Returns:
+        Tuple of (dtype, (column path, base type, leaf schema) of every column),
+        or None if the items do not decode in bulk or NumPy is not installed
+    """
+    if np is None:
+        return None
+    layout = record_layout(items, definitions)
+    if layout is None:
+        return None
+    columns, dtype = layout
+
+    def resolve(schema: Dict[str, Any]) -> Dict[str, Any]:
+        while '$ref' in schema:
+            schema = definitions[schema['$ref'].split('/')[-1]]
+        return schema
+
+    leaves = []
+    for column in columns:
+        schema = resolve(items)
+        for name in column.path:
+            schema = resolve(schema['properties'][name])
+        leaves.append((column.path, column.base_type, schema))
+    return np.dtype(dtype), leaves
+
+
+def column_constraints(leaf: Dict[str, Any], scalar_type: str, enums: Optional[EnumIndex]
+                       ) -> Optional[Tuple[int, int, Optional[Tuple[int, ...]]]]:
+    """
+    Return the (low, high, enum values) checks of a batch column.
+
+    Returns None if the dtype already covers them: no enum, and bounds that
+    are the range of the type.
+    """
+    if scalar_type == 'boolean':
+        return None
+    low, high = scalar_bounds(leaf, scalar_type)
+    values = tuple(sorted(enum_wire_values(leaf, enums))) if 'enum' in leaf else None
+    if (low, high) == INTEGER_RANGES[scalar_type] and values is None:
+        return None
+    return low, high, values
+
+
+def check_column(column, low: int, high: int, values: Optional[Tuple[int, ...]]) -> Optional[Tuple[int, str]]:
+    """Return (index, message) of the first item of a batch column that fails its checks, or None."""
+    bad = (column < low) | (column > high)
+    if values is not None:
+        bad |= ~np.isin(column, values)
+    if not bad.any():
+        return None
+    index = int(bad.argmax())
+    value = column[index].item()
+    if values is not None and value not in values:
+        return index, f'{value!r} is not a value of the enum'
+    return index, f'{value!r} is outside [{low!r}, {high!r}]'
+
+
+class ValidatorCompiler:
+    """Compiles one packet schema into Python source for its validator."""
+
+    def __init__(self, schema: Dict[str, Any], name: str, enums: Optional[EnumIndex] = None):
+        """Initialize the compiler for a single packet schema, with the wire values of enums from enums."""
+        self.schema = schema
+        self.definitions = schema.get('definitions', {})
+        self.ir = SchemaIR(self.definitions)
+        self.enums = enums
+        self.prefix = re.sub(r'\W', '_', name)
+        # Module-level constants of the generated source (enum sets, patterns), by name
+        self.constants: Dict[str, Any] = {}
+        self.functions: List[str] = []
+        self.compiled_refs: Dict[str, str] = {}
+        self.pending: List[Tuple[str, Dict[str, Any]]] = []
+        self.runtime_constraints: List[Tuple[str, str]] = []
+        # Title of the definition being compiled, where runtime constraints are reported
+        self.location = name
+        self.counter = 0
+
+    def temp(self, prefix: str = 'v') -> str:
+        """Return a fresh local variable name."""
+        self.counter += 1
+        return f'_{prefix}{self.counter}'
+
+    def constant(self, value: Any, prefix: str) -> str:
+        """Return the module-level name of a constant of the generated source."""
+        name = f'_{prefix}_{self.prefix}_{len(self.constants)}'
+        self.constants[name] = value
+        return name
+
+    def ref_function(self, ref: str) -> str:
+        """Return the function suffix for a $ref, queueing its compilation."""
+        ref_id = ref.split('/')[-1]
+        if ref_id not in self.definitions:
+            raise CodecError(f"Unresolved reference {ref}")
+        if ref_id not in self.compiled_refs:
+            suffix = f'{self.prefix}_{ref_id}'
+            self.compiled_refs[ref_id] = suffix
+            self.pending.append((suffix, self.definitions[ref_id]))
+        return self.compiled_refs[ref_id]
+
+    def inline_function(self, schema: Dict[str, Any]) -> str:
+        """Queue an anonymous (inline) object schema for compilation."""
+        suffix = f'{self.prefix}_anon{self.temp("")}'
+        self.pending.append((suffix, schema))
+        return suffix
+
+    @staticmethod
+    def fail(path: str, message: str, ind: str, detail: str = '') -> str:
+        """Emit a raise of ValidationError; detail is an expression %-formatted into message."""
+        if detail:
+            return f'{ind}raise ValidationError({path!r}, {message!r} % ({detail},))'
+        return f'{ind}raise ValidationError({path!r}, {message!r})'
+
+    def check_nested(self, call: str, path: str, ind: str) -> List[str]:
+        """Emit a call to a nested validator that prefixes its errors with path."""
+        error = self.temp('e')
+        return [
+            f'{ind}try:',
+            f'{ind}    {call}',
+            f'{ind}except ValidationError as {error}:',
+            f'{ind}    raise {error}.prefixed({path!r}) from None',
+        ]
+
+    def check_field(self, field: Dict[str, Any], source: str, path: str, ind: str) -> List[str]:
+        """Emit the checks of one field schema on the value in source."""
+        if 'x-runtime-constraint-description' in field:
+            location = f'{self.location}.{path}' if path else self.location
+            self.runtime_constraints.append((location, field['x-runtime-constraint-description']))
+
+        kind, info = self.ir.classify(field)
+        scalar_type = base_type(kind, info)
+        if scalar_type == 'boolean':
+            return [f'{ind}if {source}.__class__ is not bool:',
+                    self.fail(path, 'expected a boolean, got %r', ind + '    ', source)]
+        if scalar_type in ('float', 'double'):
+            lines = [f'{ind}if {source}.__class__ is not float and {source}.__class__ is not int:',
+                     self.fail(path, 'expected a number, got %r', ind + '    ', source)]
+            return lines + self.check_bounds(field, scalar_type, source, path, ind)
+        if scalar_type:
+            lines = [f'{ind}if {source}.__class__ is not int:',
+                     self.fail(path, 'expected an integer, got %r', ind + '    ', source)]
+            lines += self.check_bounds(field, scalar_type, source, path, ind)
+            if 'enum' in field:
+                values = self.constant(enum_wire_values(field, self.enums), 'E')
+                lines += [f'{ind}if {source} not in {values}:',
+                          self.fail(path, '%r is not a value of the enum', ind + '    ', source)]
+            return lines
+        if kind == 'string':
+            return self.check_string(field, source, path, ind)
+        if kind == 'empty':
+            return [f'{ind}if {source} is not None:',
+                    self.fail(path, 'expected no value, got %r', ind + '    ', source)]
+        if kind == 'ref':
+            return self.check_nested(f'_validate_{self.ref_function(info)}({source})', path, ind)
+        if kind == 'object':
+            return self.check_nested(f'_validate_{self.inline_function(info)}({source})', path, ind)
+        if kind == 'array':
+            return self.check_array(info, source, path, ind)
+        if kind == 'map':
+            return self.check_map(info, source, path, ind)
+        return self.check_oneof(info, source, path, ind)
+
+    def check_bounds(self, field: Dict[str, Any], scalar_type: str, source: str, path: str, ind: str) -> List[str]:
+        """Emit the range check of a number."""
+        low, high = scalar_bounds(field, scalar_type)
+        if low is None and high is None:
+            return []
+        if high is None:
+            return [f'{ind}if {source} < {low!r}:',
+                    self.fail(path, f'%r is below the minimum {low!r}', ind + '    ', source)]
+        if low is None:
+            return [f'{ind}if {source} > {high!r}:',
+                    self.fail(path, f'%r is above the maximum {high!r}', ind + '    ', source)]
+        return [f'{ind}if not {low!r} <= {source} <= {high!r}:',
+                self.fail(path, f'%r is outside [{low!r}, {high!r}]', ind + '    ', source)]
+
+    def check_length(self, field: Dict[str, Any], source: str, path: str, ind: str,
+                     min_key: str, max_key: str, noun: str) -> List[str]:
+        """Emit a length check from a pair of min/max keywords."""
+        low, high = field.get(min_key), field.get(max_key)
+        if low is None and high is None:
+            return []
+        length = self.temp('n')
+        lines = [f'{ind}{length} = len({source})']
+        if low is not None:
+            lines += [f'{ind}if {length} < {int(low)}:',
+                      self.fail(path, f'%d {noun}, at least {int(low)} required', ind + '    ', length)]
+        if high is not None:
+            lines += [f'{ind}if {length} > {int(high)}:',
+                      self.fail(path, f'%d {noun}, at most {int(high)} allowed', ind + '    ', length)]
+        return lines
+
+    def check_string(self, field: Dict[str, Any], source: str, path: str, ind: str) -> List[str]:
+        """Emit the checks of a string (or string-serialized enum)."""
+        lines = [f'{ind}if {source}.__class__ is not str:',
+                 self.fail(path, 'expected a string, got %r', ind + '    ', source)]
+        if 'enum' in field:
+            values = self.constant(frozenset(field['enum']), 'E')
+            lines += [f'{ind}if {source} not in {values}:',
+                      self.fail(path, '%r is not a value of the enum', ind + '    ', source)]
+        lines += self.check_length(field, source, path, ind, 'minLength', 'maxLength', 'characters')
+        if 'pattern' in field:
+            pattern = self.constant(re.compile(field['pattern']), 'P')
+            lines += [f'{ind}if {pattern}.search({source}) is None:',
+                      self.fail(path, '%r does not match ' + field['pattern'].replace('%', '%%'), ind + '    ', source)]
+        return lines
+
+    def check_array(self, field: Dict[str, Any], source: str, path: str, ind: str) -> List[str]:
+        """Emit the checks of an array and of its items (or of its columns, for a NumPy array)."""
+        batch = batch_columns(field.get('items', {}), self.definitions)
+        if batch is None:
+            return self.check_item_list(field, source, path, ind)
+        dtype, leaves = batch
+        expected = self.constant(dtype, 'D')
+        lines = [f'{ind}if {source}.__class__ is _ndarray:',
+                 f'{ind}    if {source}.dtype != {expected}:',
+                 self.fail(path, 'expected an array of dtype %s, got %s', ind + '        ',
+                           f'{expected}, {source}.dtype')]
+        lines += self.check_length(field, source, path, ind + '    ', 'minItems', 'maxItems', 'items')
+        for column_path, scalar_type, leaf in leaves:
+            constraints = column_constraints(leaf, scalar_type, self.enums)
+            if constraints is None:
+                continue
+            failure = self.temp('f')
+            column = source + ''.join(f'[{name!r}]' for name in column_path)
+            suffix = ''.join(f'.{name}' for name in column_path)
+            lines += [f'{ind}    {failure} = _check_column({column}, {", ".join(map(repr, constraints))})',
+                      f'{ind}    if {failure} is not None:',
+                      f"{ind}        raise ValidationError({path!r} + '[%d]' % {failure}[0] + {suffix!r}, {failure}[1])"]
+        lines.append(f'{ind}else:')
+        return lines + self.check_item_list(field, source, path, ind + '    ')
+
+    def check_item_list(self, field: Dict[str, Any], source: str, path: str, ind: str) -> List[str]:
+        """Emit the checks of an array given as a list and of its items."""
+        lines = [f'{ind}if {source}.__class__ is not list and {source}.__class__ is not tuple:',
+                 self.fail(path, 'expected an array, got %r', ind + '    ', f'type({source}).__name__')]
+        lines += self.check_length(field, source, path, ind, 'minItems', 'maxItems', 'items')
+        index, item, error = self.temp('i'), self.temp(), self.temp('e')
+        body = self.check_field(field.get('items', {}), item, '', ind + '        ')
+        if body:
+            lines += [
+                f'{ind}try:',
+                f'{ind}    for {index}, {item} in enumerate({source}):',
+                *body,
+                f'{ind}except ValidationError as {error}:',
+                f"{ind}    raise {error}.prefixed({path!r} + '[%d]' % {index}) from None",
+            ]
+        return lines
+
+    def check_map(self, field: Dict[str, Any], source: str, path: str, ind: str) -> List[str]:
+        """Emit the checks of a map given as (key, value) pairs."""
+        lines = [f'{ind}if {source}.__class__ is not list and {source}.__class__ is not tuple:',
+                 self.fail(path, 'expected a list of (key, value) pairs, got %r', ind + '    ', f'type({source}).__name__')]
+        lines += self.check_length(field, source, path, ind, 'minProperties', 'maxProperties', 'entries')
+        key_schema, value_schema = map_schemas(field)
+        key, value, error = self.temp('k'), self.temp(), self.temp('e')
+        body = (self.check_field(key_schema, key, '', ind + '        ')
+                + self.check_field(value_schema, value, '', ind + '        '))
+        if body:
+            lines += [
+                f'{ind}try:',
+                f'{ind}    for {key}, {value} in {source}:',
+                *body,
+                f'{ind}except ValidationError as {error}:',
+                f"{ind}    raise {error}.prefixed({path!r} + '[%r]' % ({key},)) from None",
+            ]
+        return lines
+
+    def check_oneof(self, field: Dict[str, Any], source: str, path: str, ind: str) -> List[str]:
+        """Emit the checks of a (control_value, value) oneOf pair."""
+        control, value = self.temp('c'), self.temp()
+        lines = [
+            f'{ind}if ({source}.__class__ is not tuple and {source}.__class__ is not list) or len({source}) != 2:',
+            self.fail(path, 'expected a (control value, value) pair, got %r', ind + '    ', source),
+            f'{ind}{control}, {value} = {source}',
+        ]
+        keyword = 'if'
+        for idx, variant in enumerate(field['oneOf']):
+            control_value = variant.get('x-ordinal-index', idx)
+            lines.append(f'{ind}{keyword} {control} == {control_value!r}:')
+            lines.extend(self.check_field(variant, value, f'{path}<{control_value}>', ind + '    ') or [f'{ind}    pass'])
+            keyword = 'elif'
+        lines.append(f'{ind}else:')
+        lines.append(self.fail(path, 'unknown oneOf control value %r', ind + '    ', control))
+        return lines
+
+    def validate_function(self, suffix: str, schema: Dict[str, Any], as_object: bool = False) -> str:
+        """Generate the validate function for one definition."""
+        lines = [f'def _validate_{suffix}(value):']
+        self.location = schema.get('title', self.location)
+        if not as_object and self.ir.classify(schema)[0] != 'object':
+            lines.extend(self.check_field(schema, 'value', '', '    ') or ['    pass'])
+            return '\n'.join(lines)
+
+        lines += ["    if value.__class__ is not dict:",
+                  self.fail('', 'expected an object, got %r', '        ', 'type(value).__name__')]
+        required = set(schema.get('required', []))
+        for field_name, field_data in sorted_properties(schema):
+            name = self.temp()
+            if field_name in required:
+                lines += [f'    if {field_name!r} not in value:',
+                          self.fail(field_name, 'missing required field', '        ')]
+                lines.append(f'    {name} = value[{field_name!r}]')
+                lines.extend(self.check_field(field_data, name, field_name, '    '))
+            else:
+                body = self.check_field(field_data, name, field_name, '        ')
+                if body:
+                    lines.append(f'    if {field_name!r} in value:')
+                    lines.append(f'        {name} = value[{field_name!r}]')
+                    lines.extend(body)
+        return '\n'.join(lines)
+
+    def compile(self) -> str:
+        """Generate the source for the packet's validate functions."""
+        self.location = self.schema.get('title', self.location)
+        self.functions.append(self.validate_function(f'{self.prefix}_root', self.schema, as_object=True))
+        while self.pending:
+            suffix, schema = self.pending.pop(0)
+            self.functions.append(self.validate_function(suffix, schema))
+        return '\n\n\n'.join(self.functions) + '\n'
+
+
+class PacketValidator:
+    """Compiled validator for a single packet schema."""
+
+    def __init__(self, name: str, packet_id: Optional[int], source: str,
+                 constants: Dict[str, Any], runtime_constraints: List[Tuple[str, str]]):
+        """Compile the generated source and bind its entry point."""
+        self.name = name
+        self.packet_id = packet_id
+        self.source = source
+        self.runtime_constraints = runtime_constraints
+        prefix = re.sub(r'\W', '_', name)
+        namespace: Dict[str, Any] = {
+            'ValidationError': ValidationError,
+            '_ndarray': None if np is None else np.ndarray,
+            '_check_column': check_column
+        }
+        namespace.update(constants)
+        exec(compile(source, f'<validator {name}>', 'exec'), namespace)
+        self._validate = namespace[f'_validate_{prefix}_root']
+
+    def validate(self, value: Dict[str, Any]):
+        """Raise ValidationError if a decoded packet does not satisfy the schema."""
+        self._validate(value)
+
+    def is_valid(self, value: Dict[str, Any]) -> bool:
+        """Whether a decoded packet satisfies the schema."""
+        try:
+            self._validate(value)
+        except ValidationError:
+            return False
+        return True
+
+    def validate_batch(self, values: Iterable[Dict[str, Any]]) -> List[Tuple[int, ValidationError]]:
+        """Validate decoded packets; returns (index, error) of every invalid one."""
+        validate = self._validate
+        errors = []
+        for index, value in enumerate(values):
+            try:
+                validate(value)
+            except ValidationError as e:
+                errors.append((index, e))
+        return errors
+
+
+def compile_validator(schema: Dict[str, Any], name: Optional[str] = None,
+                      enums: Optional[EnumIndex] = None) -> PacketValidator:
+    """Compile a loaded packet schema into a PacketValidator."""
+    name = name or schema.get('title', 'Packet')
+    packet_id = schema.get('$metaProperties', {}).get('[cereal:packet]')
+    compiler = ValidatorCompiler(schema, name, enums)
+    source = compiler.compile()
+    return PacketValidator(name, packet_id, source, compiler.constants, compiler.runtime_constraints)
+
+
+def load_validators(source_dir: Path,
+                    enums: Optional[EnumIndex] = None) -> Dict[str, Tuple[PacketValidator, Dict[str, Any]]]:
+    """
+    Compile every packet schema in source_dir; returns {name: (validator, schema)}.
+
+    Enum wire values come from enums, by default the index of the source_dir's
+    __protocoldoc.json.
+    """
+    if enums is None:
+        enums = EnumIndex(source_dir / PROTOCOL_DOC_FILENAME)
+    validators = {}
+    for json_file in sorted(source_dir.glob("*.json")):
+        if json_file.name.startswith("enum_"):
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or '$metaProperties' not in data:
+            continue
+        name = data.get('title', json_file.stem)
+        try:
+            validators[name] = (compile_validator(data, name, enums), data)
+        except CodecError as e:
+            print(f"Warning: Could not compile {json_file}: {e}")
+    return validators
+
+
+class GenericValidator:
+    """Validates decoded packets by walking the schema for every value (the reference)."""
+
+    def __init__(self, schema: Dict[str, Any], enums: Optional[EnumIndex] = None):
+        """Initialize the validator for a single packet schema, with the wire values of enums from enums."""
+        self.schema = schema
+        self.definitions = schema.get('definitions', {})
+        self.enums = enums
+
+    def validate(self, value: Any):
+        """Raise ValidationError if a decoded packet does not satisfy the schema."""
+        self.check_object(self.schema, value)
+
+    def check_object(self, schema: Dict[str, Any], value: Any):
+        """Check an object value against the properties of schema."""
+        if type(value) is not dict:
+            raise ValidationError('', f'expected an object, got {type(value).__name__!r}')
+        required = schema.get('required', [])
+        for field_name, field in sorted_properties(schema):
+            if field_name not in value:
+                if field_name in required:
+                    raise ValidationError(field_name, 'missing required field')
+                continue
+            try:
+                self.check(field, value[field_name])
+            except ValidationError as e:
+                raise e.prefixed(field_name) from None
+
+    def check(self, field: Dict[str, Any], value: Any):
+        """Check a value against a field schema."""
+        kind, info = classify_field(field, self.definitions)
+        scalar_type = base_type(kind, info)
+        if scalar_type == 'boolean':
+            if type(value) is not bool:
+                raise ValidationError('', f'expected a boolean, got {value!r}')
+        elif scalar_type:
+            if scalar_type in ('float', 'double'):
+                if type(value) not in (float, int):
+                    raise ValidationError('', f'expected a number, got {value!r}')
+            elif type(value) is not int:
+                raise ValidationError('', f'expected an integer, got {value!r}')
+            low, high = scalar_bounds(field, scalar_type)
+            if (low is not None and value < low) or (high is not None and value > high):
+                raise ValidationError('', f'{value!r} is outside [{low!r}, {high!r}]')
+            if (scalar_type not in ('float', 'double') and 'enum' in field
+                    and value not in enum_wire_values(field, self.enums)):
+                raise ValidationError('', f'{value!r} is not a value of the enum')
+        elif kind == 'string':
+            if type(value) is not str:
+                raise ValidationError('', f'expected a string, got {value!r}')
+            if 'enum' in field and value not in field['enum']:
+                raise ValidationError('', f'{value!r} is not a value of the enum')
+            self.check_length(field, value, 'minLength', 'maxLength', 'characters')
+            if 'pattern' in field and re.search(field['pattern'], value) is None:
+                raise ValidationError('', f"{value!r} does not match {field['pattern']}")
+        elif kind == 'empty':
+            if value is not None:
+                raise ValidationError('', f'expected no value, got {value!r}')
+        elif kind == 'ref':
+            ref_id = info.split('/')[-1]
+            if ref_id not in self.definitions:
+                raise CodecError(f"Unresolved reference {info}")
+            definition = self.definitions[ref_id]
+            if classify_field(definition, self.definitions)[0] == 'object':
+                self.check_object(definition, value)
+            else:
+                self.check(definition, value)
+        elif kind == 'object':
+            self.check_object(info, value)
+        elif kind == 'array':
+            if np is not None and type(value) is np.ndarray:
+                self.check_batch_array(field, value)
+                return
+            if type(value) not in (list, tuple):
+                raise ValidationError('', f'expected an array, got {type(value).__name__!r}')
+            self.check_length(field, value, 'minItems', 'maxItems', 'items')
+            for index, item in enumerate(value):
+                try:
+                    self.check(field.get('items', {}), item)
+                except ValidationError as e:
+                    raise e.prefixed(f'[{index}]') from None
+        elif kind == 'map':
+            if type(value) not in (list, tuple):
+                raise ValidationError('', f'expected a list of (key, value) pairs, got {type(value).__name__!r}')
+            self.check_length(field, value, 'minProperties', 'maxProperties', 'entries')
+            key_schema, value_schema = map_schemas(field)
+            for key, item in value:
+                try:
+                    self.check(key_schema, key)
+                    self.check(value_schema, item)
+                except ValidationError as e:
+                    raise e.prefixed(f'[{key!r}]') from None
+        else:
+            if type(value) not in (list, tuple) or len(value) != 2:
+                raise ValidationError('', f'expected a (control value, value) pair, got {value!r}')
+            control, item = value
+            for idx, variant in enumerate(field['oneOf']):
+                if control == variant.get('x-ordinal-index', idx):
+                    try:
+                        self.check(variant, item)
+                    except ValidationError as e:
+                        raise e.prefixed(f'<{control}>') from None
+                    return
+            raise ValidationError('', f'unknown oneOf control value {control!r}')
+
+    def check_batch_array(self, field: Dict[str, Any], value: Any):
+        """Check a NumPy array from batch decoding, item by item."""
+        batch = batch_columns(field.get('items', {}), self.definitions)
+        if batch is None:
+            raise ValidationError('', 'expected an array, got \'ndarray\'')
+        dtype, leaves = batch
+        if value.dtype != dtype:
+            raise ValidationError('', f'expected an array of dtype {dtype}, got {value.dtype}')
+        self.check_length(field, value, 'minItems', 'maxItems', 'items')
+        for column_path, scalar_type, leaf in leaves:
+            column = value
+            for name in column_path:
+                column = column[name]
+            for index, item in enumerate(column.tolist()):
+                if scalar_type == 'boolean':
+                    continue
+                low, high = scalar_bounds(leaf, scalar_type)
+                path = f'[{index}]' + ''.join(f'.{name}' for name in column_path)
+                if 'enum' in leaf and item not in enum_wire_values(leaf, self.enums):
+                    raise ValidationError(path, f'{item!r} is not a value of the enum')
+                if not low <= item <= high:
+                    raise ValidationError(path, f'{item!r} is outside [{low!r}, {high!r}]')
+
+    @staticmethod
+    def check_length(field: Dict[str, Any], value: Any, min_key: str, max_key: str, noun: str):
+        """Check the length of a value against a pair of min/max keywords."""
+        if min_key in field and len(value) < field[min_key]:
+            raise ValidationError('', f'{len(value)} {noun}, at least {int(field[min_key])} required')
+        if max_key in field and len(value) > field[max_key]:
+            raise ValidationError('', f'{len(value)} {noun}, at most {int(field[max_key])} allowed')
+
+
+def example_value(field: Dict[str, Any], definitions: Dict[str, Any], depth: int = 0,
+                  enums: Optional[EnumIndex] = None) -> Any:
+    """Return a small value that satisfies a field schema (arrays hold minItems or one item)."""
+    kind, info = classify_field(field, definitions)
+    scalar_type = base_type(kind, info)
+    if scalar_type == 'boolean':
+        return False
+    if scalar_type and 'enum' in field and scalar_type not in ('float', 'double'):
+        return min(enum_wire_values(field, enums))
+    if scalar_type:
+        low, high = scalar_bounds(field, scalar_type)
+        value = 0 if low is None or low <= 0 else low
+        value = value if high is None or value <= high else high
+        return float(value) if scalar_type in ('float', 'double') else value
+    if kind == 'string':
+        if 'enum' in field:
+            return field['enum'][0]
+        if 'pattern' in field:
+            # Good enough for the patterns in use: namespaced ids and lists of alternatives
+            for candidate in ['example:value'] + re.findall(r'\w+', field['pattern']):
+                if re.search(field['pattern'], candidate):
+                    return candidate
+        return 'x' * int(field.get('minLength', 1))
+    if kind == 'empty':
+        return None
+    if kind == 'ref':
+        return example_value(definitions[info.split('/')[-1]], definitions, depth + 1, enums)
+    if kind == 'object':
+        return example_packet(info, definitions, depth + 1, enums)
+    if kind == 'array':
+        count = int(field.get('minItems', 0 if depth > 6 else 1))
+        return [example_value(field.get('items', {}), definitions, depth + 1, enums) for _ in range(count)]
+    if kind == 'map':
+        return []
+    variant = field['oneOf'][0]
+    return (variant.get('x-ordinal-index', 0), example_value(variant, definitions, depth + 1, enums))
+
+
+def example_packet(schema: Dict[str, Any], definitions: Optional[Dict[str, Any]] = None,
+                   depth: int = 0, enums: Optional[EnumIndex] = None) -> Dict[str, Any]:
+    """Return a small packet (or object) that satisfies an object schema."""
+    definitions = schema.get('definitions', {}) if definitions is None else definitions
+    return {
+        name: example_value(field, definitions, depth, enums)
+        for name, field in sorted_properties(schema)
+    }
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """Return the fastest of repeat runs of func, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Compile packet validators and time them against a generic validator.")
+    parser.add_argument('input_path', nargs='?', type=Path,
+                        help="Directory containing JSON files (default: script directory)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, metavar='N',
+                        help=f"Packets per validated batch (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, metavar='N',
+                        help=f"Timed runs per validator, the best is reported (default: {DEFAULT_REPEAT})")
+    args = parser.parse_args()
+
+    input_path = args.input_path or Path(__file__).parent
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    enums = EnumIndex(input_path / PROTOCOL_DOC_FILENAME)
+    validators = load_validators(input_path, enums)
+    if not validators:
+        print(f"Warning: No packet schemas found in {input_path}")
+        sys.exit(1)
+    print(f"✓ Compiled {len(validators)} packet validators in {time.perf_counter() - start:.2f} s")
+
+    runtime_constraints = [(name, location, text) for name, (validator, _) in validators.items()
+                           for location, text in validator.runtime_constraints]
+    if runtime_constraints:
+        print(f"  {len(runtime_constraints)} x-runtime-constraint-description constraints are not checked:")
+        for name, location, text in runtime_constraints:
+            print(f"    {name}: {location}: {text}")
+
+    compiled_time = generic_time = 0.0
+    packets = 0
+    for name, (validator, schema) in validators.items():
+        batch = [example_packet(schema, enums=enums)] * args.batch_size
+        generic = GenericValidator(schema, enums)
+        errors = validator.validate_batch(batch)
+        if errors:
+            print(f"Warning: Example {name} packet rejected: {errors[0][1]}")
+            continue
+        compiled_time += best_time(lambda: validator.validate_batch(batch), args.repeat)
+        generic_time += best_time(lambda: [generic.validate(value) for value in batch], args.repeat)
+        packets += len(batch)
+
+    print(f"\n{'Validator':<12} {'Packets/s':>12} {'us/packet':>10}")
+    for label, elapsed in (('compiled', compiled_time), ('generic', generic_time)):
+        print(f"{label:<12} {packets / elapsed:>12,.0f} {elapsed / packets * 1e6:>10.2f}")
+    print(f"\n✓ Compiled validators are {generic_time / compiled_time:.1f}x faster over {packets} packets")
+
+    # Each integer enum of a packet, set one past its largest wire value, must be rejected by both
+    rejected = 0
+    for name, (validator, schema) in validators.items():
+        definitions = schema.get('definitions', {})
+        generic = GenericValidator(schema, enums)
+        for field_name, field in sorted_properties(schema):
+            if 'enum' not in field or base_type(*classify_field(field, definitions)) in (None, 'boolean', 'float', 'double'):
+                continue
+            packet = example_packet(schema, enums=enums)
+            packet[field_name] = max(enum_wire_values(field, enums)) + 1
+            try:
+                generic.validate(packet)
+            except ValidationError:
+                if not validator.is_valid(packet):
+                    rejected += 1
+                    continue
+            print(f"Warning: {name} packet with {field_name} = {packet[field_name]} accepted")
+    print(f"✓ Both validators reject out-of-set values of {rejected} integer enum fields")
+
+    # Packets with arrays that decode to NumPy arrays must pass both validators in that form too
+    if np is None:
+        return
+    accepted = 0
+    for name, (validator, schema) in validators.items():
+        if not find_batch_arrays(schema):
+            continue
+        packet = example_packet(schema, enums=enums)
+        try:
+            payload = compile_schema(schema, name).encode(packet)
+            decoded = compile_schema(schema, name, batch_arrays=True).decode(payload)
+        except CodecError as e:
+            print(f"Warning: Could not round-trip the example {name} packet: {e}")
+            continue
+        try:
+            GenericValidator(schema, enums).validate(decoded)
+            validator.validate(decoded)
+            accepted += 1
+        except ValidationError as e:
+            print(f"Warning: Batch decoded {name} packet rejected: {e}")
+    print(f"✓ Both validators accept {accepted} packets decoded with batch_arrays=True")
+
+
+if __name__ == "__main__":
+    main()
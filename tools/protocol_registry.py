@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Registry of several protocol versions, with structurally identical schema nodes shared.
+
+Each json/ tree (one per network version) is loaded and registered under its
+x-protocol-version. While a tree is loaded every dict and list of its schemas
+is hash-consed: the canonical hash of a node covers its keys, its scalar
+values and the hashes of its children, and a node whose hash has been seen
+before, in this or in an earlier version, is replaced by the existing object.
+Strings are interned as well. A type that did not change between versions,
+such as BlockPos, therefore exists once in memory whatever the number of
+versions, and loading a new version only allocates the nodes on the path to
+what changed.
+
+The version stamps (x-protocol-version, x-minecraft-version,
+x-format-version) are moved off the packet schemas into the VersionTree, so an
+unchanged packet is one shared object across versions as well. Codecs are
+compiled per shared schema, so they are shared the same way.
+
+Lookups are dictionary lookups: version -> VersionTree, then packet name or
+packet id -> schema.
+
+The shared dictionaries are used by every version and must not be modified.
+
+Usage:
+    python protocol_registry.py [input_path ...]
+
+    input_path: Directories containing the JSON files of each version (default: script directory)
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from packet_codec import PacketCodec, compile_schema
+from schema_ir import PROTOCOL_DOC_FILENAME
+
+
+# Per-version stamps kept on the VersionTree instead of on the packet schemas
+VERSION_KEYS = ('x-protocol-version', 'x-minecraft-version', 'x-format-version')
+
+
+class RegistryError(ValueError):
+    """Raised when a tree cannot be registered or a version is unknown."""
+
+
+class VersionTree:
+    """Packets, definitions and protocol document of one protocol version."""
+
+    def __init__(self, protocol_version: int, minecraft_version: Optional[str],
+                 format_version: Optional[str], source_dir: Path):
+        """Initialize an empty tree; ProtocolRegistry.add_tree fills it."""
+        self.protocol_version = protocol_version
+        self.minecraft_version = minecraft_version
+        self.format_version = format_version
+        self.source_dir = source_dir
+        self.packets: Dict[str, Dict[str, Any]] = {}
+        self.packet_ids: Dict[int, str] = {}
+        self.definitions: Dict[str, Dict[str, Any]] = {}
+        self.protocol_doc: Optional[Any] = None
+
+    def packet(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the schema of a packet, or None."""
+        return self.packets.get(name)
+
+    def packet_by_id(self, packet_id: int) -> Optional[Dict[str, Any]]:
+        """Return the schema of the packet with an id, or None."""
+        name = self.packet_ids.get(packet_id)
+        return None if name is None else self.packets[name]
+
+    def definition(self, ref_id: str) -> Optional[Dict[str, Any]]:
+        """Return a definition by id, or None."""
+        return self.definitions.get(ref_id)
+
+
+class NodeInterner:
+    """Hash-conses JSON values: structurally equal dicts and lists become one object."""
+
+    def __init__(self):
+        """Initialize an empty node table."""
+        self.nodes: Dict[bytes, Any] = {}
+        self.strings: Dict[str, str] = {}
+        # Number of dicts and lists interned, shared or not
+        self.seen = 0
+
+    def intern(self, value: Any) -> Tuple[Any, Any]:
+        """
+        Return the canonical object for a JSON value.
+
+        Returns:
+            Tuple of (canonical value, hash): the hash is a digest for dicts and
+            lists and the value itself for scalars
+        """
+        if isinstance(value, str):
+            value = self.strings.setdefault(value, value)
+            return value, value
+        if isinstance(value, dict):
+            items = {}
+            parts = []
+            for key, item in value.items():
+                key = self.strings.setdefault(key, key)
+                items[key], part = self.intern(item)
+                parts.append((key, part))
+            parts.sort()
+            digest = self._digest(('d', parts))
+        elif isinstance(value, list):
+            items = []
+            parts = []
+            for item in value:
+                item, part = self.intern(item)
+                items.append(item)
+                parts.append(part)
+            digest = self._digest(('l', parts))
+        else:
+            return value, value
+
+        self.seen += 1
+        return self.nodes.setdefault(digest, items), digest
+
+    @staticmethod
+    def _digest(parts: Any) -> bytes:
+        """Hash the canonical form of a node."""
+        # repr keeps the scalar types apart (1, 1.0 and True) and child digests are bytes
+        return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).digest()
+
+
+class ProtocolRegistry:
+    """Protocol versions by x-protocol-version, with schema nodes shared between them."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.versions: Dict[int, VersionTree] = {}
+        self.interner = NodeInterner()
+        # Codecs of shared packet schemas, by id() (the registry keeps the schemas alive)
+        self._codecs: Dict[int, PacketCodec] = {}
+
+    def add_tree(self, source_dir: Path) -> VersionTree:
+        """
+        Load and register the json/ tree of one version.
+
+        Raises:
+            RegistryError: If the tree has no x-protocol-version or the version
+                is registered already
+        """
+        schemas = []
+        stamps: Dict[str, Any] = {}
+        for json_file in sorted(source_dir.glob("*.json")):
+            if json_file.name.startswith("enum_") or json_file.name == PROTOCOL_DOC_FILENAME:
+                continue
+            with open(json_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or '$metaProperties' not in data:
+                continue
+            for key in VERSION_KEYS:
+                if key in data:
+                    stamps[key] = data.pop(key)
+            schemas.append((data.get('title', json_file.stem), data))
+
+        protocol_version = stamps.get('x-protocol-version')
+        if protocol_version is None:
+            raise RegistryError(f"No x-protocol-version in {source_dir}")
+        if protocol_version in self.versions:
+            raise RegistryError(f"Protocol version {protocol_version} is already registered "
+                                f"(from {self.versions[protocol_version].source_dir})")
+
+        tree = VersionTree(protocol_version, stamps.get('x-minecraft-version'),
+                           stamps.get('x-format-version'), source_dir)
+        for name, data in schemas:
+            schema, _ = self.interner.intern(data)
+            tree.packets[name] = schema
+            packet_id = schema.get('$metaProperties', {}).get('[cereal:packet]')
+            if packet_id is not None:
+                tree.packet_ids[packet_id] = name
+            # Definition ids are derived from the type, so packets share them
+            tree.definitions.update(schema.get('definitions', {}))
+
+        protocol_doc_path = source_dir / PROTOCOL_DOC_FILENAME
+        if protocol_doc_path.exists():
+            with open(protocol_doc_path, 'r', encoding='utf-8') as f:
+                tree.protocol_doc, _ = self.interner.intern(json.load(f))
+
+        self.versions[protocol_version] = tree
+        return tree
+
+    def tree(self, protocol_version: int) -> VersionTree:
+        """Return the tree of a protocol version."""
+        try:
+            return self.versions[protocol_version]
+        except KeyError:
+            raise RegistryError(f"Unknown protocol version {protocol_version}") from None
+
+    def packet(self, protocol_version: int, name: str) -> Optional[Dict[str, Any]]:
+        """Return the schema of a packet in a protocol version, or None."""
+        return self.tree(protocol_version).packets.get(name)
+
+    def packet_by_id(self, protocol_version: int, packet_id: int) -> Optional[Dict[str, Any]]:
+        """Return the schema of the packet with an id in a protocol version, or None."""
+        return self.tree(protocol_version).packet_by_id(packet_id)
+
+    def codec(self, protocol_version: int, name: str) -> Optional[PacketCodec]:
+        """Return the codec of a packet in a protocol version, compiled once per distinct schema."""
+        schema = self.packet(protocol_version, name)
+        if schema is None:
+            return None
+        codec = self._codecs.get(id(schema))
+        if codec is None:
+            codec = self._codecs[id(schema)] = compile_schema(schema, name)
+        return codec
+
+    def shared_packets(self, old_version: int, new_version: int) -> List[str]:
+        """Return the names of the packets whose schema is the same object in both versions."""
+        old, new = self.tree(old_version), self.tree(new_version)
+        return [name for name, schema in new.packets.items() if old.packets.get(name) is schema]
+
+    def shared_definitions(self, old_version: int, new_version: int) -> List[str]:
+        """Return the ids of the definitions that are the same object in both versions."""
+        old, new = self.tree(old_version), self.tree(new_version)
+        return [ref_id for ref_id, schema in new.definitions.items() if old.definitions.get(ref_id) is schema]
+
+
+def load_registry(source_dirs: List[Path]) -> ProtocolRegistry:
+    """Load a registry from the json/ trees of several versions."""
+    registry = ProtocolRegistry()
+    for source_dir in source_dirs:
+        registry.add_tree(source_dir)
+    return registry
+
+
+def main():
+    """Main entry point for the script."""
+    input_paths = [Path(arg) for arg in sys.argv[1:]] or [Path(__file__).parent]
+
+    for input_path in input_paths:
+        if not input_path.is_dir():
+            print(f"Error: Input path '{input_path}' is not a directory")
+            sys.exit(1)
+
+    registry = ProtocolRegistry()
+    previous = None
+    for input_path in input_paths:
+        seen, kept = registry.interner.seen, len(registry.interner.nodes)
+        try:
+            tree = registry.add_tree(input_path)
+        except RegistryError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        added = len(registry.interner.nodes) - kept
+        print(f"✓ Protocol {tree.protocol_version} ({tree.minecraft_version}): "
+              f"{len(tree.packets)} packets, {len(tree.definitions)} definitions, "
+              f"{added} new of {registry.interner.seen - seen} schema nodes")
+        if previous is not None:
+            print(f"  shared with {previous.protocol_version}: "
+                  f"{len(registry.shared_packets(previous.protocol_version, tree.protocol_version))} packets, "
+                  f"{len(registry.shared_definitions(previous.protocol_version, tree.protocol_version))} definitions")
+        previous = tree
+
+    print(f"✓ {len(registry.versions)} versions, {len(registry.interner.nodes)} distinct schema nodes "
+          f"of {registry.interner.seen} loaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Binary snapshot of the resolved protocol model, for fast tool startup.
+
+The snapshot holds the protocol model built from the JSON sources (the packet
+schemas, enum_*.json and __protocoldoc.json), split into entries that can be
+read one at a time. Schemas are stored resolved rather than as parsed:
+- Properties of every object are in x-ordinal-index (serialization) order,
+  so consumers iterate them without sorting
+- Every packet and definition carries its field table from the schema IR
+  (schema_ir.SchemaIR): name, ordinal, required flag, display type, wire kind
+  and wire info, and the definition id of $ref fields
+Entries:
+- Packets: schema without its definitions, its field table, the ids of the
+  definitions it uses, its packet id and its schema file
+- Definitions: schema and field table, shared by all packets (their ids are
+  derived from the type)
+- Enums: values of every enum of the protocol document and enum_*.json
+- Types: the remaining protocol document entries (objects, members, setters)
+- Packet ids: packet id -> packet name
+- Minecraft and protocol version
+
+Every entry is a separate marshal blob, and a small index maps names to
+(offset, size). The file is memory-mapped and entries are unmarshalled when
+first used, so opening a snapshot costs one index read whatever its size.
+
+A missing, empty, truncated or otherwise unreadable snapshot raises
+SnapshotError when opened; load_snapshot rebuilds it.
+
+A snapshot records two digests of its sources: one of the file names, sizes
+and modification times, checked on every open, and one of the file contents.
+When the first differs but the second matches (files touched, not changed),
+only the header is updated; otherwise the snapshot is rebuilt. marshal is
+specific to the Python version, so snapshots of another version are rebuilt
+too.
+
+Layout, integers little endian:
+    header  '<4sHBB32s32sQQ'  magic b'PSNP', format version, Python major and
+                              minor version, stat digest, content digest,
+                              index offset and size
+    blobs   marshal data of the entries
+    index   marshal data of the index
+
+Usage:
+    python protocol_snapshot.py [input_path] [snapshot_path] [--rebuild]
+
+    input_path: Optional path to directory containing JSON files (default: script directory)
+    snapshot_path: Optional snapshot file (default: ./protocol_snapshot.bin in script directory)
+    --rebuild: Rebuild the snapshot even if it is up to date
+"""
+
+import argparse
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from schema_ir import PROTOCOL_DOC_FILENAME, SchemaIR, sorted_properties
+
+
+SNAPSHOT_MAGIC = b'PSNP'
+SNAPSHOT_FORMAT_VERSION = 3
+SNAPSHOT_HEADER = struct.Struct('<4sHBB32s32sQQ')
+# Offset of the stat digest in the header, rewritten when only the stats changed
+STAT_DIGEST_OFFSET = 8
+
+DEFAULT_SNAPSHOT_FILENAME = 'protocol_snapshot.bin'
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is missing, corrupt or of another format."""
+
+
+class SnapshotField(NamedTuple):
+    """One property of a packet or definition, as stored in the snapshot."""
+    name: str
+    ordinal: int
+    required: bool
+    # Display type (schema_ir.get_underlying_type, HTML escaped)
+    type_name: str
+    # Wire kind and info (schema_ir.classify_field); info is None for structured kinds
+    kind: str
+    wire: Any
+    # Definition id of a $ref field, or None
+    ref_id: Optional[str]
+
+
+def resolve_schema(schema: Any) -> Any:
+    """Return a copy of a schema with the properties of every object in serialization order."""
+    if isinstance(schema, list):
+        return [resolve_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    resolved = {key: resolve_schema(value) for key, value in schema.items() if key != 'properties'}
+    if isinstance(schema.get('properties'), dict):
+        resolved['properties'] = {name: resolve_schema(field) for name, field in sorted_properties(schema)}
+    return resolved
+
+
+def field_table(ir: SchemaIR, schema: Dict[str, Any]) -> List[Tuple[Any, ...]]:
+    """Return the SnapshotField rows (as plain tuples, for marshal) of an object schema."""
+    rows = []
+    for field in ir.fields(schema):
+        node = field.field_type
+        wire = node.wire if node.kind not in ('ref', 'unsupported') else None
+        ref_id = node.ref.ref_id if node.ref else None
+        rows.append((field.name, field.ordinal, field.required, node.type_name, node.kind, wire, ref_id))
+    return rows
+
+
+def source_files(source_dir: Path) -> List[Path]:
+    """Return the JSON source files of a protocol model, sorted by name."""
+    return sorted(source_dir.glob("*.json"))
+
+
+def stat_digest(files: List[Path]) -> bytes:
+    """Return the digest of the names, sizes and modification times of files."""
+    digest = hashlib.sha256()
+    for path in files:
+        stat = path.stat()
+        digest.update(f'{path.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode('utf-8'))
+    return digest.digest()
+
+
+def content_digest(files: List[Path]) -> bytes:
+    """Return the digest of the names and contents of files."""
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(path.name.encode('utf-8') + b'\0')
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.digest()
+
+
+def parse_sources(files: List[Path]) -> Dict[str, Any]:
+    """
+    Parse the JSON sources, resolve the schemas and split them into snapshot entries.
+
+    Returns:
+        Dictionary with 'meta' (packet id map included), 'packets', 'definitions',
+        'enums' and 'types'
+    """
+    packets = {}
+    definitions = {}
+    enums = {}
+    types = {}
+    packet_ids = {}
+    meta = {'minecraft_version': None, 'protocol_version': None}
+
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if path.name == PROTOCOL_DOC_FILENAME:
+            for item in data:
+                if 'enum_values' in item:
+                    enums[item['name']] = {
+                        'id': item['id'],
+                        'values': [(value['value'], value['name']) for value in item['enum_values']]
+                    }
+                else:
+                    types[item['name']] = item
+            continue
+
+        if path.name.startswith("enum_"):
+            title = data.get('title', '')
+            if title and 'enum' in data:
+                enums.setdefault(title, {'id': None, 'values': list(enumerate(data['enum']))})
+            continue
+
+        if not isinstance(data, dict) or '$metaProperties' not in data:
+            continue
+
+        name = data.get('title', path.stem)
+        ir = SchemaIR(data.get('definitions', {}))
+        schema = {key: value for key, value in resolve_schema(data).items() if key != 'definitions'}
+        packet_definitions = data.get('definitions')
+        for ref_id, definition in (packet_definitions or {}).items():
+            definitions[ref_id] = {'schema': resolve_schema(definition), 'fields': field_table(ir, definition)}
+        packet_id = data['$metaProperties'].get('[cereal:packet]')
+        packets[name] = {
+            'schema': schema,
+            'fields': field_table(ir, data),
+            'definitions': None if packet_definitions is None else list(packet_definitions),
+            'packet_id': packet_id,
+            'file': path.name
+        }
+        if isinstance(packet_id, int):
+            packet_ids[packet_id] = name
+        meta['minecraft_version'] = data.get('x-minecraft-version', meta['minecraft_version'])
+        meta['protocol_version'] = data.get('x-protocol-version', meta['protocol_version'])
+
+    meta['packet_ids'] = packet_ids
+    return {'meta': meta, 'packets': packets, 'definitions': definitions, 'enums': enums, 'types': types}
+
+
+def write_snapshot(model: Dict[str, Any], snapshot_path: Path, stats: bytes, contents: bytes):
+    """Write a model to snapshot_path, replacing any previous snapshot atomically."""
+    blobs = bytearray()
+
+    def add(value: Any) -> Tuple[int, int]:
+        blob = marshal.dumps(value)
+        offset = SNAPSHOT_HEADER.size + len(blobs)
+        blobs.extend(blob)
+        return offset, len(blob)
+
+    index = {'meta': add(model['meta'])}
+    for section in ('packets', 'definitions', 'enums', 'types'):
+        index[section] = {name: add(value) for name, value in model[section].items()}
+
+    index_blob = marshal.dumps(index)
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, sys.version_info[0], sys.version_info[1],
+        stats, contents, SNAPSHOT_HEADER.size + len(blobs), len(index_blob)
+    )
+
+    temp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        f.write(blobs)
+        f.write(index_blob)
+    os.replace(temp_path, snapshot_path)
+
+
+def read_header(snapshot_path: Path) -> Optional[Tuple[bytes, bytes]]:
+    """Return the (stat digest, content digest) of a usable snapshot, or None."""
+    try:
+        with open(snapshot_path, 'rb') as f:
+            header = f.read(SNAPSHOT_HEADER.size)
+    except OSError:
+        return None
+    if len(header) < SNAPSHOT_HEADER.size:
+        return None
+    magic, version, major, minor, stats, contents, _, _ = SNAPSHOT_HEADER.unpack(header)
+    if (magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION
+            or (major, minor) != sys.version_info[:2]):
+        return None
+    return stats, contents
+
+
+class ProtocolSnapshot:
+    """Read-only view of a snapshot file; entries are unmarshalled on first use."""
+
+    def __init__(self, snapshot_path: Path):
+        """
+        Map a snapshot file and read its index.
+
+        Raises:
+            SnapshotError: If the file is missing, too short, truncated or not
+                a snapshot of this format and Python version
+        """
+        self.path = snapshot_path
+        try:
+            with open(snapshot_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                # mmap rejects empty files; shorter ones cannot hold a header
+                if size >= SNAPSHOT_HEADER.size:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Could not map {snapshot_path}: {e}")
+        if size < SNAPSHOT_HEADER.size:
+            raise SnapshotError(f"{snapshot_path} is too short to be a protocol snapshot ({size} bytes)")
+
+        try:
+            self._open(size)
+        except SnapshotError:
+            self._map.close()
+            raise
+
+    def _open(self, size: int):
+        """Check the header and read the index and meta entry."""
+        magic, version, major, minor, _, _, index_offset, index_size = SNAPSHOT_HEADER.unpack_from(self._map)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotError(f"{self.path} is not a version {SNAPSHOT_FORMAT_VERSION} protocol snapshot")
+        if (major, minor) != sys.version_info[:2]:
+            raise SnapshotError(f"{self.path} was written by Python {major}.{minor}")
+        if index_offset < SNAPSHOT_HEADER.size or index_offset + index_size != size:
+            raise SnapshotError(f"{self.path} is truncated (index at {index_offset}+{index_size}, {size} bytes)")
+
+        try:
+            self._index = self._load(index_offset, index_size)
+            meta = self._load(*self._index['meta'])
+        except (EOFError, ValueError, TypeError, KeyError) as e:
+            raise SnapshotError(f"{self.path} has a corrupt index: {e}")
+        self._entries: Dict[Tuple[str, str], Any] = {}
+        self.minecraft_version = meta['minecraft_version']
+        self.protocol_version = meta['protocol_version']
+        self.packet_ids: Dict[int, str] = meta['packet_ids']
+
+    def _load(self, offset: int, size: int) -> Any:
+        """Unmarshal one blob of the file."""
+        return marshal.loads(self._map[offset:offset + size])
+
+    def _entry(self, section: str, name: str) -> Any:
+        """Return an entry of a section, unmarshalling it on first use."""
+        key = (section, name)
+        if key not in self._entries:
+            self._entries[key] = self._load(*self._index[section][name])
+        return self._entries[key]
+
+    @property
+    def packet_names(self) -> List[str]:
+        """Names of all packets, sorted."""
+        return sorted(self._index['packets'])
+
+    @property
+    def definition_ids(self) -> List[str]:
+        """Ids of all definitions."""
+        return list(self._index['definitions'])
+
+    @property
+    def enum_names(self) -> List[str]:
+        """Names of all enums."""
+        return list(self._index['enums'])
+
+    @property
+    def type_names(self) -> List[str]:
+        """Names of the protocol document types that are not enums."""
+        return list(self._index['types'])
+
+    def packet(self, name: str) -> Dict[str, Any]:
+        """
+        Return the resolved schema of a packet, definitions included.
+
+        Properties are in serialization order. The returned dictionaries are
+        shared between calls and must not be modified.
+        """
+        entry = self._entry('packets', name)
+        schema = dict(entry['schema'])
+        if entry['definitions'] is not None:
+            schema['definitions'] = {ref_id: self.definition(ref_id) for ref_id in entry['definitions']}
+        return schema
+
+    def packet_fields(self, name: str) -> List[SnapshotField]:
+        """Return the top-level fields of a packet in serialization order."""
+        return [SnapshotField._make(row) for row in self._entry('packets', name)['fields']]
+
+    def packet_id(self, name: str) -> Optional[int]:
+        """Return the [cereal:packet] id of a packet."""
+        return self._entry('packets', name)['packet_id']
+
+    def packet_file(self, name: str) -> str:
+        """Return the schema file name of a packet."""
+        return self._entry('packets', name)['file']
+
+    def packet_by_id(self, packet_id: int) -> Optional[str]:
+        """Return the name of the packet with an id, or None."""
+        return self.packet_ids.get(packet_id)
+
+    def definition(self, ref_id: str) -> Dict[str, Any]:
+        """Return the resolved schema of a definition by id."""
+        return self._entry('definitions', ref_id)['schema']
+
+    def definition_fields(self, ref_id: str) -> List[SnapshotField]:
+        """Return the fields of a definition in serialization order (empty unless an object)."""
+        return [SnapshotField._make(row) for row in self._entry('definitions', ref_id)['fields']]
+
+    def enum(self, name: str) -> Dict[str, Any]:
+        """Return an enum as {'id': enum id or None, 'values': [(value, name), ...]}."""
+        return self._entry('enums', name)
+
+    def protocol_type(self, name: str) -> Dict[str, Any]:
+        """Return a protocol document entry that is not an enum."""
+        return self._entry('types', name)
+
+    def iter_packets(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (name, schema) of every packet, sorted by name."""
+        for name in self.packet_names:
+            yield name, self.packet(name)
+
+    def close(self):
+        """Unmap the file."""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_snapshot(source_dir: Path, snapshot_path: Optional[Path] = None,
+                  rebuild: bool = False) -> ProtocolSnapshot:
+    """
+    Open the snapshot of source_dir, rebuilding it first if its sources changed.
+
+    A snapshot that cannot be opened (empty, truncated or corrupt) is rebuilt.
+
+    Args:
+        source_dir: Directory containing the JSON files
+        snapshot_path: Snapshot file (default: ./protocol_snapshot.bin in script directory)
+        rebuild: Rebuild even if the snapshot is up to date
+
+    Returns:
+        The opened ProtocolSnapshot
+    """
+    snapshot_path = snapshot_path or Path(__file__).parent / DEFAULT_SNAPSHOT_FILENAME
+    files = source_files(source_dir)
+    stats = stat_digest(files)
+    header = None if rebuild else read_header(snapshot_path)
+
+    if header is None or header[0] != stats:
+        contents = content_digest(files)
+        if header is not None and header[1] == contents:
+            # Only the stats changed: keep the snapshot, record the new stats
+            with open(snapshot_path, 'r+b') as f:
+                f.seek(STAT_DIGEST_OFFSET)
+                f.write(stats)
+        else:
+            write_snapshot(parse_sources(files), snapshot_path, stats, contents)
+
+    try:
+        return ProtocolSnapshot(snapshot_path)
+    except SnapshotError:
+        write_snapshot(parse_sources(files), snapshot_path, stats, content_digest(files))
+        return ProtocolSnapshot(snapshot_path)
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Build or refresh the binary snapshot of the parsed protocol JSON.")
+    parser.add_argument('input_path', nargs='?', type=Path,
+                        help="Directory containing JSON files (default: script directory)")
+    parser.add_argument('snapshot_path', nargs='?', type=Path,
+                        help="Snapshot file (default: ./protocol_snapshot.bin in script directory)")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Rebuild the snapshot even if it is up to date")
+    args = parser.parse_args()
+
+    input_path = args.input_path or Path(__file__).parent
+    snapshot_path = args.snapshot_path or Path(__file__).parent / DEFAULT_SNAPSHOT_FILENAME
+
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        snapshot = load_snapshot(input_path, snapshot_path, args.rebuild)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not build the snapshot: {e}")
+        sys.exit(1)
+    with snapshot:
+        elapsed = time.perf_counter() - start
+        print(f"✓ Snapshot of {len(snapshot.packet_names)} packets, {len(snapshot.definition_ids)} definitions, "
+              f"{len(snapshot.enum_names)} enums and {len(snapshot.type_names)} types "
+              f"(protocol {snapshot.protocol_version})")
+    print(f"✓ Output file: {snapshot_path} ({snapshot_path.stat().st_size} bytes, {elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Diff two protocol versions of the JSON schemas and write a changelog.
+
+Both json/ trees are indexed with Merkle-style hashes: the hash of a schema
+node covers its own keys and the hashes of its children, and a $ref hashes as
+the definition it points at. Two packets, definitions or fields with equal
+hashes are identical, so unchanged subtrees are skipped with one comparison
+and only the nodes on the path to a change are visited.
+
+Reported changes:
+- Added, removed and renumbered packets
+- Added and removed fields, and changes of field type, field index,
+  required flag, inline enum values and oneOf variants
+- Added, removed and modified definitions (types), listed once rather than
+  under every packet that uses them
+- Added, removed and displaced enum values from __protocoldoc.json
+
+Descriptions and version stamps are not part of the hashes, so documentation
+only edits do not show up as changes.
+
+The output follows the layout of the changelog_*.md files (New Packets,
+Modified Packets, Modified Enums, ...). The hand written "Raw Protocol
+Version Changelog" section is not generated.
+
+Usage:
+    python schema_diff.py old_path new_path [output_file]
+
+    old_path: Directory containing the JSON files of the previous version
+    new_path: Directory containing the JSON files of the new version
+    output_file: Optional path of the changelog (default: print to stdout)
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from schema_ir import PROTOCOL_DOC_FILENAME, get_underlying_type
+
+
+# Keys that do not change the wire format and are left out of the hashes
+IGNORED_KEYS = {
+    'description', 'definitions', '$metaProperties', '$schema', '$id',
+    'x-format-version', 'x-minecraft-version', 'x-protocol-version',
+}
+
+
+class SchemaTree:
+    """Packets, definitions and enums of one json/ tree, with Merkle hashes."""
+
+    def __init__(self, source_dir: Path):
+        """Load every packet schema and the protocol document of a tree."""
+        self.source_dir = source_dir
+        self.packets: Dict[str, Dict[str, Any]] = {}
+        self.definitions: Dict[str, Dict[str, Any]] = {}
+        self.enums: Dict[str, List[Tuple[Any, str]]] = {}
+        self.minecraft_version = None
+        self.protocol_version = None
+        self._hashes: Dict[int, str] = {}
+        self._definition_hashes: Dict[str, str] = {}
+        self._in_progress = set()
+        self._load()
+
+    def _load(self):
+        """Read the schema files of the tree."""
+        for json_file in sorted(self.source_dir.glob("*.json")):
+            if json_file.name.startswith("enum_") or json_file.name == PROTOCOL_DOC_FILENAME:
+                continue
+            with open(json_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or '$metaProperties' not in data:
+                continue
+            self.packets[data.get('title', json_file.stem)] = data
+            # Definition ids are derived from the type, so packets share them
+            self.definitions.update(data.get('definitions', {}))
+            self.minecraft_version = data.get('x-minecraft-version', self.minecraft_version)
+            self.protocol_version = data.get('x-protocol-version', self.protocol_version)
+
+        protocol_doc = self.source_dir / PROTOCOL_DOC_FILENAME
+        if protocol_doc.exists():
+            with open(protocol_doc, 'r', encoding='utf-8') as f:
+                for item in json.load(f):
+                    if 'enum_values' in item:
+                        self.enums[item['name']] = [(value['value'], value['name']) for value in item['enum_values']]
+
+    def node_hash(self, node: Any) -> str:
+        """Return the Merkle hash of a schema node."""
+        if not isinstance(node, dict):
+            if isinstance(node, list):
+                return self._digest([self.node_hash(item) for item in node])
+            return self._digest(node)
+
+        # Schema dicts are never mutated, so their identity keys the memo
+        cached = self._hashes.get(id(node))
+        if cached is not None:
+            return cached
+
+        parts = {}
+        for key, value in node.items():
+            if key in IGNORED_KEYS:
+                continue
+            if key == '$ref':
+                parts[key] = self.definition_hash(value.split('/')[-1])
+            elif isinstance(value, (dict, list)):
+                parts[key] = self.node_hash(value)
+            else:
+                parts[key] = value
+        digest = self._digest(parts)
+        self._hashes[id(node)] = digest
+        return digest
+
+    def definition_hash(self, ref_id: str) -> str:
+        """Return the Merkle hash of a definition, by id."""
+        if ref_id in self._definition_hashes:
+            return self._definition_hashes[ref_id]
+        if ref_id not in self.definitions:
+            return self._digest(['unresolved', ref_id])
+        if ref_id in self._in_progress:
+            # Recursive reference: the enclosing definition's hash covers it
+            return self._digest(['recursive', ref_id])
+
+        self._in_progress.add(ref_id)
+        digest = self.node_hash(self.definitions[ref_id])
+        self._in_progress.discard(ref_id)
+        self._definition_hashes[ref_id] = digest
+        return digest
+
+    def packet_hash(self, name: str) -> str:
+        """Return the Merkle hash of a packet, including its id."""
+        packet = self.packets[name]
+        return self._digest([self.node_hash(packet), self.packet_id(name)])
+
+    def packet_id(self, name: str) -> Optional[int]:
+        """Return the [cereal:packet] id of a packet."""
+        return self.packets[name].get('$metaProperties', {}).get('[cereal:packet]')
+
+    def definition_title(self, ref_id: str) -> str:
+        """Return the title of a definition, or its id if it has none."""
+        return self.definitions.get(ref_id, {}).get('title', ref_id)
+
+    def type_name(self, field: Dict[str, Any]) -> str:
+        """Return the display type of a field, as shown in the generated pages."""
+        if '$ref' in field:
+            return self.definition_title(field['$ref'].split('/')[-1])
+        return get_underlying_type(field, self.definitions)
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        """Hash a JSON-serializable value."""
+        return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class SchemaDiff:
+    """Structural differences between an old and a new SchemaTree."""
+
+    def __init__(self, old: SchemaTree, new: SchemaTree):
+        """Compare two loaded trees."""
+        self.old = old
+        self.new = new
+        self.added_packets: List[str] = []
+        self.removed_packets: List[str] = []
+        self.modified_packets: Dict[str, List[str]] = {}
+        self.added_types: List[str] = []
+        self.removed_types: List[str] = []
+        self.modified_types: Dict[str, List[str]] = {}
+        self.added_enums: List[str] = []
+        self.removed_enums: List[str] = []
+        self.modified_enums: Dict[str, List[str]] = {}
+        self._compare()
+
+    def _compare(self):
+        """Fill in every change between the two trees."""
+        old, new = self.old, self.new
+
+        for name in new.packets:
+            if name not in old.packets:
+                self.added_packets.append(name)
+            elif old.packet_hash(name) != new.packet_hash(name):
+                changes = []
+                if old.packet_id(name) != new.packet_id(name):
+                    changes.append(f"Changed packet id from {old.packet_id(name)} to {new.packet_id(name)}")
+                changes += self.compare_object(old.packets[name], new.packets[name], '')
+                if changes:
+                    self.modified_packets[name] = changes
+        self.removed_packets = [name for name in old.packets if name not in new.packets]
+
+        for ref_id in new.definitions:
+            if ref_id not in old.definitions:
+                self.added_types.append(ref_id)
+            elif old.node_hash(old.definitions[ref_id]) != new.node_hash(new.definitions[ref_id]):
+                # Only the definition's own fields; changed types it uses are listed separately
+                changes = self.compare_field(old.definitions[ref_id], new.definitions[ref_id], '')
+                if changes:
+                    self.modified_types[ref_id] = changes
+        self.removed_types = [ref_id for ref_id in old.definitions if ref_id not in new.definitions]
+
+        for name, values in new.enums.items():
+            if name not in old.enums:
+                self.added_enums.append(name)
+            elif old.enums[name] != values:
+                self.modified_enums[name] = self.compare_enum_values(old.enums[name], values)
+        self.removed_enums = [name for name in old.enums if name not in new.enums]
+
+    def compare_object(self, old_schema: Dict[str, Any], new_schema: Dict[str, Any], path: str) -> List[str]:
+        """Compare the properties of two object schemas."""
+        changes = []
+        old_props = old_schema.get('properties', {})
+        new_props = new_schema.get('properties', {})
+        old_required = set(old_schema.get('required', []))
+        new_required = set(new_schema.get('required', []))
+
+        for field_name, new_field in new_props.items():
+            label = f"{path}{field_name}"
+            if field_name not in old_props:
+                changes.append(f"Added field '{label}' ({self.new.type_name(new_field)})")
+                continue
+            old_field = old_props[field_name]
+            if (field_name in old_required) != (field_name in new_required):
+                state = 'required' if field_name in new_required else 'optional'
+                changes.append(f"Field '{label}' is now {state}")
+            if self.old.node_hash(old_field) != self.new.node_hash(new_field):
+                changes += self.compare_field(old_field, new_field, label)
+
+        for field_name in old_props:
+            if field_name not in new_props:
+                changes.append(f"Removed field '{path}{field_name}'")
+        return changes
+
+    def compare_field(self, old_field: Dict[str, Any], new_field: Dict[str, Any], label: str) -> List[str]:
+        """
+        Compare two versions of a field (or of a definition when label is '').
+
+        Only called for fields whose hashes differ.
+        """
+        old, new = self.old, self.new
+        subject = f" of '{label}'" if label else ''
+        prefix = f"{label}." if label else ''
+        changes = []
+
+        old_type, new_type = old.type_name(old_field), new.type_name(new_field)
+        if old_type != new_type:
+            changes.append(f"Changed type{subject} from {old_type} to {new_type}")
+
+        old_index = old_field.get('x-ordinal-index')
+        new_index = new_field.get('x-ordinal-index')
+        if old_index != new_index:
+            changes.append(f"Changed field index{subject} from {old_index} to {new_index}")
+
+        if '$ref' in old_field and '$ref' in new_field:
+            old_ref = old_field['$ref'].split('/')[-1]
+            new_ref = new_field['$ref'].split('/')[-1]
+            if old_ref == new_ref and old.definition_hash(old_ref) != new.definition_hash(new_ref) and label:
+                changes.append(f"Modified type {new_type}{subject}")
+        elif old_field.get('type') == 'object' and new_field.get('type') == 'object':
+            changes += self.compare_object(old_field, new_field, prefix)
+            if 'additionalProperties' in old_field and 'additionalProperties' in new_field:
+                changes += self._compare_child(old_field, new_field, 'additionalProperties', f"{label}{{}}")
+        elif old_field.get('type') == 'array' and new_field.get('type') == 'array':
+            changes += self._compare_child(old_field, new_field, 'items', f"{label}[]")
+
+        if 'oneOf' in old_field and 'oneOf' in new_field:
+            old_variants = [old.type_name(variant) for variant in old_field['oneOf']]
+            new_variants = [new.type_name(variant) for variant in new_field['oneOf']]
+            if old_variants != new_variants:
+                changes.append(f"Changed oneOf variants{subject} from [{', '.join(old_variants)}] "
+                               f"to [{', '.join(new_variants)}]")
+            else:
+                for idx, (old_variant, new_variant) in enumerate(zip(old_field['oneOf'], new_field['oneOf'])):
+                    if old.node_hash(old_variant) != new.node_hash(new_variant):
+                        changes += self.compare_field(old_variant, new_variant, f"{label}<{idx}>")
+
+        old_enum, new_enum = old_field.get('enum', []), new_field.get('enum', [])
+        for value in new_enum:
+            if value not in old_enum:
+                changes.append(f"Added enum value {value}{subject}")
+        for value in old_enum:
+            if value not in new_enum:
+                changes.append(f"Removed enum value {value}{subject}")
+
+        old_options = old_field.get('x-serialization-options', [])
+        new_options = new_field.get('x-serialization-options', [])
+        if old_options != new_options:
+            changes.append(f"Changed serialization options{subject} from {old_options} to {new_options}")
+        return changes
+
+    def _compare_child(self, old_field: Dict[str, Any], new_field: Dict[str, Any],
+                       key: str, label: str) -> List[str]:
+        """Compare the item or map value schemas of two fields, if they differ."""
+        old_child, new_child = old_field.get(key), new_field.get(key)
+        if not isinstance(old_child, dict) or not isinstance(new_child, dict):
+            return []
+        if self.old.node_hash(old_child) == self.new.node_hash(new_child):
+            return []
+        return self.compare_field(old_child, new_child, label)
+
+    @staticmethod
+    def compare_enum_values(old_values: List[Tuple[Any, str]], new_values: List[Tuple[Any, str]]) -> List[str]:
+        """Compare the (value, name) lists of an enum, in changelog wording."""
+        old_by_name = {name: value for value, name in old_values}
+        new_names = {name for _, name in new_values}
+        changes = []
+        for value, name in new_values:
+            if name not in old_by_name:
+                changes.append(f"Added {name} ({value}) []")
+            elif old_by_name[name] != value:
+                if isinstance(value, int) and isinstance(old_by_name[name], int):
+                    changes.append(f"Displaced {name}")
+                else:
+                    changes.append(f"Changed {name} from {old_by_name[name]} to {value}")
+        for _, name in old_values:
+            if name not in new_names:
+                changes.append(f"Removed {name}")
+        return changes
+
+    def render_changelog(self) -> str:
+        """Return the changes as a changelog_*.md document."""
+        old, new = self.old, self.new
+        lines = ["# Minecraft Network Protocol Docs"]
+        if old.protocol_version == new.protocol_version:
+            since = "protocol version unchanged"
+        else:
+            since = f"changes since {old.protocol_version}"
+        lines.append(f"For {new.minecraft_version}, Network Protocol Version {new.protocol_version} ({since})")
+
+        if self.added_packets:
+            lines += ['', '## New Packets']
+            for name in sorted(self.added_packets):
+                lines.append(f"  - {name} ({new.packet_id(name)}) [docs/{name}.html]")
+        if self.removed_packets:
+            lines += ['', '## Removed Packets']
+            for name in sorted(self.removed_packets):
+                lines.append(f"  - {name} ({old.packet_id(name)})")
+        if self.modified_packets:
+            lines += ['', '## Modified Packets']
+            for name in sorted(self.modified_packets):
+                lines.append(f" * {name}")
+                lines += [f"   * {change}" for change in self.modified_packets[name]]
+                lines.append('')
+            lines.pop()
+
+        if self.added_types:
+            lines += ['', '## New Types']
+            lines += [f"  - {new.definition_title(ref_id)}" for ref_id in self._sorted_types(new, self.added_types)]
+        if self.removed_types:
+            lines += ['', '## Removed Types']
+            lines += [f"  - {old.definition_title(ref_id)}" for ref_id in self._sorted_types(old, self.removed_types)]
+        if self.modified_types:
+            lines += ['', '## Modified Types']
+            for ref_id in self._sorted_types(new, self.modified_types):
+                lines.append(f" * {new.definition_title(ref_id)}")
+                lines += [f"   * {change}" for change in self.modified_types[ref_id]]
+                lines.append('')
+            lines.pop()
+
+        if self.added_enums:
+            lines += ['', '## New Enums']
+            lines += [f"  - {name}" for name in sorted(self.added_enums)]
+        if self.removed_enums:
+            lines += ['', '## Removed Enums']
+            lines += [f"  - {name}" for name in sorted(self.removed_enums)]
+        if self.modified_enums:
+            lines += ['', '## Modified Enums', '']
+            for name in sorted(self.modified_enums):
+                lines.append(f"{name}:")
+                lines += [f"  {change}" for change in self.modified_enums[name]]
+                lines.append('')
+            lines.pop()
+
+        if len(lines) == 2:
+            lines += ['', 'No protocol changes.']
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _sorted_types(tree: SchemaTree, ref_ids) -> List[str]:
+        """Sort definition ids by title."""
+        return sorted(ref_ids, key=lambda ref_id: (tree.definition_title(ref_id), ref_id))
+
+
+def diff_trees(old_path: Path, new_path: Path) -> SchemaDiff:
+    """Load and compare two json/ trees."""
+    return SchemaDiff(SchemaTree(old_path), SchemaTree(new_path))
+
+
+def main():
+    """Main entry point for the script."""
+    if len(sys.argv) < 3:
+        print("Usage: python schema_diff.py old_path new_path [output_file]")
+        sys.exit(1)
+
+    old_path = Path(sys.argv[1])
+    new_path = Path(sys.argv[2])
+    for path in (old_path, new_path):
+        if not path.is_dir():
+            print(f"Error: Input path '{path}' is not a directory")
+            sys.exit(1)
+
+    changelog = diff_trees(old_path, new_path).render_changelog()
+
+    if len(sys.argv) > 3:
+        output_path = Path(sys.argv[3])
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(changelog)
+        print(f"✓ Output file: {output_path}")
+    else:
+        sys.stdout.write(changelog)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Normalized intermediate representation of the JSON packet schemas.
+
+The raw schema dictionaries leave every consumer to redo the same work for
+each field it meets: work out the display type (get_underlying_type), the
+x-ordinal-index order of the properties, whether the field is a $ref, an
+array, a oneOf union or a map, and the wire kind of its values. A SchemaIR
+does this once per schema node and keeps the result as immutable NamedTuples:
+- FieldType: display type, wire kind (classify_field), resolved $ref, array
+  item, map key/value, oneOf variants with their control values and control
+  value type, inline enum values and enum title, and the fields of objects
+- Field: one property of an object, with its ordinal, required flag and
+  description, in serialization order
+
+$refs are kept as TypeRef (id, title, resolved) rather than followed, so
+recursive definitions need no special handling; SchemaIR.definition resolves
+them. Nodes are built on first use and memoized by the identity of their
+schema dict, so a definition used in twenty places is resolved once per
+schema file. Each FieldType keeps its source dict in .schema for details the
+IR does not cover.
+
+This module is a leaf: it holds the schema rules the tools share
+(get_underlying_type, get_ordinal_index, sorted_properties, has_nested_table,
+classify_field, map_schemas) and imports none of them. PacketDocGenerator
+renders its field tables from the IR, and the codec, validator, record and
+wire size compilers classify fields through SchemaIR.classify.
+
+Usage:
+    python schema_ir.py [input_path]
+
+    input_path: Optional path to directory containing JSON files (default: script directory)
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# Protocol document of a json/ tree (enums and types, not a packet schema)
+PROTOCOL_DOC_FILENAME = '__protocoldoc.json'
+
+# Ordinal of properties without an x-ordinal-index, which sort last
+NO_ORDINAL = 9999
+
+# struct format characters for fixed-width underlying types
+FIXED_FORMATS = {
+    'boolean': '?',
+    'int8': 'b',
+    'uint8': 'B',
+    'int16': 'h',
+    'uint16': 'H',
+    'int32': 'i',
+    'uint32': 'I',
+    'int64': 'q',
+    'uint64': 'Q',
+    'float': 'f',
+    'double': 'd',
+}
+
+DEFAULT_CONTROL_VALUE_TYPE = 'varuint32'
+
+
+def get_underlying_type(field_data: Dict[str, Any], definitions: Dict[str, Any]) -> str:
+    """
+    Extract the underlying type from field data.
+
+    Prioritizes x-underlying-type over standard type field.
+    Handles arrays, references, enums, and oneOf unions.
+    For enums: uses x-underlying-type only if "Enum-as-Value" is in serialization options,
+    otherwise falls back to the regular type.
+    """
+
+    serialization_options = None
+    if 'x-serialization-options' in field_data:
+        serialization_options = field_data['x-serialization-options']
+
+    # Check for x-underlying-type first (preferred)
+    if 'x-underlying-type' in field_data:
+        # For enums, only use x-underlying-type if "Enum-as-Value" is present
+        if 'enum' in field_data:
+            if serialization_options and 'Enum-as-Value' in serialization_options:
+                if 'Compression' in serialization_options:
+                    return 'var'+ field_data['x-underlying-type']
+
+                return field_data['x-underlying-type']
+            # Fall back to regular type for enums without Enum-as-Value
+            return field_data.get('type', 'unknown')
+
+        # For non-enums, handle compression
+        if serialization_options:
+            if 'Compression' in serialization_options:
+                return 'var'+ field_data['x-underlying-type']
+
+        return field_data['x-underlying-type']
+
+    # Check if it's an array
+    if field_data.get('type') == 'array':
+        items = field_data.get('items', {})
+        if '$ref' in items:
+            ref_id = items['$ref'].split('/')[-1]
+            if (definitions and ref_id in definitions):
+                ref_schema = definitions[ref_id]
+                ref_title = ref_schema.get('title', ref_id)
+                return  f"array&lt;{ref_title}&gt;"
+
+            return f"array&lt;{ref_id}&gt;"
+        elif 'x-underlying-type' in items:
+            return f"array&lt;{items['x-underlying-type']}&gt;"
+        else:
+            item_type = items.get('type', 'unknown')
+            return f"array&lt;{item_type}&gt;"
+
+    # Check for oneOf (union types)
+    if 'oneOf' in field_data:
+        return 'oneOf'
+
+    # Check for $ref
+    if '$ref' in field_data:
+        ref_id = field_data['$ref'].split('/')[-1]
+        # Try to resolve the ref to get the title
+        if definitions and ref_id in definitions:
+            ref_schema = definitions[ref_id]
+            return ref_schema.get('title', ref_id)
+        return ref_id
+
+    # Check for enum
+    if 'enum' in field_data:
+        return field_data.get('title', 'enum')
+
+    # Check for additionalProperties
+    if field_data.get('type') == 'object' and 'additionalProperties' in field_data:
+        additional_props = field_data['additionalProperties']
+        if additional_props.get('type') == 'object' and 'properties' in additional_props:
+            props = additional_props['properties']
+            key_type = 'string'
+            value_type = 'object'
+            if 'key' in props:
+                key_type = get_underlying_type(props['key'], definitions)
+            if 'value' in props:
+                value_type = get_underlying_type(props['value'], definitions)
+            return f"object&lt;{key_type}, {value_type}&gt;"
+        else:
+            value_type = get_underlying_type(additional_props, definitions)
+            return f"object&lt;string, {value_type}&gt;"
+
+    # Fallback to basic type
+    return field_data.get('type', 'unknown')
+
+
+def get_ordinal_index(field_data: Dict[str, Any]) -> int:
+    """Get the ordinal index, defaulting to high value if not present."""
+    return field_data.get('x-ordinal-index', NO_ORDINAL)
+
+
+def sorted_properties(schema: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Return properties in serialization order."""
+    return sorted(schema.get('properties', {}).items(), key=lambda x: get_ordinal_index(x[1]))
+
+
+def has_nested_table(schema: Dict[str, Any]) -> bool:
+    """Whether a schema is an object with properties (rendered as a table of its own)."""
+    return schema.get('type') == 'object' and bool(schema.get('properties'))
+
+
+class CodecError(ValueError):
+    """Raised when a schema cannot be compiled or a payload cannot be encoded/decoded."""
+
+
+def classify_field(field: Dict[str, Any], definitions: Dict[str, Any]) -> Tuple[str, Any]:
+    """
+    Work out the wire kind of a field schema.
+
+    Returns one of:
+        ('ref', $ref), ('oneof', field), ('array', field), ('map', field),
+        ('object', field), ('empty', None), ('varint', base type),
+        ('fixed', (byte order, struct format)), ('string', None)
+    """
+    if '$ref' in field:
+        return 'ref', field['$ref']
+    if 'oneOf' in field:
+        return 'oneof', field
+    field_type = field.get('type')
+    if field_type == 'array':
+        return 'array', field
+    if field_type == 'object':
+        if 'additionalProperties' in field:
+            return 'map', field
+        return 'object', field
+    if field_type in (None, 'null') and 'enum' not in field:
+        return 'empty', None
+
+    wire_type = get_underlying_type(field, definitions)
+    if wire_type.startswith('var'):
+        base_type = wire_type[3:]
+        if base_type not in FIXED_FORMATS or base_type in ('float', 'double'):
+            raise CodecError(f"Cannot compress type {base_type}")
+        return 'varint', base_type
+    if wire_type in FIXED_FORMATS:
+        byte_order = '>' if 'Big Endian' in field.get('x-serialization-options', []) else '<'
+        return 'fixed', (byte_order, FIXED_FORMATS[wire_type])
+    if wire_type == 'string':
+        return 'string', None
+    raise CodecError(f"Unsupported wire type {wire_type}")
+
+
+def map_schemas(field: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return the (key, value) schemas of an additionalProperties map."""
+    additional_props = field['additionalProperties']
+    if additional_props.get('type') == 'object' and 'properties' in additional_props:
+        props = additional_props['properties']
+        return props.get('key', {'type': 'string'}), props.get('value', {})
+    return {'type': 'string'}, additional_props
+
+
+class TypeRef(NamedTuple):
+    """A $ref: the definition id, its title (the id if it has none) and whether it resolves."""
+    ref_id: str
+    title: str
+    resolved: bool
+
+
+class Field(NamedTuple):
+    """One property of an object schema."""
+    name: str
+    ordinal: int
+    required: bool
+    description: str
+    field_type: 'FieldType'
+
+
+class FieldType(NamedTuple):
+    """Resolved type of a field (or definition) schema."""
+    # Display type as shown in the pages (get_underlying_type, HTML escaped)
+    type_name: str
+    # Wire kind and info from classify_field, or ('unsupported', None)
+    kind: str
+    wire: Any
+    ref: Optional[TypeRef]
+    items: Optional['FieldType']
+    map_key: Optional['FieldType']
+    map_value: Optional['FieldType']
+    # additionalProperties schema of a map, as a node of its own
+    map_entry: Optional['FieldType']
+    variants: Optional[Tuple['FieldType', ...]]
+    control_values: Optional[Tuple[Any, ...]]
+    control_value_type: Optional[str]
+    enum_values: Optional[Tuple[str, ...]]
+    # title of the field schema ('' if none), which names external enums
+    title: str
+    # Properties in x-ordinal-index order, or None unless an object with properties
+    fields: Optional[Tuple[Field, ...]]
+    schema: Dict[str, Any]
+
+
+class SchemaIR:
+    """IR of one schema file, built lazily and memoized per schema node."""
+
+    def __init__(self, definitions: Dict[str, Any]):
+        """
+        Args:
+            definitions: Definitions the $refs of the file point into
+        """
+        self.definitions = definitions
+        # id(schema dict) -> (schema dict, node); the dict is kept so its id is not reused
+        self._nodes: Dict[int, Tuple[Dict[str, Any], FieldType]] = {}
+
+    def node(self, schema: Dict[str, Any]) -> FieldType:
+        """Return the IR node of a schema dict of this file."""
+        entry = self._nodes.get(id(schema))
+        if entry is None:
+            entry = self._nodes[id(schema)] = (schema, self._build(schema))
+        return entry[1]
+
+    def definition(self, ref_id: str) -> Optional[FieldType]:
+        """Return the IR node of a definition, or None if it does not exist."""
+        definition = self.definitions.get(ref_id)
+        return None if definition is None else self.node(definition)
+
+    def iter_nodes(self) -> Iterator[FieldType]:
+        """Yield every node built so far."""
+        for _, node in self._nodes.values():
+            yield node
+
+    def classify(self, schema: Dict[str, Any]) -> Tuple[str, Any]:
+        """
+        Return what classify_field returns for a schema dict, from its node.
+
+        Raises:
+            CodecError: If the schema has no supported wire type
+        """
+        node = self.node(schema)
+        if node.kind == 'unsupported':
+            # Raises with the reason, which the node does not keep
+            return classify_field(schema, self.definitions)
+        if node.kind == 'ref':
+            return 'ref', schema['$ref']
+        if node.kind in ('array', 'map', 'object', 'oneof'):
+            return node.kind, schema
+        return node.kind, node.wire
+
+    def fields(self, schema: Dict[str, Any]) -> Tuple[Field, ...]:
+        """Return the properties of an object schema in serialization order."""
+        return self.node(schema).fields or ()
+
+    def type_ref(self, ref: str) -> TypeRef:
+        """Resolve a $ref string."""
+        ref_id = ref.split('/')[-1]
+        if ref_id in self.definitions:
+            return TypeRef(ref_id, self.definitions[ref_id].get('title', ref_id), True)
+        return TypeRef(ref_id, ref_id, False)
+
+    def _build(self, schema: Dict[str, Any]) -> FieldType:
+        """Build the node of a schema dict (children through node(), so they are shared)."""
+        try:
+            kind, wire = classify_field(schema, self.definitions)
+        except CodecError:
+            kind, wire = 'unsupported', None
+        if kind in ('ref', 'array', 'map', 'object', 'oneof'):
+            # Their structure is in the node's own attributes
+            wire = None
+
+        ref = self.type_ref(schema['$ref']) if '$ref' in schema else None
+        if kind == 'ref':
+            wire = ref
+
+        items = map_key = map_value = map_entry = None
+        if schema.get('type') == 'array':
+            items = self.node(schema.get('items', {}))
+        if kind == 'map':
+            map_entry = self.node(schema['additionalProperties'])
+            key_schema, value_schema = map_schemas(schema)
+            map_key, map_value = self.node(key_schema), self.node(value_schema)
+
+        variants = control_values = control_value_type = None
+        if 'oneOf' in schema:
+            variants = tuple(self.node(variant) for variant in schema['oneOf'])
+            control_values = tuple(variant.get('x-ordinal-index', idx)
+                                   for idx, variant in enumerate(schema['oneOf']))
+            control_value_type = schema.get('x-control-value-type', DEFAULT_CONTROL_VALUE_TYPE)
+
+        fields = None
+        if has_nested_table(schema):
+            required = set(schema.get('required', []))
+            fields = tuple(
+                Field(name, get_ordinal_index(field), name in required,
+                      field.get('description', ''), self.node(field))
+                for name, field in sorted_properties(schema)
+            )
+
+        return FieldType(
+            type_name=get_underlying_type(schema, self.definitions),
+            kind=kind,
+            wire=wire,
+            ref=ref,
+            items=items,
+            map_key=map_key,
+            map_value=map_value,
+            map_entry=map_entry,
+            variants=variants,
+            control_values=control_values,
+            control_value_type=control_value_type,
+            enum_values=tuple(schema['enum']) if 'enum' in schema else None,
+            title=schema.get('title', ''),
+            fields=fields,
+            schema=schema
+        )
+
+
+def load_schema_irs(source_dir: Path) -> Dict[str, Tuple[SchemaIR, FieldType]]:
+    """Build the IR of every packet schema in source_dir; returns {name: (ir, packet node)}."""
+    irs = {}
+    for json_file in sorted(source_dir.glob("*.json")):
+        if json_file.name.startswith("enum_"):
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or '$metaProperties' not in data:
+            continue
+        ir = SchemaIR(data.get('definitions', {}))
+        irs[data.get('title', json_file.stem)] = (ir, ir.node(data))
+    return irs
+
+
+def main():
+    """Main entry point for the script."""
+    input_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent
+
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    irs = load_schema_irs(input_path)
+    if not irs:
+        print(f"Warning: No packet schemas found in {input_path}")
+        sys.exit(1)
+
+    nodes = 0
+    kinds: Dict[str, int] = {}
+    for ir, _ in irs.values():
+        for ref_id in ir.definitions:
+            ir.definition(ref_id)
+        for node in ir.iter_nodes():
+            nodes += 1
+            kinds[node.kind] = kinds.get(node.kind, 0) + 1
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Built the IR of {len(irs)} packet schemas ({nodes} nodes) in {elapsed:.2f} s")
+    for kind, count in sorted(kinds.items(), key=lambda x: -x[1]):
+        print(f"  {kind}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Load the dot/*.dot type trees into one indexed type graph and query it.
+
+Every .dot file is the tree of one type (digraph "<type>"). Each node carries
+a comment with its name, typeName, id, branchId, recurseId, attributes and
+notes; a node with a typeName is a field of that type, whose subtree is
+inlined below it, and a leaf (attributes 512) named after a type stands for
+that type. The files are parsed once into a TypeGraph holding:
+- The parsed tree of every type (nodes, children, edges)
+- An adjacency index of type references (type -> types used by its fields)
+- The reverse index (type -> types whose fields use it)
+
+so impact queries are set walks over the indexes instead of text searches:
+- Which types (or packets) transitively contain a type
+- The full closure of the types a type is built from
+- Which types are recursive: they reference themselves through their fields,
+  or have a node with a recurseId
+
+typeNames without a .dot file (templates such as TypedServerNetId<...>) are
+kept as leaves and listed as unresolved.
+
+The graph can also write the SVG views of html/svg/ without Graphviz: trees
+are laid out left to right, one column per depth, with the { rank = max }
+nodes in the last column as in the dot files.
+
+Usage:
+    python type_graph.py [dot_path] [--contains TYPE] [--closure TYPE] [--recursive]
+                         [--packets-only] [--svg OUTPUT_DIR]
+
+    dot_path: Optional path to directory containing .dot files (default: ../dot from script directory)
+    --contains TYPE: List the types that transitively contain TYPE
+    --closure TYPE: List every type TYPE is built from
+    --recursive: List the recursive types
+    --packets-only: Restrict --contains to packets
+    --svg OUTPUT_DIR: Render every type to OUTPUT_DIR/<file stem>.svg
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import deque
+from html import escape
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+# One statement of the generated dot files. Node attribute lists are matched
+# whole, quoted strings included, so text inside labels and notes (which may
+# span lines) is never read as a statement.
+STATEMENT_PATTERN = re.compile(
+    r'^(\d+) -> (\d+)$'
+    r'|^(\d+) \[((?:[^"\]]|"(?:[^"\\]|\\.)*")*)\];'
+    r'|\{ rank = max;([^}]*)\}',
+    re.MULTILINE
+)
+GRAPH_NAME_PATTERN = re.compile(r'digraph "((?:[^"\\]|\\.)*)"')
+ATTRIBUTE_PATTERN = re.compile(r'(\w+)=(?:"((?:[^"\\]|\\.)*)"|([^,\s]+))', re.DOTALL)
+COMMENT_FIELD_PATTERN = re.compile(r'(\w+): (?:"((?:[^"\\]|\\.)*)"|(-?\d+))', re.DOTALL)
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+
+# Node attribute flag of leaf nodes
+ATTRIBUTE_LEAF = 512
+
+# SVG layout, in px
+FONT_SIZE = 14
+CHAR_WIDTH = 7.2
+LINE_HEIGHT = 18
+NODE_PADDING = 24
+ROW_GAP = 18
+COLUMN_GAP = 60
+MARGIN = 8
+
+
+def unescape(text: str) -> str:
+    """Undo the backslash escapes of a dot quoted string."""
+    return ESCAPE_PATTERN.sub(r'\1', text)
+
+
+class DotNode(NamedTuple):
+    """One node of a type tree."""
+    node_id: int
+    label: str
+    name: str
+    type_name: str
+    branch_id: int
+    recurse_id: int
+    attributes: int
+    notes: str
+    shape: str
+    style: str
+
+
+class DotGraph(NamedTuple):
+    """The parsed tree of one type."""
+    name: str
+    path: Path
+    nodes: Dict[int, DotNode]
+    children: Dict[int, List[int]]
+    edges: List[Tuple[int, int]]
+    max_rank: Set[int]
+
+    def roots(self) -> List[int]:
+        """Return the nodes without a parent, in id order."""
+        targets = {target for _, target in self.edges}
+        return [node_id for node_id in self.nodes if node_id not in targets]
+
+    def type_references(self, type_names: Set[str]) -> Set[str]:
+        """Return the typeNames of the tree, and its leaves named after one of type_names."""
+        references = set()
+        for node in self.nodes.values():
+            if node.type_name:
+                references.add(node.type_name)
+            elif node.attributes & ATTRIBUTE_LEAF and node.name in type_names and node.name != self.name:
+                references.add(node.name)
+        return references
+
+
+def parse_node(node_id: int, attribute_text: str) -> DotNode:
+    """Parse the attribute list of a node statement."""
+    attributes = {}
+    for key, quoted, bare in ATTRIBUTE_PATTERN.findall(attribute_text):
+        attributes[key] = unescape(quoted) if quoted or not bare else bare
+
+    fields = {}
+    for key, quoted, number in COMMENT_FIELD_PATTERN.findall(attributes.get('comment', '')):
+        fields[key] = int(number) if number else unescape(quoted)
+
+    return DotNode(
+        node_id=node_id,
+        label=attributes.get('label', ''),
+        name=fields.get('name', ''),
+        type_name=fields.get('typeName', ''),
+        branch_id=fields.get('branchId', 0),
+        recurse_id=fields.get('recurseId', -1),
+        attributes=fields.get('attributes', 0),
+        notes=fields.get('notes', ''),
+        shape=attributes.get('shape', 'ellipse'),
+        style=attributes.get('style', ''),
+    )
+
+
+def parse_dot(text: str, path: Path) -> DotGraph:
+    """
+    Parse one generated .dot file.
+
+    Args:
+        text: Contents of the file
+        path: Path of the file, used for the name when the graph has none
+
+    Returns:
+        The parsed DotGraph
+    """
+    match = GRAPH_NAME_PATTERN.search(text)
+    name = unescape(match.group(1)) if match else path.stem
+
+    nodes: Dict[int, DotNode] = {}
+    children: Dict[int, List[int]] = {}
+    edges: List[Tuple[int, int]] = []
+    max_rank: Set[int] = set()
+    for source, target, node_id, attribute_text, rank in STATEMENT_PATTERN.findall(text):
+        if source:
+            edge = (int(source), int(target))
+            edges.append(edge)
+            children.setdefault(edge[0], []).append(edge[1])
+        elif node_id:
+            nodes[int(node_id)] = parse_node(int(node_id), attribute_text)
+        else:
+            max_rank.update(int(item) for item in rank.split(';') if item.strip())
+
+    return DotGraph(name, path, nodes, children, edges, max_rank)
+
+
+class TypeGraph:
+    """The type trees of a dot/ directory with type-reference indexes."""
+
+    def __init__(self, source_dir: Path):
+        """Parse every .dot file of source_dir and build the indexes."""
+        self.source_dir = source_dir
+        self.types: Dict[str, DotGraph] = {}
+        self.references: Dict[str, Set[str]] = {}
+        self.referrers: Dict[str, Set[str]] = {}
+        self.unresolved: Set[str] = set()
+        self._recursive: Optional[Set[str]] = None
+
+        for dot_file in sorted(source_dir.glob("*.dot")):
+            graph = parse_dot(dot_file.read_text(encoding='utf-8'), dot_file)
+            if graph.name:
+                self.types[graph.name] = graph
+
+        type_names = set(self.types)
+        for name, graph in self.types.items():
+            references = graph.type_references(type_names)
+            self.references[name] = references
+            for reference in references:
+                self.referrers.setdefault(reference, set()).add(name)
+                if reference not in self.types:
+                    self.unresolved.add(reference)
+
+    def is_packet(self, name: str) -> bool:
+        """Whether a type is a packet."""
+        return name.endswith('Packet')
+
+    def _walk(self, start: str, index: Dict[str, Set[str]]) -> Set[str]:
+        """Return every type reachable from start through index, start excluded."""
+        seen = set()
+        queue = deque(index.get(start, ()))
+        while queue:
+            name = queue.popleft()
+            if name in seen:
+                continue
+            seen.add(name)
+            queue.extend(index.get(name, ()))
+        seen.discard(start)
+        return seen
+
+    def containing(self, name: str, packets_only: bool = False) -> Set[str]:
+        """
+        Return the types that contain a type, directly or through other types.
+
+        Args:
+            name: Type name as in the digraph titles and typeNames
+            packets_only: Only return packets
+        """
+        found = self._walk(name, self.referrers)
+        if packets_only:
+            return {item for item in found if self.is_packet(item)}
+        return found
+
+    def closure(self, name: str) -> Set[str]:
+        """Return every type a type is built from, directly or transitively."""
+        return self._walk(name, self.references)
+
+    def recursive_types(self) -> Set[str]:
+        """Return the types that reach themselves through their fields or declare a recurseId."""
+        if self._recursive is None:
+            recursive = {
+                name for name, graph in self.types.items()
+                if any(node.recurse_id >= 0 for node in graph.nodes.values())
+            }
+            for component in self.strongly_connected_components():
+                if len(component) > 1:
+                    recursive.update(component)
+                elif component[0] in self.references.get(component[0], ()):
+                    recursive.add(component[0])
+            self._recursive = recursive
+        return self._recursive
+
+    def strongly_connected_components(self) -> List[List[str]]:
+        """Return the strongly connected components of the reference graph (Tarjan, iterative)."""
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        components = []
+
+        for root in self.types:
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.references.get(root, ()))))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                name, successors = work[-1]
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(sorted(self.references.get(successor, ())))))
+                        break
+                    if successor in on_stack:
+                        lowlink[name] = min(lowlink[name], index[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[name])
+                    if lowlink[name] == index[name]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == name:
+                                break
+                        components.append(component)
+        return components
+
+    def render_svg(self, name: str) -> str:
+        """Return the SVG view of a type tree."""
+        return render_svg(self.types[name])
+
+    def write_svgs(self, output_dir: Path, names: Optional[Iterable[str]] = None) -> int:
+        """
+        Write the SVG view of types to output_dir, named after their .dot files.
+
+        Args:
+            output_dir: Directory for the .svg files
+            names: Types to render (default: all)
+
+        Returns:
+            Number of files written
+        """
+        output_dir.mkdir(parents=True, exist_ok=True)
+        count = 0
+        for name in (self.types if names is None else names):
+            graph = self.types[name]
+            with open(output_dir / f'{graph.path.stem}.svg', 'w', encoding='utf-8') as f:
+                f.write(render_svg(graph))
+            count += 1
+        return count
+
+
+def node_size(node: DotNode) -> Tuple[float, float]:
+    """Return the (width, height) of a node's shape."""
+    lines = node.label.split('\n')
+    width = max(len(line) for line in lines) * CHAR_WIDTH + NODE_PADDING
+    height = len(lines) * LINE_HEIGHT + LINE_HEIGHT
+    if node.shape == 'diamond':
+        return width * 1.5, height * 1.5
+    return width, height
+
+
+def layout(graph: DotGraph) -> Dict[int, Tuple[float, float]]:
+    """
+    Place the nodes of a type tree left to right.
+
+    Columns are the depth of a node (the max rank nodes share the last one),
+    leaves take consecutive rows, and parents are centered on their children.
+    Nodes with several parents are placed under the first one.
+
+    Returns:
+        Center (x, y) of every node
+    """
+    sizes = {node_id: node_size(node) for node_id, node in graph.nodes.items()}
+    depth: Dict[int, int] = {}
+    tree_children: Dict[int, List[int]] = {}
+    queue = deque((root, 0) for root in graph.roots())
+    while queue:
+        node_id, level = queue.popleft()
+        if node_id in depth:
+            continue
+        depth[node_id] = level
+        tree_children[node_id] = [child for child in graph.children.get(node_id, []) if child not in depth]
+        queue.extend((child, level + 1) for child in tree_children[node_id])
+    # Nodes only reachable through a cycle start their own tree
+    for node_id in graph.nodes:
+        depth.setdefault(node_id, 0)
+        tree_children.setdefault(node_id, [])
+
+    last_column = max(depth.values(), default=0)
+    column = {node_id: last_column if node_id in graph.max_rank else level for node_id, level in depth.items()}
+    widths = [0.0] * (last_column + 1)
+    for node_id, (width, _) in sizes.items():
+        widths[column[node_id]] = max(widths[column[node_id]], width)
+    lefts = []
+    x = MARGIN
+    for width in widths:
+        lefts.append(x)
+        x += width + COLUMN_GAP
+
+    positions: Dict[int, Tuple[float, float]] = {}
+    cursor = [float(MARGIN)]
+    placed = set()
+
+    def place(node_id: int) -> float:
+        placed.add(node_id)
+        child_ys = [place(child) for child in tree_children[node_id] if child not in placed]
+        height = sizes[node_id][1]
+        if child_ys:
+            y = (child_ys[0] + child_ys[-1]) / 2
+            cursor[0] = max(cursor[0], y + height / 2 + ROW_GAP)
+        else:
+            y = cursor[0] + height / 2
+            cursor[0] += height + ROW_GAP
+        positions[node_id] = (lefts[column[node_id]] + widths[column[node_id]] / 2, y)
+        return y
+
+    for node_id in sorted(graph.nodes, key=lambda item: (depth[item], item)):
+        if node_id not in placed:
+            place(node_id)
+    return positions
+
+
+def render_svg(graph: DotGraph) -> str:
+    """Return the SVG of a type tree, in the element layout Graphviz uses."""
+    positions = layout(graph)
+    sizes = {node_id: node_size(node) for node_id, node in graph.nodes.items()}
+    width = max((positions[n][0] + sizes[n][0] / 2 for n in positions), default=0) + MARGIN
+    height = max((positions[n][1] + sizes[n][1] / 2 for n in positions), default=0) + MARGIN
+
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n',
+        f'<!-- Title: {escape(graph.name)} -->\n',
+        f'<svg width="{width:.0f}pt" height="{height:.0f}pt" viewBox="0.00 0.00 {width:.2f} {height:.2f}" '
+        'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n',
+        '<g id="graph0" class="graph">\n',
+        f'<title>{escape(graph.name)}</title>\n',
+        f'<polygon fill="white" stroke="none" points="0,0 {width:.2f},0 {width:.2f},{height:.2f} 0,{height:.2f}"/>\n',
+    ]
+
+    for index, (source, target) in enumerate(graph.edges, 1):
+        if source not in positions or target not in positions:
+            continue
+        (x1, y1), (x2, y2) = positions[source], positions[target]
+        x1 += sizes[source][0] / 2
+        x2 -= sizes[target][0] / 2 + 8
+        middle = (x1 + x2) / 2
+        parts.append(
+            f'<g id="edge{index}" class="edge">\n<title>{source}&#45;&gt;{target}</title>\n'
+            f'<path fill="none" stroke="black" d="M{x1:.2f},{y1:.2f}C{middle:.2f},{y1:.2f} {middle:.2f},{y2:.2f} {x2:.2f},{y2:.2f}"/>\n'
+            f'<polygon fill="black" stroke="black" points="{x2:.2f},{y2 - 3.5:.2f} {x2 + 8:.2f},{y2:.2f} {x2:.2f},{y2 + 3.5:.2f} {x2:.2f},{y2 - 3.5:.2f}"/>\n'
+            '</g>\n'
+        )
+
+    for index, (node_id, node) in enumerate(graph.nodes.items(), 1):
+        x, y = positions[node_id]
+        w, h = sizes[node_id]
+        dash = ' stroke-dasharray="1,5"' if node.style == 'dotted' else ''
+        if node.shape == 'diamond':
+            shape = (f'<polygon fill="none" stroke="black"{dash} points="{x:.2f},{y - h / 2:.2f} {x + w / 2:.2f},{y:.2f} '
+                     f'{x:.2f},{y + h / 2:.2f} {x - w / 2:.2f},{y:.2f} {x:.2f},{y - h / 2:.2f}"/>')
+        elif node.shape == 'note':
+            left, top, right, bottom = x - w / 2, y - h / 2, x + w / 2, y + h / 2
+            shape = (f'<polygon fill="none" stroke="black"{dash} points="{left:.2f},{top:.2f} {right - 6:.2f},{top:.2f} '
+                     f'{right:.2f},{top + 6:.2f} {right:.2f},{bottom:.2f} {left:.2f},{bottom:.2f} {left:.2f},{top:.2f}"/>')
+        else:
+            shape = f'<ellipse fill="none" stroke="black"{dash} cx="{x:.2f}" cy="{y:.2f}" rx="{w / 2:.2f}" ry="{h / 2:.2f}"/>'
+
+        lines = node.label.split('\n')
+        first_line_y = y - (len(lines) - 1) * LINE_HEIGHT / 2 + FONT_SIZE / 3
+        text = ''.join(
+            f'<text xml:space="preserve" text-anchor="middle" x="{x:.2f}" y="{first_line_y + i * LINE_HEIGHT:.2f}" '
+            f'font-family="Times New Roman,serif" font-size="{FONT_SIZE:.2f}">{escape(line)}</text>\n'
+            for i, line in enumerate(lines)
+        )
+        parts.append(
+            f'<g id="node{index}" class="node">\n<title>{node_id}</title>\n'
+            f'{shape}\n{text}</g>\n'
+        )
+
+    parts.append('</g>\n</svg>\n')
+    return ''.join(parts)
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Query the type graph of the .dot files.")
+    parser.add_argument('dot_path', nargs='?', type=Path,
+                        help="Directory containing .dot files (default: ../dot from script directory)")
+    parser.add_argument('--contains', metavar='TYPE',
+                        help="List the types that transitively contain TYPE")
+    parser.add_argument('--closure', metavar='TYPE',
+                        help="List every type TYPE is built from")
+    parser.add_argument('--recursive', action='store_true',
+                        help="List the recursive types")
+    parser.add_argument('--packets-only', action='store_true',
+                        help="Restrict --contains to packets")
+    parser.add_argument('--svg', type=Path, metavar='OUTPUT_DIR',
+                        help="Render every type to OUTPUT_DIR/<name>.svg")
+    args = parser.parse_args()
+
+    dot_path = args.dot_path or Path(__file__).parent.parent / "dot"
+    if not dot_path.is_dir():
+        print(f"Error: Input path '{dot_path}' is not a directory")
+        sys.exit(1)
+
+    try:
+        graph = TypeGraph(dot_path)
+        print(f"✓ Loaded {len(graph.types)} types from {dot_path}")
+        if graph.unresolved:
+            print(f"  {len(graph.unresolved)} typeNames without a .dot file")
+
+        for name in (args.contains, args.closure):
+            if name and name not in graph.types and name not in graph.referrers:
+                print(f"Error: Unknown type '{name}'")
+                sys.exit(1)
+
+        if args.contains:
+            found = graph.containing(args.contains, args.packets_only)
+            kind = "packets" if args.packets_only else "types"
+            print(f"\n{len(found)} {kind} contain {args.contains}:")
+            for name in sorted(found):
+                print(f"  {name}")
+
+        if args.closure:
+            found = graph.closure(args.closure)
+            print(f"\n{args.closure} is built from {len(found)} types:")
+            for name in sorted(found):
+                print(f"  {name}")
+
+        if args.recursive:
+            found = graph.recursive_types()
+            print(f"\n{len(found)} recursive types:")
+            for name in sorted(found):
+                print(f"  {name}")
+
+        if args.svg:
+            count = graph.write_svgs(args.svg)
+            print(f"\n✓ Wrote {count} SVG files to {args.svg}")
+
+    except BrokenPipeError:
+        # The reader (e.g. head) closed the pipe; point stdout at devnull so the
+        # interpreter's final flush does not raise again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Bulk decoding and encoding of homogeneous var-int arrays with NumPy.
+
+Many packets carry arrays whose items are small fixed-shape records made only
+of var-ints, for example the UpdateSubChunkNetworkBlockInfo items of
+UpdateSubChunkBlocksPacket (a BlockPos and four var-uints). Such an array is
+count * fields var-ints back to back, so it can be decoded in bulk:
+- The terminating byte of every var-int (high bit clear) is found with one
+  vectorized scan, which gives the start and length of each var-int
+- The 7-bit groups are shifted into place and OR-reduced per var-int
+- Signed fields are zig-zag decoded and every column is range checked
+- The var-ints are reshaped to (count, fields) and stored in a NumPy
+  structured array whose (nested) fields follow the record schema
+
+Encoding is the same in reverse: var-int lengths are computed for all values
+at once and the output bytes are filled one 7-bit group position at a time.
+
+The vectorized scan has a fixed cost of a few dozen NumPy calls, which is more
+than a plain loop spends on a short array. The count is read first, and arrays
+of fewer than BATCH_MIN_COUNT items are decoded one var-int at a time into the
+same NumPy array instead.
+
+A record is homogeneous when every leaf of its schema, through nested
+objects and $refs, is a compressed integer or boolean. Arrays of plain
+compressed integers decode to a one-dimensional array of their type.
+
+packet_codec.py uses these codecs for the arrays they apply to when a packet
+is compiled with batch_arrays=True; the decoded value of such an array is
+then a NumPy array instead of a list of dicts.
+
+NumPy is only needed by this module; the rest of the tools do not require it.
+
+Usage:
+    python varint_batch.py [input_path]
+
+    input_path: Optional path to directory containing JSON files (default: script directory)
+"""
+
+import json
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from packet_codec import is_uncompressed_count
+from schema_ir import CodecError, FIXED_FORMATS, classify_field, sorted_properties
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# A 64-bit value takes at most 10 groups of 7 bits
+MAX_VARINT_BYTES = 10
+
+# NumPy dtypes of the compressed base types
+BASE_DTYPES = {
+    'boolean': '?',
+    'int8': '<i1',
+    'uint8': '<u1',
+    'int16': '<i2',
+    'uint16': '<u2',
+    'int32': '<i4',
+    'uint32': '<u4',
+    'int64': '<i8',
+    'uint64': '<u8',
+}
+
+SIGNED_TYPES = {'int8', 'int16', 'int32', 'int64'}
+
+# Deepest nesting of objects and $refs followed inside one record
+MAX_RECORD_DEPTH = 8
+
+UINT32_COUNT = struct.Struct('<I')
+
+# Arrays with fewer items than this are decoded by a scalar loop (see decode_from)
+BATCH_MIN_COUNT = 64
+
+
+def require_numpy():
+    """Raise CodecError if NumPy is not installed."""
+    if np is None:
+        raise CodecError("Batch var-int decoding requires NumPy (pip install numpy)")
+
+
+class Column(NamedTuple):
+    """One var-int of a record: its path in the structured array and its base type."""
+    path: Tuple[str, ...]
+    base_type: str
+
+
+def record_layout(items: Dict[str, Any], definitions: Dict[str, Any]
+                  ) -> Optional[Tuple[List[Column], Any]]:
+    """
+    Work out the var-int columns of an array item schema.
+
+    Args:
+        items: The items schema of an array
+        definitions: Definitions the $refs of the schema point into
+
+    Returns:
+        Tuple of (columns in wire order, dtype description), or None if the
+        items are not made only of compressed integers
+    """
+    columns: List[Column] = []
+
+    def visit(schema: Dict[str, Any], path: Tuple[str, ...], depth: int) -> Optional[Any]:
+        if depth > MAX_RECORD_DEPTH:
+            return None
+        try:
+            kind, info = classify_field(schema, definitions)
+        except CodecError:
+            return None
+        if kind == 'varint':
+            columns.append(Column(path, info))
+            return BASE_DTYPES[info]
+        if kind == 'ref':
+            ref_id = info.split('/')[-1]
+            if ref_id not in definitions:
+                return None
+            return visit(definitions[ref_id], path, depth + 1)
+        if kind == 'object' and schema.get('properties'):
+            fields = []
+            for name, field in sorted_properties(schema):
+                dtype = visit(field, path + (name,), depth + 1)
+                if dtype is None:
+                    return None
+                fields.append((name, dtype))
+            return fields
+        return None
+
+    dtype = visit(items, (), 0)
+    if dtype is None:
+        return None
+    return columns, dtype
+
+
+def read_varuint(buf, pos: int) -> Tuple[int, int]:
+    """
+    Read one var-int at pos; returns (raw value, new_pos).
+
+    Raises:
+        CodecError: If the var-int is truncated or longer than MAX_VARINT_BYTES
+    """
+    value = shift = 0
+    end = pos + MAX_VARINT_BYTES
+    try:
+        while pos < end:
+            byte = buf[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value, pos
+            shift += 7
+    except IndexError:
+        raise CodecError(f"Truncated var-int at offset {pos}")
+    raise CodecError(f"Var-int longer than {MAX_VARINT_BYTES} bytes at offset {end - MAX_VARINT_BYTES}")
+
+
+def decode_varints(data, pos: int, count: int) -> Tuple[Any, int]:
+    """
+    Decode count consecutive var-ints starting at pos.
+
+    Args:
+        data: uint8 NumPy array over the buffer
+        pos: Offset of the first var-int
+        count: Number of var-ints
+
+    Returns:
+        Tuple of (uint64 array of the raw values, offset after the last var-int)
+    """
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64), pos
+    chunk = data[pos:min(len(data), pos + count * MAX_VARINT_BYTES)]
+    ends = np.flatnonzero(chunk < 0x80)
+    if len(ends) < count:
+        raise CodecError(f"Truncated var-int array at offset {pos}")
+    ends = ends[:count]
+    starts = np.empty(count, dtype=np.intp)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    if lengths.max() > MAX_VARINT_BYTES:
+        raise CodecError(f"Var-int longer than {MAX_VARINT_BYTES} bytes in array at offset {pos}")
+
+    used = chunk[:ends[-1] + 1]
+    group = np.arange(len(used)) - np.repeat(starts, lengths)
+    shifted = (used & 0x7f).astype(np.uint64) << (group * 7).astype(np.uint64)
+    return np.bitwise_or.reduceat(shifted, starts), pos + int(ends[-1]) + 1
+
+
+def encode_varints(values) -> bytes:
+    """Encode a uint64 array as consecutive var-ints."""
+    if len(values) == 0:
+        return b''
+    lengths = np.ones(len(values), dtype=np.intp)
+    for group in range(1, MAX_VARINT_BYTES):
+        lengths += values >= np.uint64(1 << (7 * group))
+    starts = np.cumsum(lengths) - lengths
+    out = np.empty(int(starts[-1] + lengths[-1]), dtype=np.uint8)
+    for group in range(int(lengths.max())):
+        mask = lengths > group
+        groups = (values[mask] >> np.uint64(7 * group)) & np.uint64(0x7f)
+        more = (lengths[mask] > group + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[mask] + group] = (groups | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def to_wire(column, base_type: str):
+    """Return the uint64 wire values of a column (zig-zag encoded if signed)."""
+    if base_type in SIGNED_TYPES:
+        signed = column.astype(np.int64)
+        return ((signed << 1) ^ (signed >> 63)).view(np.uint64)
+    return column.astype(np.uint64)
+
+
+def from_wire(values, base_type: str):
+    """Return a column of its base type from uint64 wire values, range checked."""
+    if base_type == 'boolean':
+        return values != 0
+    if base_type in SIGNED_TYPES:
+        values = ((values >> np.uint64(1)) ^ (np.uint64(0) - (values & np.uint64(1)))).view(np.int64)
+    dtype = np.dtype(BASE_DTYPES[base_type])
+    if dtype.itemsize < 8 and len(values):
+        limits = np.iinfo(dtype)
+        if values.min() < limits.min or values.max() > limits.max:
+            raise CodecError(f"Var-int value out of range for {base_type}")
+    return values.astype(dtype)
+
+
+def compile_row_reader(columns: List[Column]):
+    """
+    Compile the scalar loop of decode_rows for a list of columns.
+
+    The function takes (buf, pos, count) and returns (values, new_pos), the
+    values being those of every column of every item in wire order, zig-zag
+    decoded. Like the packet codecs it is straight-line code, with single-byte
+    var-ints decoded inline. It raises IndexError if buf ends early.
+    """
+    lines = ['def read_rows(buf, pos, count):',
+             '    values = []',
+             '    append = values.append',
+             '    for _ in range(count):']
+    for column in columns:
+        lines += ['        v = buf[pos]; pos += 1',
+                  '        if v > 0x7f: v, pos = read_varuint(buf, pos - 1)']
+        if column.base_type in SIGNED_TYPES:
+            lines.append('        append((v >> 1) ^ -(v & 1))')
+        else:
+            lines.append('        append(v)')
+    lines.append('    return values, pos')
+    namespace = {'read_varuint': read_varuint}
+    exec(compile('\n'.join(lines), '<varint_batch rows>', 'exec'), namespace)
+    return namespace['read_rows']
+
+
+class BatchArrayCodec:
+    """Decodes and encodes one homogeneous var-int array schema in bulk."""
+
+    def __init__(self, field: Dict[str, Any], definitions: Dict[str, Any]):
+        """
+        Args:
+            field: The array schema
+            definitions: Definitions the $refs of the schema point into
+
+        Raises:
+            CodecError: If NumPy is missing or the items are not homogeneous var-ints
+        """
+        require_numpy()
+        layout = record_layout(field.get('items', {}), definitions)
+        if layout is None:
+            raise CodecError("Array items are not made only of compressed integers")
+        self.columns, dtype = layout
+        self.dtype = np.dtype(dtype)
+        self.uncompressed_count = is_uncompressed_count(field)
+        # struct format of one item, laid out like self.dtype (packed, little endian)
+        self.row_format = ''.join(FIXED_FORMATS[column.base_type] for column in self.columns)
+        self._read_rows = compile_row_reader(self.columns)
+
+    @classmethod
+    def for_field(cls, field: Dict[str, Any], definitions: Dict[str, Any]) -> Optional['BatchArrayCodec']:
+        """Return a codec for an array schema, or None if it does not apply."""
+        if np is None or record_layout(field.get('items', {}), definitions) is None:
+            return None
+        return cls(field, definitions)
+
+    def decode_from(self, buf, pos: int) -> Tuple[Any, int]:
+        """
+        Decode the array (count included) starting at pos; returns (array, new_pos).
+
+        Arrays shorter than BATCH_MIN_COUNT go through decode_rows.
+        """
+        if self.uncompressed_count:
+            if pos + 4 > len(buf):
+                raise CodecError(f"Truncated array count at offset {pos}")
+            count, = UINT32_COUNT.unpack_from(buf, pos)
+            pos += 4
+        else:
+            count, pos = read_varuint(buf, pos)
+        if count < BATCH_MIN_COUNT:
+            return self.decode_rows(buf, pos, count)
+
+        data = np.frombuffer(buf, dtype=np.uint8)
+        values, pos = decode_varints(data, pos, count * len(self.columns))
+        values = values.reshape(count, len(self.columns))
+        if not self.dtype.names:
+            return from_wire(values[:, 0], self.columns[0].base_type), pos
+
+        result = np.zeros(count, dtype=self.dtype)
+        for index, column in enumerate(self.columns):
+            target = result
+            for name in column.path[:-1]:
+                target = target[name]
+            target[column.path[-1]] = from_wire(values[:, index], column.base_type)
+        return result, pos
+
+    def decode_rows(self, buf, pos: int, count: int) -> Tuple[Any, int]:
+        """
+        Decode count items one var-int at a time; returns (array, new_pos).
+
+        The values are packed with struct, which also range checks them, into
+        the bytes of the array.
+        """
+        start = pos
+        try:
+            values, pos = self._read_rows(buf, pos, count)
+            packed = struct.pack(f'<{self.row_format * count}', *values)
+        except IndexError:
+            raise CodecError(f"Truncated var-int array at offset {start}")
+        except struct.error as e:
+            raise CodecError(f"Var-int value out of range in array at offset {start}: {e}")
+        return np.frombuffer(bytearray(packed), dtype=self.dtype), pos
+
+    def encode_into(self, array, out: bytearray):
+        """
+        Append the encoded array (count included) to out.
+
+        array is a NumPy array of this codec's dtype, or anything np.asarray
+        converts to one (such as a list of tuples).
+        """
+        array = np.asarray(array, dtype=self.dtype)
+        if self.uncompressed_count:
+            out += UINT32_COUNT.pack(len(array))
+        else:
+            out += encode_varints(np.array([len(array)], dtype=np.uint64))
+        if len(array) == 0:
+            return
+
+        wire = []
+        for column in self.columns:
+            source = array
+            for name in column.path:
+                source = source[name]
+            wire.append(to_wire(source, column.base_type))
+        out += encode_varints(np.stack(wire, axis=1).ravel())
+
+
+def find_batch_arrays(schema: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    List the arrays of a packet schema that decode in bulk.
+
+    Returns:
+        (location, array schema) pairs; location is 'Definition Title.Field' or
+        'Packet.Field' for arrays at the top level
+    """
+    definitions = schema.get('definitions', {})
+    found = []
+
+    def scan(owner: str, container: Dict[str, Any]):
+        for name, field in container.get('properties', {}).items():
+            if field.get('type') == 'array' and record_layout(field.get('items', {}), definitions):
+                found.append((f'{owner}.{name}', field))
+
+    scan(schema.get('title', 'Packet'), schema)
+    for ref_id, definition in definitions.items():
+        scan(definition.get('title', ref_id), definition)
+    return found
+
+
+def main():
+    """Main entry point for the script."""
+    input_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent
+
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    total = 0
+    for json_file in sorted(input_path.glob("*.json")):
+        if json_file.name.startswith("enum_"):
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or '$metaProperties' not in data:
+            continue
+        for location, field in find_batch_arrays(data):
+            layout = record_layout(field['items'], data.get('definitions', {}))
+            columns = ', '.join('.'.join(column.path) or column.base_type for column in layout[0])
+            print(f"{data.get('title', json_file.stem)}: {location} [{columns}]")
+            total += 1
+
+    print(f"✓ {total} homogeneous var-int arrays")
+    if np is None:
+        print("Warning: NumPy is not installed; batch decoding is unavailable")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Estimate the encoded size of packets from their JSON schemas.
+
+Sizes follow the wire rules of packet_codec.py and are reported as a
+(minimum, maximum, typical) byte count, where a maximum of None means the
+encoding is unbounded (strings, arrays and maps without a maxLength/maxItems,
+recursive definitions, or references missing from the schema such as NBT tags).
+
+- Fixed-width scalars cost their x-underlying-type width
+- Var-ints cost 1 to ceil(bits / 7) bytes, narrowed by minimum/maximum
+- Strings, arrays and maps cost their length prefix plus their contents
+- oneOf unions cost their control value plus the smallest/largest variant
+
+Typical sizes assume small values: var-ints of up to 32 bits take one byte
+(counts, enums, small coordinates), 64-bit var-ints three bytes (unique ids),
+strings TYPICAL_STRING_LENGTH bytes and arrays/maps TYPICAL_ITEM_COUNT entries,
+all clamped to the schema's constraints. String lengths are counted in bytes.
+
+Usage:
+    python wire_size.py [input_path] [output_file]
+
+    input_path: Optional path to directory containing JSON files (default: script directory)
+    output_file: Optional path of the JSON report (default: ./wire_sizes.json in script directory)
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from packet_codec import SIGNED_TYPES, is_uncompressed_count
+from schema_ir import CodecError, DEFAULT_CONTROL_VALUE_TYPE, SchemaIR, map_schemas
+
+
+# Bit widths of integer underlying types
+INTEGER_BITS = {
+    'boolean': 8,
+    'int8': 8,
+    'uint8': 8,
+    'int16': 16,
+    'uint16': 16,
+    'int32': 32,
+    'uint32': 32,
+    'int64': 64,
+    'uint64': 64,
+}
+
+# Byte widths of fixed struct formats
+FORMAT_SIZES = {'?': 1, 'b': 1, 'B': 1, 'h': 2, 'H': 2, 'i': 4, 'I': 4, 'q': 8, 'Q': 8, 'f': 4, 'd': 8}
+
+TYPICAL_STRING_LENGTH = 16
+TYPICAL_ITEM_COUNT = 4
+
+
+class WireSize(NamedTuple):
+    """Encoded size range of a value in bytes; maximum is None when unbounded."""
+    minimum: int
+    maximum: Optional[int]
+    typical: int
+
+    def __add__(self, other: 'WireSize') -> 'WireSize':
+        maximum = None
+        if self.maximum is not None and other.maximum is not None:
+            maximum = self.maximum + other.maximum
+        return WireSize(self.minimum + other.minimum, maximum, self.typical + other.typical)
+
+    def format(self) -> str:
+        """Return a short human readable form, e.g. '3-15 B (typ. 3)'."""
+        if self.maximum is None:
+            size_range = f'{self.minimum}+ B'
+        elif self.maximum == self.minimum:
+            return f'{self.minimum} B'
+        else:
+            size_range = f'{self.minimum}-{self.maximum} B'
+        return f'{size_range} (typ. {self.typical})'
+
+    def to_json(self) -> Dict[str, Optional[int]]:
+        """Return the size as a JSON object."""
+        return {'min': self.minimum, 'max': self.maximum, 'typical': self.typical}
+
+
+EMPTY_SIZE = WireSize(0, 0, 0)
+
+
+def varint_length(value: int) -> int:
+    """Return the number of bytes of an unsigned var-int."""
+    length = 1
+    while value > 0x7f:
+        value >>= 7
+        length += 1
+    return length
+
+
+def zigzag(value: int) -> int:
+    """Return the zig-zag encoding of a signed value."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def clamp(value: int, minimum: int, maximum: Optional[int]) -> int:
+    """Clamp value into [minimum, maximum]; maximum may be None."""
+    value = max(value, minimum)
+    return value if maximum is None else min(value, maximum)
+
+
+def varint_size(base_type: str, field: Dict[str, Any]) -> WireSize:
+    """Return the size of a var-int, narrowed by the field's minimum/maximum."""
+    bits = INTEGER_BITS[base_type]
+    signed = base_type in SIGNED_TYPES
+    lowest = -(1 << (bits - 1)) if signed else 0
+    highest = (1 << (bits - 1)) - 1 if signed else (1 << bits) - 1
+    if 'minimum' in field:
+        lowest = max(lowest, int(field['minimum']))
+    if 'maximum' in field:
+        highest = min(highest, int(field['maximum']))
+
+    if signed:
+        if lowest <= 0 <= highest:
+            smallest = 0
+        else:
+            smallest = min(zigzag(lowest), zigzag(highest))
+        largest = max(zigzag(lowest), zigzag(highest))
+    else:
+        smallest, largest = lowest, highest
+
+    minimum = varint_length(smallest)
+    maximum = varint_length(largest)
+    typical = 3 if bits == 64 else 1
+    return WireSize(minimum, maximum, clamp(typical, minimum, maximum))
+
+
+def length_prefixed_size(item: WireSize, field: Dict[str, Any], min_key: str, max_key: str,
+                         typical_count: int, fixed_count_prefix: bool = False) -> WireSize:
+    """
+    Return the size of a counted sequence of items.
+
+    Args:
+        item: Size of one item
+        field: Schema carrying the count constraints
+        min_key: Name of the minimum count constraint (minItems/minLength)
+        max_key: Name of the maximum count constraint (maxItems/maxLength)
+        typical_count: Item count assumed for the typical size
+        fixed_count_prefix: Whether the count is a uint32 rather than a varuint32
+    """
+    min_count = int(field.get(min_key, 0))
+    max_count = int(field[max_key]) if max_key in field else None
+    count = clamp(typical_count, min_count, max_count)
+
+    if fixed_count_prefix:
+        prefix = WireSize(4, 4, 4)
+    else:
+        prefix = WireSize(
+            varint_length(min_count),
+            varint_length(max_count) if max_count is not None else 5,
+            varint_length(count)
+        )
+
+    maximum = None
+    if max_count is not None and item.maximum is not None:
+        maximum = max_count * item.maximum
+    return prefix + WireSize(min_count * item.minimum, maximum, count * item.typical)
+
+
+def union_size(sizes: Iterable[WireSize]) -> WireSize:
+    """Return the size of one value out of several alternatives."""
+    sizes = list(sizes)
+    if not sizes:
+        return EMPTY_SIZE
+    maximum = None
+    if all(size.maximum is not None for size in sizes):
+        maximum = max(size.maximum for size in sizes)
+    typical = round(sum(size.typical for size in sizes) / len(sizes))
+    return WireSize(min(size.minimum for size in sizes), maximum, typical)
+
+
+class WireSizeEstimator:
+    """Computes wire sizes for the fields and definitions of one packet schema."""
+
+    def __init__(self, definitions: Dict[str, Any], ir: Optional[SchemaIR] = None):
+        """Initialize the estimator for a packet's definitions, classifying fields through ir if given."""
+        self.definitions = definitions
+        self.ir = ir or SchemaIR(definitions)
+        self.definition_sizes: Dict[str, WireSize] = {}
+        # Referenced ids without a definition, sized as opaque unbounded data
+        self.unresolved = set()
+        # Definitions currently being sized, to detect recursion
+        self._in_progress = set()
+
+    def definition_size(self, ref_id: str) -> WireSize:
+        """Return the size of a definition by id."""
+        if ref_id in self.definition_sizes:
+            return self.definition_sizes[ref_id]
+        if ref_id not in self.definitions:
+            self.unresolved.add(ref_id)
+            return WireSize(0, None, 0)
+        if ref_id in self._in_progress:
+            # A recursive value must end somewhere; its depth is unbounded
+            return WireSize(0, None, 0)
+
+        self._in_progress.add(ref_id)
+        size = self.field_size(self.definitions[ref_id])
+        self._in_progress.discard(ref_id)
+        if not self._in_progress:
+            # Sizes computed inside a cycle depend on where it was entered
+            self.definition_sizes[ref_id] = size
+        return size
+
+    def field_size(self, field: Dict[str, Any]) -> WireSize:
+        """Return the size of a value described by a field schema."""
+        kind, info = self.ir.classify(field)
+
+        if kind == 'fixed':
+            width = FORMAT_SIZES[info[1]]
+            return WireSize(width, width, width)
+        if kind == 'varint':
+            return varint_size(info, field)
+        if kind == 'string':
+            return self.string_size(field)
+        if kind == 'empty':
+            return EMPTY_SIZE
+        if kind == 'ref':
+            return self.definition_size(info.split('/')[-1])
+        if kind == 'object':
+            size = EMPTY_SIZE
+            for prop in field.get('properties', {}).values():
+                size += self.field_size(prop)
+            return size
+        if kind == 'array':
+            return length_prefixed_size(
+                self.field_size(field.get('items', {})), field, 'minItems', 'maxItems',
+                TYPICAL_ITEM_COUNT, is_uncompressed_count(field)
+            )
+        if kind == 'map':
+            return length_prefixed_size(
+                self.map_entry_size(field), field, 'minProperties', 'maxProperties', TYPICAL_ITEM_COUNT
+            )
+        return self.oneof_size(field)
+
+    def string_size(self, field: Dict[str, Any]) -> WireSize:
+        """Return the size of a string, using the enum names when the field has them."""
+        if field.get('enum'):
+            name_sizes = [varint_length(len(name.encode('utf-8'))) + len(name.encode('utf-8'))
+                          for name in field['enum']]
+            typical = round(sum(name_sizes) / len(name_sizes))
+            return WireSize(min(name_sizes), max(name_sizes), typical)
+        return length_prefixed_size(
+            WireSize(1, 1, 1), field, 'minLength', 'maxLength', TYPICAL_STRING_LENGTH
+        )
+
+    def map_entry_size(self, field: Dict[str, Any]) -> WireSize:
+        """Return the size of one key/value entry of a map."""
+        key_schema, value_schema = map_schemas(field)
+        return self.field_size(key_schema) + self.field_size(value_schema)
+
+    def oneof_size(self, field: Dict[str, Any]) -> WireSize:
+        """Return the size of a oneOf union including its control value."""
+        variants = field['oneOf']
+        control_type = field.get('x-control-value-type', DEFAULT_CONTROL_VALUE_TYPE)
+        if control_type.startswith('var'):
+            # Control values are the variants' x-ordinal-index, or their position
+            highest = max((variant.get('x-ordinal-index', idx) for idx, variant in enumerate(variants)), default=0)
+            control = varint_size(control_type[3:], {'minimum': 0, 'maximum': highest})
+        else:
+            width = INTEGER_BITS[control_type] // 8
+            control = WireSize(width, width, width)
+        return control + union_size(self.field_size(variant) for variant in variants)
+
+    def array_elements(self, schema: Dict[str, Any], path: str = '') -> Iterable[Tuple[str, WireSize]]:
+        """
+        Yield the per-element size of every array and map reachable from a schema.
+
+        Returns:
+            Iterable of (field path, element size) pairs, where the path joins
+            field names with '/'
+        """
+        return self._iter_elements(schema, path, set())
+
+    def _iter_elements(self, schema: Dict[str, Any], path: str,
+                       visited: set) -> Iterable[Tuple[str, WireSize]]:
+        """Walk a schema for array_elements, following each definition once per path."""
+        if '$ref' in schema:
+            ref_id = schema['$ref'].split('/')[-1]
+            if ref_id in visited or ref_id not in self.definitions:
+                return
+            yield from self._iter_elements(self.definitions[ref_id], path, visited | {ref_id})
+            return
+
+        if schema.get('type') == 'array':
+            items = schema.get('items', {})
+            yield path, self.field_size(items)
+            yield from self._iter_elements(items, path, visited)
+        elif schema.get('type') == 'object' and 'additionalProperties' in schema:
+            yield path, self.map_entry_size(schema)
+            for entry_schema in map_schemas(schema):
+                yield from self._iter_elements(entry_schema, path, visited)
+
+        for name, prop in schema.get('properties', {}).items():
+            yield from self._iter_elements(prop, f'{path}/{name}' if path else name, visited)
+        for variant in schema.get('oneOf', []):
+            yield from self._iter_elements(variant, path, visited)
+
+
+def estimate_packet(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Estimate the sizes of a loaded packet schema.
+
+    Returns:
+        Report entry with the packet id, total size, per-element sizes of its
+        arrays and maps, unresolved references, and the sizes of its definitions
+    """
+    estimator = WireSizeEstimator(schema.get('definitions', {}))
+    total = estimator.field_size({k: v for k, v in schema.items() if k != 'definitions'})
+    definitions = {}
+    for ref_id, definition in estimator.definitions.items():
+        definitions[ref_id] = {
+            'title': definition.get('title', ref_id),
+            **estimator.definition_size(ref_id).to_json()
+        }
+    return {
+        'id': schema.get('$metaProperties', {}).get('[cereal:packet]'),
+        'size': total.to_json(),
+        'elements': {path: size.to_json() for path, size in estimator.array_elements(schema)},
+        'unresolved': sorted(estimator.unresolved),
+        'definitions': definitions
+    }
+
+
+def build_report(source_dir: Path) -> Dict[str, Any]:
+    """Estimate every packet schema in source_dir into a JSON report."""
+    packets = {}
+    definitions = {}
+    for json_file in sorted(source_dir.glob("*.json")):
+        if json_file.name.startswith("enum_"):
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or '$metaProperties' not in data:
+            continue
+        try:
+            entry = estimate_packet(data)
+        except CodecError as e:
+            print(f"Warning: Could not size {json_file}: {e}")
+            continue
+        # Definition ids are derived from the type, so they are shared by all packets
+        definitions.update(entry.pop('definitions'))
+        packets[data.get('title', json_file.stem)] = entry
+    return {'packets': packets, 'definitions': definitions}
+
+
+def main():
+    """Main entry point for the script."""
+    input_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent
+    output_path = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(__file__).parent / "wire_sizes.json"
+
+    if not input_path.is_dir():
+        print(f"Error: Input path '{input_path}' is not a directory")
+        sys.exit(1)
+
+    report = build_report(input_path)
+    if not report['packets']:
+        print(f"Warning: No packet schemas found in {input_path}")
+        sys.exit(1)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    unbounded = sum(1 for entry in report['packets'].values() if entry['size']['max'] is None)
+    print(f"✓ Sized {len(report['packets'])} packets ({unbounded} unbounded)")
+    print(f"✓ Output file: {output_path}")
+
+
+if __name__ == "__main__":
+    main()